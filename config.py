@@ -27,4 +27,183 @@ LLM_MODEL_TYPE = 'openai'
 # Local (LM Studio): 'llama-3.2' | URL: 'http://localhost:1234/v1'
 
 LLM_MODEL = 'google/gemini-2.0-flash-001' 
-LLM_API_URL = 'https://openrouter.ai/api/v1' # Set this to your provider's base URL
\ No newline at end of file
+LLM_API_URL = 'https://openrouter.ai/api/v1' # Set this to your provider's base URL
+
+# --- LLM RESPONSE CACHE ---
+# Opt-in cache of LLM replies keyed on model, temperature and rendered prompt.
+# Re-running the same resume or cover letter is then served from disk.
+LLM_CACHE_ENABLED = False
+LLM_CACHE_PATH = 'data_folder/output/llm_cache.sqlite'
+LLM_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+LLM_CACHE_MAX_ENTRIES = 10000
+LLM_CACHE_MAX_BYTES = 200 * 1024 * 1024
+LLM_CACHE_MEMORY_ENTRIES = 256
+
+# --- LLM RATE LIMITING ---
+# Shared by every LLM client in the process; lowered automatically when the
+# provider advertises smaller limits or answers with 429.
+LLM_REQUESTS_PER_MINUTE = 60
+LLM_TOKENS_PER_MINUTE = 200000
+LLM_BACKOFF_BASE_SECONDS = 2
+LLM_BACKOFF_MAX_SECONDS = 60
+
+# --- LLM RETRIES AND CIRCUIT BREAKER ---
+# Retryable errors (429, 5xx, timeouts) are retried within this budget and
+# deadline; fatal errors (400, 401, parse errors) are raised immediately.
+LLM_MAX_RETRIES = 5
+LLM_RETRY_DEADLINE_SECONDS = 300
+LLM_CIRCUIT_FAILURE_THRESHOLD = 5
+LLM_CIRCUIT_RECOVERY_SECONDS = 60
+
+# --- LLM BACKENDS AND HEDGING ---
+# Optional ordered list of backends used by the job application answerer, e.g.
+# LLM_BACKENDS = [
+#     {'llm_model_type': 'openai', 'llm_model': 'google/gemini-2.0-flash-001', 'llm_api_url': 'https://openrouter.ai/api/v1'},
+#     {'llm_model_type': 'openai', 'llm_model': 'gpt-4o-mini', 'llm_api_url': 'https://api.openai.com/v1', 'api_key': '...'},
+# ]
+# When empty, LLM_MODEL_TYPE / LLM_MODEL / LLM_API_URL is the only backend.
+# A request slower than its backend's rolling p95 is duplicated to the next
+# backend and the first answer wins; failing backends are moved to the back.
+# Backend calls run on a shared pool of LLM_HEDGE_MAX_WORKERS threads.
+LLM_BACKENDS = []
+LLM_HEDGE_ENABLED = True
+LLM_HEDGE_MIN_SAMPLES = 10
+LLM_HEDGE_MAX_WORKERS = 8
+LLM_LATENCY_WINDOW = 100
+LLM_BACKEND_MAX_ERROR_RATE = 0.5
+
+# --- LLM HTTP TRANSPORT ---
+# One pooled HTTP client is shared by every LLM client so connections, TLS
+# sessions and HTTP/2 streams are reused across calls and jobs.
+LLM_HTTP2 = True
+LLM_HTTP_MAX_CONNECTIONS = 100
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS = 60
+LLM_HTTP_TIMEOUT_SECONDS = 120
+LLM_HTTP_CONNECT_TIMEOUT_SECONDS = 10
+
+# --- LLM TASK MODELS ---
+# Optional per-task backend overrides, merged over LLM_MODEL_TYPE / LLM_MODEL /
+# LLM_API_URL. Tasks: 'resume', 'resume_job_description', 'cover_letter',
+# 'job_parser' and 'job_application'. Models are built once per
+# (type, model, url, temperature) and shared, e.g.
+# LLM_TASK_MODELS = {
+#     'job_parser': {'llm_model_type': 'ollama', 'llm_model': 'llama3.2', 'llm_api_url': 'http://localhost:11434'},
+#     'cover_letter': {'temperature': 0.7},
+# }
+LLM_TASK_MODELS = {}
+
+# --- LLM PROMPT TOKEN BUDGETS ---
+# Maximum prompt tokens per call. Oversized inputs (long scraped job pages,
+# large resumes) are trimmed, lowest priority first, before the prompt is sent.
+# Per-task overrides use the task names of LLM_TASK_MODELS.
+LLM_PROMPT_TOKEN_BUDGET = 16000
+LLM_PROMPT_TOKEN_BUDGETS = {}
+
+# --- LLM BATCH MODE ---
+# Offline bulk generation of tailored resumes and cover letters. 'openai'
+# submits to the OpenAI Batch API (the provider at LLM_BATCH_API_URL must
+# support it); 'local' answers batches from files, for tests and dry runs.
+LLM_BATCH_BACKEND = 'openai'
+LLM_BATCH_API_URL = 'https://api.openai.com/v1'
+LLM_BATCH_COMPLETION_WINDOW = '24h'
+LLM_BATCH_POLL_SECONDS = 60
+LLM_BATCH_DIRECTORY = 'data_folder/output/batch'
+
+# --- LLM ANSWER CACHE ---
+# Opt-in reuse of answers to application form questions: an answer is reused
+# when a new question is close enough in meaning to one already answered for
+# the same resume and profile (and the same job, for job-specific answers).
+# Questions are embedded locally with LLM_ANSWER_CACHE_EMBEDDING_MODEL; entries
+# persist across runs.
+LLM_ANSWER_CACHE_ENABLED = False
+LLM_ANSWER_CACHE_PATH = 'data_folder/output/answer_cache.sqlite'
+LLM_ANSWER_CACHE_SIMILARITY = 0.9
+LLM_ANSWER_CACHE_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+
+# --- QUESTION ROUTING ---
+# Opt-in local routing of application questions to their resume/profile
+# section (and upload fields to resume or cover letter), with keyword rules and
+# then the nearest example-question centroid. The LLM is only asked when the best
+# centroid is below LLM_ROUTER_MIN_SIMILARITY or within LLM_ROUTER_MIN_MARGIN
+# of the runner-up.
+LLM_ROUTER_ENABLED = False
+LLM_ROUTER_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+LLM_ROUTER_MIN_SIMILARITY = 0.45
+LLM_ROUTER_MIN_MARGIN = 0.05
+LLM_ROUTER_CENTROIDS_PATH = 'data_folder/output/router_centroids.json'
+
+# --- LOCAL EXPERIENCE ANSWERS ---
+# Opt-in: "Years of experience with X" questions are answered from the
+# employment periods and skills of the resume, merging overlapping jobs. The LLM is only
+# asked about skills no dated job lists or names.
+LLM_EXPERIENCE_ENGINE_ENABLED = False
+
+# --- LOCAL OPTION ANSWERS ---
+# Opt-in: dropdown and radio questions about work authorization, visas, sponsorship,
+# relocation, work mode, screenings and self-identification are answered from
+# the job application profile when exactly one option fits the profile value.
+# Fuzzy matches of non yes/no values need LLM_OPTION_MATCH_MIN_RATIO similarity.
+LLM_OPTION_MATCHER_ENABLED = False
+LLM_OPTION_MATCH_MIN_RATIO = 0.85
+
+# --- JOB RANKING ---
+# Opt-in: jobs are scored against the resume with local embeddings, blended
+# with the share of resume skills the posting names (LLM_JOB_RANKER_SKILLS_WEIGHT).
+# Jobs scoring at least LLM_JOB_RANKER_ACCEPT_SCORE are suitable and jobs below
+# LLM_JOB_RANKER_REJECT_SCORE are not; only the jobs in between are scored by
+# the LLM and held against JOB_SUITABILITY_SCORE. The thresholds are a starting
+# point and are not calibrated for every resume.
+LLM_JOB_RANKER_ENABLED = False
+LLM_JOB_RANKER_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+LLM_JOB_RANKER_SKILLS_WEIGHT = 0.3
+LLM_JOB_RANKER_ACCEPT_SCORE = 0.6
+LLM_JOB_RANKER_REJECT_SCORE = 0.3
+LLM_JOB_RANKER_TOP_N = 50
+
+# --- JOB SUMMARY CACHE ---
+# Job description summaries are stored per model, summarize prompt template and
+# description, so each job is summarized once per model and template, across
+# runs as well. The resume and cover letter generators share a summary when
+# their templates match; the application answerer has its own template, so its
+# summaries are separate entries.
+LLM_JOB_SUMMARY_CACHE_ENABLED = True
+LLM_JOB_SUMMARY_CACHE_PATH = 'data_folder/output/job_summaries.sqlite'
+LLM_JOB_SUMMARY_CACHE_MEMORY_ENTRIES = 128
+
+# --- BULK JOB EXTRACTION ---
+# Many job pages are parsed by packing several of them into one extraction
+# request, within the job parser's prompt token budget. Each page is cut to
+# LLM_BULK_EXTRACTION_JOB_TOKENS; a pack holds at most
+# LLM_BULK_EXTRACTION_MAX_JOBS pages so the reply stays within output limits.
+LLM_BULK_EXTRACTION_MAX_JOBS = 8
+LLM_BULK_EXTRACTION_JOB_TOKENS = 3000
+
+# --- LOCAL EMBEDDINGS ---
+# Sentence-transformers model indexing fetched job pages for extraction. Every
+# local embedding model is loaded once per process, on first use; with
+# LLM_EMBEDDING_WARM_UP they are loaded in the background at startup instead.
+LLM_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+LLM_EMBEDDING_WARM_UP = False
+# Vectors of job page chunks, retrieval queries and ranked job descriptions are
+# kept on disk per model and text hash, so known texts are not embedded again.
+# Beyond LLM_EMBEDDING_CACHE_MAX_MB the least recently used are evicted.
+LLM_EMBEDDING_CACHE_ENABLED = True
+LLM_EMBEDDING_CACHE_PATH = 'data_folder/output/embeddings.sqlite'
+LLM_EMBEDDING_CACHE_MAX_MB = 256
+
+# --- MAIN CONTENT EXTRACTION ---
+# Job pages are reduced to the visible text of their main content (readability
+# style scoring, boilerplate removal) before they are chunked and embedded,
+# instead of indexing the whole body outerHTML. When the detected main content
+# is shorter than LLM_MAIN_CONTENT_MIN_CHARS, all visible text is kept.
+LLM_MAIN_CONTENT_EXTRACTION = True
+LLM_MAIN_CONTENT_MIN_CHARS = 250
+
+# --- STRUCTURED JOB DATA ---
+# Job fields found in a page's schema.org JobPosting (JSON-LD or microdata),
+# job board meta titles or mailto: links are taken as they are; only the
+# missing ones are retrieved and extracted by the LLM. Descriptions shorter than
+# LLM_STRUCTURED_MIN_DESCRIPTION_CHARS are teasers and left to the LLM.
+LLM_STRUCTURED_EXTRACTION = True
+LLM_STRUCTURED_MIN_DESCRIPTION_CHARS = 200
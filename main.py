@@ -12,6 +12,9 @@ from selenium.common.exceptions import WebDriverException
 from selenium.webdriver.chrome.service import Service as ChromeService
 from webdriver_manager.chrome import ChromeDriverManager
 import re
+import config as cfg
+from src.libs.embeddings import warm_up
+from src.libs.prompt_serializer import get_prompt_serializer
 from src.libs.resume_and_cover_builder import ResumeFacade, ResumeGenerator, StyleManager
 from src.resume_schemas.job_application_profile import JobApplicationProfile
 from src.resume_schemas.resume import Resume
@@ -463,6 +466,68 @@ def create_resume_pdf(parameters: dict, llm_api_key: str):
         logger.exception(f"An error occurred while creating the CV: {e}")
         raise
 
+
+
+def create_batch_applications(parameters: dict, llm_api_key: str):
+    """
+    Logic to create tailored resumes and cover letters for many jobs through the offline batch API.
+    """
+    try:
+        logger.info("Generating tailored resumes and cover letters in batch mode.")
+
+        with open(parameters["uploads"]["plainTextResume"], "r", encoding="utf-8") as file:
+            plain_text_resume = file.read()
+
+        style_manager = StyleManager()
+        available_styles = style_manager.get_styles()
+
+        if not available_styles:
+            logger.warning("No styles available. Proceeding without style selection.")
+        else:
+            # Present style choices to the user
+            choices = style_manager.format_choices(available_styles)
+            questions = [
+                inquirer.List(
+                    "style",
+                    message="Select a style for the resume:",
+                    choices=choices,
+                )
+            ]
+            style_answer = inquirer.prompt(questions)
+            if style_answer and "style" in style_answer:
+                selected_choice = style_answer["style"]
+                for style_name, (file_name, author_link) in available_styles.items():
+                    if selected_choice.startswith(style_name):
+                        style_manager.set_selected_style(style_name)
+                        logger.info(f"Selected style: {style_name}")
+                        break
+            else:
+                logger.warning("No style selected. Proceeding with default style.")
+
+        # The jobs file is a YAML list of job URLs, or of mappings with a 'link' and an optional 'description'
+        questions = [inquirer.Text('jobs_file', message="Please enter the path of the YAML file listing the jobs:")]
+        answers = inquirer.prompt(questions)
+        jobs = ConfigValidator.load_yaml(Path(answers.get('jobs_file')))
+        jobs = [{"link": job} if isinstance(job, str) else job for job in jobs or []]
+
+        resume_generator = ResumeGenerator()
+        resume_object = Resume(plain_text_resume)
+        driver = init_browser()
+        resume_generator.set_resume_object(resume_object)
+        resume_facade = ResumeFacade(
+            api_key=llm_api_key,
+            style_manager=style_manager,
+            resume_generator=resume_generator,
+            resume_object=resume_object,
+            output_path=Path("data_folder/output"),
+        )
+        resume_facade.set_driver(driver)
+        finished = resume_facade.create_batch_applications(jobs, Path(parameters["outputFileDirectory"]))
+        logger.info(f"Batch generation finished {len(finished)} of {len(jobs)} jobs")
+    except Exception as e:
+        logger.exception(f"An error occurred while generating in batch mode: {e}")
+        raise
+
         
 def handle_inquiries(selected_actions: List[str], parameters: dict, llm_api_key: str):
     """
@@ -486,6 +551,11 @@ def handle_inquiries(selected_actions: List[str], parameters: dict, llm_api_key:
                 logger.info("Designing a personalized cover letter to enhance your job application...")
                 create_cover_letter(parameters, llm_api_key)
 
+            if "Generate Tailored Resumes and Cover Letters in Batch" == selected_actions:
+                logger.info("Preparing tailored applications for all listed jobs in batch mode...")
+                create_batch_applications(parameters, llm_api_key)
+
+            get_prompt_serializer().log_savings_report()
         else:
             logger.warning("No actions selected. Nothing to execute.")
     except Exception as e:
@@ -507,6 +577,7 @@ def prompt_user_action() -> str:
                     "Generate Resume",
                     "Generate Resume Tailored for Job Description",
                     "Generate Tailored Cover Letter for Job Description",
+                    "Generate Tailored Resumes and Cover Letters in Batch",
                 ],
             ),
         ]
@@ -535,6 +606,15 @@ def main():
         config["uploads"] = FileManager.get_uploads(plain_text_resume_file)
         config["outputFileDirectory"] = output_folder
 
+        # Load the local embedding models while the user is still choosing
+        if cfg.LLM_EMBEDDING_WARM_UP:
+            warm_up([
+                cfg.LLM_EMBEDDING_MODEL,
+                cfg.LLM_ANSWER_CACHE_EMBEDDING_MODEL,
+                cfg.LLM_ROUTER_EMBEDDING_MODEL,
+                cfg.LLM_JOB_RANKER_EMBEDDING_MODEL,
+            ])
+
         # Interactive prompt for user to select actions
         selected_actions = prompt_user_action()
 
@@ -0,0 +1,193 @@
+"""
+Persistent, content-addressed store of text embeddings.
+
+LLMParser.set_body_html embedded every chunk of a page with the local model on
+every call, even when the same posting was parsed again or the same employer
+boilerplate came back on each of its postings. Vectors are now kept in SQLite
+under a hash of the model and the text, as float32 blobs: only the texts
+missing from the store are embedded, in one batch, and the retrieval queries
+are stored as well, so parsing a known page runs no model inference at all. The
+least recently used vectors are evicted once the store outgrows its size limit.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+import config as cfg
+from src.libs.embeddings import get_embedding_model
+from src.logging import logger
+
+Vector = List[float]
+
+# Evicting down to this share of the size limit, so the next insert does not evict again
+_EVICT_TO = 0.9
+
+
+class EmbeddingStore:
+    """
+    SQLite-backed hash(model, text) -> vector store with size-based LRU eviction.
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        """
+        Args:
+            path (Path): The SQLite database file.
+            max_bytes (int): Size of the stored vectors above which the least recently used are evicted.
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\n{text}".encode("utf-8")).hexdigest()
+
+    def _rows(self, columns: str, keys: List[str]) -> List[Tuple[str, Any]]:
+        rows = []
+        # Within SQLite's default limit of 999 bound parameters per statement
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows += self._conn.execute(
+                f"SELECT key, {columns} FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+            ).fetchall()
+        return rows
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Vector]:
+        """
+        Returns:
+            dict: The stored vectors of the keys that are in the store.
+        """
+        keys = list(dict.fromkeys(keys))
+        with self._lock:
+            found = {key: array("f", blob).tolist() for key, blob in self._rows("vector", keys)}
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, model_name: str, items: Iterable[Tuple[str, Vector]]) -> None:
+        """
+        Store (key, vector) pairs embedded by a model, evicting the least recently used vectors when over the limit.
+        """
+        now = time.time()
+        rows = {key: (key, model_name, array("f", vector).tobytes(), now) for key, vector in items}
+        if not rows:
+            return
+        with self._lock:
+            replaced = sum(size for _, size in self._rows("LENGTH(vector)", list(rows)))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, vector, last_used) VALUES (?, ?, ?, ?)", rows.values()
+            )
+            self._bytes += sum(len(row[2]) for row in rows.values()) - replaced
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        target = self.max_bytes * _EVICT_TO
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used"):
+            if self._bytes <= target:
+                break
+            evicted.append((key,))
+            self._bytes -= size
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} embeddings, {self._bytes / 2**20:.1f} MB kept")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "megabytes": round(self._bytes / 2**20, 1)}
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings of a local model, read from the store when known and embedded in one batch otherwise.
+    The model itself is only loaded for the first miss.
+    """
+
+    def __init__(self, model_name: str, store: EmbeddingStore):
+        """
+        Args:
+            model_name (str): The sentence-transformers model, e.g. 'all-MiniLM-L6-v2'.
+            store (EmbeddingStore): Where the vectors are kept.
+        """
+        self.model_name = model_name
+        self.store = store
+
+    def _cached(self, texts: List[str], kind: str) -> List[Vector]:
+        keys = [self.store.key(f"{self.model_name}:{kind}", text) for text in texts]
+        vectors = self.store.get_many(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            model = get_embedding_model(self.model_name)
+            if kind == "query":
+                embedded = [model.embed_query(text) for text in missing.values()]
+            else:
+                embedded = model.embed_documents(list(missing.values()))
+            new = dict(zip(missing.keys(), embedded))
+            self.store.put_many(self.model_name, new.items())
+            vectors.update(new)
+        logger.debug(f"Embedded {len(missing)} of {len(texts)} texts with {self.model_name}, the rest came from the store")
+        return [vectors[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[Vector]:
+        return self._cached(list(texts), "document") if texts else []
+
+    def embed_query(self, text: str) -> Vector:
+        return self._cached([text], "query")[0]
+
+
+_embedding_store: Optional[EmbeddingStore] = None
+_embedding_store_lock = threading.Lock()
+
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """
+    Return the process-wide embedding store, or None when LLM_EMBEDDING_CACHE_ENABLED is off.
+    """
+    global _embedding_store
+    if not cfg.LLM_EMBEDDING_CACHE_ENABLED:
+        return None
+    with _embedding_store_lock:
+        if _embedding_store is None:
+            _embedding_store = EmbeddingStore(
+                path=Path(cfg.LLM_EMBEDDING_CACHE_PATH),
+                max_bytes=int(cfg.LLM_EMBEDDING_CACHE_MAX_MB * 2**20),
+            )
+        return _embedding_store
+
+
+def get_cached_embeddings(model_name: str) -> Any:
+    """
+    Embeddings of a local model going through the shared store, or the model itself when the store is disabled.
+    """
+    store = get_embedding_store()
+    if store is None:
+        return get_embedding_model(model_name)
+    return CachedEmbeddings(model_name, store)
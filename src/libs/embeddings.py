@@ -0,0 +1,78 @@
+"""
+Shared local sentence embedding models.
+
+Loading a sentence-transformers model takes seconds and hundreds of megabytes,
+so every component that embeds text locally (the job parser, the answer cache,
+the question router, the job ranker) goes through get_embedding_model and
+shares one instance per model, loaded on first use. warm_up loads models in a
+background thread, e.g. while the user is still picking an action.
+"""
+import math
+import threading
+from typing import Any, Dict, Iterable, List, Sequence
+
+from src.logging import logger
+
+_models: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def get_embedding_model(model_name: str) -> Any:
+    """
+    Return the shared HuggingFaceEmbeddings instance for a model, loading it on first use.
+    Args:
+        model_name (str): The sentence-transformers model, e.g. 'all-MiniLM-L6-v2'.
+    Returns:
+        HuggingFaceEmbeddings: The embedding model.
+    """
+    model = _models.get(model_name)
+    if model is not None:
+        return model
+    with _lock:
+        model = _models.get(model_name)
+        if model is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+
+            model = HuggingFaceEmbeddings(model_name=model_name)
+            _models[model_name] = model
+            logger.debug(f"Loaded embedding model {model_name}")
+        return model
+
+
+def warm_up(model_names: Iterable[str]) -> threading.Thread:
+    """
+    Load embedding models in a background thread, so their first real use does not wait for them.
+    Callers needing a model before it is loaded block in get_embedding_model until it is ready.
+    Args:
+        model_names (iterable): The sentence-transformers models to load.
+    Returns:
+        threading.Thread: The started daemon thread.
+    """
+    names = list(dict.fromkeys(model_names))
+
+    def load() -> None:
+        for model_name in names:
+            try:
+                get_embedding_model(model_name)
+            except Exception as e:
+                logger.warning(f"Could not warm up embedding model {model_name}: {e}")
+                return
+
+    thread = threading.Thread(target=load, name="embedding-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def unit_vector(vector: Sequence[float]) -> List[float]:
+    """
+    Scale a vector to unit length, so cosine similarity becomes a dot product.
+    """
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    """
+    Cosine similarity of two unit vectors.
+    """
+    return sum(x * y for x, y in zip(a, b))
@@ -0,0 +1,250 @@
+"""
+Deterministic answers to "years of experience" questions.
+
+answer_question_numeric used to send the education, experience and project
+lists to the LLM for every "How many years of experience do you have with
+Kubernetes?" and take the first number of the reply. ExperienceIndex answers
+these from the resume instead: employment periods are parsed into date
+intervals, every skill in skills_acquired, and every indexed skill named in a
+position or key responsibility, is mapped to the intervals of the jobs it was
+used in, and overlapping intervals are merged before they are summed, so two
+parallel jobs using Python count once. Questions about a skill the resume does
+not date are left to the LLM.
+"""
+import calendar
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.libs.llm_answer_cache import normalize_question
+from src.logging import logger
+
+Interval = Tuple[date, date]
+
+_MONTHS = {name.lower(): index for index, name in enumerate(calendar.month_abbr) if name}
+_DATE_TOKEN = re.compile(
+    r"\b(?P<month_name>jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?,?\s+(?P<month_name_year>\d{4})"
+    r"|(?<!\d)(?P<month>\d{1,2})[/.](?P<month_year>\d{4})(?!\d)"
+    r"|(?<!\d)(?P<iso_year>\d{4})[-/.](?P<iso_month>\d{1,2})(?!\d)"
+    r"|(?<!\d)(?P<year>(?:19|20)\d{2})(?!\d)"
+    r"|(?P<present>present|current|now|today|ongoing|date)",
+    re.IGNORECASE,
+)
+_EXPERIENCE_QUESTION = re.compile(r"\b(?:years?|yrs?)\b", re.IGNORECASE)
+# Questions about overall experience, as opposed to one skill, after normalization
+_TOTAL_QUESTION = re.compile(
+    r"^(?:how many|total|number of|your)?\s*(?:years?|yrs?)\s+(?:of\s+)?(?:total\s+|overall\s+|professional\s+"
+    r"|work\s+|working\s+|relevant\s+|industry\s+|full\s*time\s+)*(?:work\s+)?experience"
+    r"(?:\s+do you have)?(?:\s+in total)?$"
+)
+SKILL_ALIASES = {
+    "golang": "go",
+    "js": "javascript",
+    "k8s": "kubernetes",
+    "nodejs": "node.js",
+    "node": "node.js",
+    "postgres": "postgresql",
+    "reactjs": "react",
+    "react.js": "react",
+    "ts": "typescript",
+}
+
+# Skill names that are also everyday words, matched only where a sentence uses them as a skill
+COMMON_WORD_SKILLS = {
+    "chef", "dart", "ember", "express", "go", "hack", "hive", "julia", "pig", "puppet", "rest", "ruby", "rust", "salt",
+    "scheme", "spark", "spring", "swift",
+}
+_SKILL_BEFORE = r"\b(?:with|in|using|of|on|use|used|know)"
+_SKILL_AFTER = r"(?:experience|programming|language|development|developers?|engineers?|code|projects?|skills?)\b"
+
+
+def normalize_skill(skill: str) -> str:
+    """
+    Lowercase a skill name, collapse whitespace and resolve common aliases ('k8s' -> 'kubernetes').
+    """
+    name = " ".join(str(skill).lower().split()).strip(" .,;:")
+    return SKILL_ALIASES.get(name, name)
+
+
+def _parse_date_token(match: "re.Match", end: bool, today: date) -> date:
+    groups = match.groupdict()
+    if groups["present"]:
+        return today
+    if groups["month_name"]:
+        year, month = int(groups["month_name_year"]), _MONTHS[groups["month_name"].lower()[:3]]
+    elif groups["month"]:
+        year, month = int(groups["month_year"]), int(groups["month"])
+    elif groups["iso_year"]:
+        year, month = int(groups["iso_year"]), int(groups["iso_month"])
+    else:
+        # A bare year covers the whole year
+        year = int(groups["year"])
+        return date(year + 1, 1, 1) if end else date(year, 1, 1)
+    month = min(max(month, 1), 12)
+    if not end:
+        return date(year, month, 1)
+    # The end month is worked in full, so the interval ends on the first day of the next month
+    return date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+
+def parse_period(period: Optional[str], today: Optional[date] = None) -> Optional[Interval]:
+    """
+    Parse an employment period such as '06/2019 - Present', 'Feb 2025 – Present' or '2015-2017'.
+    Args:
+        period (str): The employment_period of an experience entry.
+        today (date): The date 'Present' stands for; defaults to today.
+    Returns:
+        tuple: The (start, end) dates, end exclusive, or None when the period cannot be read.
+    """
+    if not period:
+        return None
+    today = today or date.today()
+    tokens = list(_DATE_TOKEN.finditer(period))
+    if len(tokens) < 2 or tokens[0].group("present"):
+        return None
+    start = _parse_date_token(tokens[0], end=False, today=today)
+    end = min(_parse_date_token(tokens[1], end=True, today=today), today)
+    if end <= start:
+        return None
+    return start, end
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """
+    Merge overlapping and adjacent intervals.
+    """
+    merged: List[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def interval_years(intervals: Iterable[Interval]) -> float:
+    """
+    Total years covered by intervals, counting overlaps once.
+    """
+    return sum((end - start).days for start, end in merge_intervals(intervals)) / 365.25
+
+
+def is_ambiguous_skill(skill: str) -> bool:
+    """
+    Whether a skill name is also an everyday word or too short to tell apart from one ('Go', 'R', 'Rust').
+    """
+    name = normalize_skill(skill)
+    return len(name) <= 2 or name in COMMON_WORD_SKILLS
+
+
+def skill_pattern(skill: str, in_context: Optional[bool] = None) -> "re.Pattern":
+    """
+    Case-insensitive pattern finding a skill as a whole term: 'Java' does not match 'JavaScript', nor 'C' 'C++' or 'C#',
+    nor 'Go' 'go-to-market' or 'R' 'R&D'.
+    Args:
+        skill (str): The normalized skill name.
+        in_context (bool): Only match where the text uses the name as a skill: after 'with', 'in', 'using'...,
+            before 'experience', 'developer'..., or as the whole text. Defaults to whether the skill is ambiguous.
+    Returns:
+        re.Pattern: The compiled pattern.
+    """
+    if in_context is None:
+        in_context = is_ambiguous_skill(skill)
+    term = rf"(?<![\w+#.&-]){re.escape(skill)}(?![\w+#&-]|\.\w)"
+    if in_context:
+        term = rf"(?:{_SKILL_BEFORE}\s+{term}|{term}(?=\s+{_SKILL_AFTER})|^\W*{term}\W*$)"
+    return re.compile(term, re.IGNORECASE)
+
+
+class ExperienceIndex:
+    """
+    Skill -> employment intervals index of a resume's experience_details.
+    """
+
+    def __init__(self, experience_details: Optional[Sequence[Any]], today: Optional[date] = None):
+        """
+        Args:
+            experience_details (list): The resume's ExperienceDetails entries.
+            today (date): The date 'Present' stands for; defaults to today.
+        """
+        self.today = today or date.today()
+        self.intervals: List[Interval] = []
+        self.skills: Dict[str, List[Interval]] = {}
+        self._patterns: Dict[str, "re.Pattern"] = {}
+
+        texts: List[Tuple[Interval, str]] = []
+        for experience in experience_details or []:
+            interval = parse_period(getattr(experience, "employment_period", None), self.today)
+            if interval is None:
+                logger.debug(f"Unreadable employment period: {getattr(experience, 'employment_period', None)!r}")
+                continue
+            self.intervals.append(interval)
+            for skill in getattr(experience, "skills_acquired", None) or []:
+                self.skills.setdefault(normalize_skill(skill), []).append(interval)
+            responsibilities = [
+                str(value)
+                for responsibility in getattr(experience, "key_responsibilities", None) or []
+                for value in (responsibility.values() if isinstance(responsibility, dict) else [responsibility])
+            ]
+            texts.append((interval, " ".join([getattr(experience, "position", None) or "", *responsibilities])))
+
+        # A skill listed for one job also counts for the other jobs whose position or responsibilities name it
+        for skill, intervals in self.skills.items():
+            pattern = self._pattern(skill)
+            for interval, text in texts:
+                if interval not in intervals and pattern.search(text):
+                    intervals.append(interval)
+
+    def _pattern(self, skill: str) -> "re.Pattern":
+        pattern = self._patterns.get(skill)
+        if pattern is None:
+            pattern = self._patterns[skill] = skill_pattern(skill)
+        return pattern
+
+    def total_years(self) -> float:
+        """
+        Years of professional experience, counting parallel jobs once.
+        """
+        return interval_years(self.intervals)
+
+    def years_for(self, skill: str) -> Optional[float]:
+        """
+        Years of experience with a skill, or None when no dated job used it.
+        """
+        intervals = self.skills.get(normalize_skill(skill))
+        return interval_years(intervals) if intervals else None
+
+    def skills_in(self, question: str) -> List[str]:
+        """
+        Indexed skills named in a question; a skill contained in a longer named skill ('REST' in 'REST APIs') is dropped.
+        """
+        words = " ".join(SKILL_ALIASES.get(word.lower().strip("?,;:"), word) for word in question.split())
+        found = [skill for skill in self.skills if self._pattern(skill).search(words)]
+        return [
+            skill for skill in found
+            if not any(skill != other and skill_pattern(skill, in_context=False).search(other) for other in found)
+        ]
+
+    def answer(self, question: str) -> Optional[str]:
+        """
+        Answer a numeric experience question from the resume.
+        Args:
+            question (str): The form question, e.g. 'Years of experience with Kubernetes?'.
+        Returns:
+            str: The whole number of years, or None when the question is left to the LLM.
+        """
+        if not self.intervals or not _EXPERIENCE_QUESTION.search(question):
+            return None
+        skills = self.skills_in(question)
+        if len(skills) == 1:
+            years = self.years_for(skills[0])
+        elif not skills and _TOTAL_QUESTION.match(normalize_question(question)):
+            years = self.total_years()
+        else:
+            # An unknown skill, or several, is for the LLM to weigh
+            return None
+        # Forms take whole years; any dated experience counts as at least one
+        answer = str(max(1, int(years + 0.5)))
+        logger.debug(f"Experience answered locally: '{question}' -> {answer} ({years:.2f} years)")
+        return answer
+
@@ -0,0 +1,335 @@
+"""
+Main-content extraction from job pages.
+
+The job parser used to split and embed the full body outerHTML of a page:
+scripts, inline CSS, SVG, navigation and footers made up most of its chunks.
+extract_main_content parses the page with the standard library, drops invisible
+and boilerplate elements, scores the remaining containers readability-style
+(text length, commas and class/id hints, discounted by link density) and keeps
+the best one with its strong siblings. The page title and the main headings
+outside of it, with their small header card, are kept as well, since the job
+title, company and location often sit above the description. Every page gets a
+before/after report of its size.
+"""
+import math
+import re
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Union
+
+from src.libs.llm_token_budget import count_tokens
+
+# Elements that never render readable text
+INVISIBLE_TAGS = {
+    "script", "style", "noscript", "svg", "template", "head", "iframe", "canvas", "object", "embed", "picture", "img",
+    "button", "select", "input", "textarea",
+}
+# Only form controls are dropped: ASP.NET and similar sites wrap the whole page in one <form>
+DROPPED_TAGS = INVISIBLE_TAGS | {"nav", "footer", "aside", "dialog"}
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "dd", "div", "dl", "dt", "h1", "h2", "h3", "h4", "h5", "h6", "header",
+    "hr", "li", "main", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul",
+}
+PARAGRAPH_TAGS = {"p", "li", "pre", "td", "dd", "dt", "blockquote", "h2", "h3", "h4", "h5", "h6"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "alert"}
+
+_NEGATIVE = re.compile(
+    r"nav|menu|footer|cookie|consent|banner|sidebar|share|social|related|similar|recommend|promo|modal|popup"
+    r"|breadcrumb|subscribe|newsletter|signup|sign-in|login|advert|\bads?\b|sponsor|toolbar|skip",
+    re.IGNORECASE,
+)
+_POSITIVE = re.compile(r"job|description|posting|vacanc|career|content|article|main|detail|body|text", re.IGNORECASE)
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+_SPACES = re.compile(r"[ \t\r\f\v\u00a0]+")
+_BODY = re.compile(r"<body\b.*</body\s*>", re.IGNORECASE | re.DOTALL)
+# Chunking of LLMParser.set_body_html, to report chunk counts
+CHUNK_TOKENS, CHUNK_OVERLAP = 500, 50
+# Longest text of the block around a heading kept as the job's header card
+HEADER_CARD_CHARS = 300
+
+
+class _Node:
+    __slots__ = ("tag", "attrs", "children", "parent")
+
+    def __init__(self, tag: str, attrs: Dict[str, str], parent: Optional["_Node"]):
+        self.tag = tag
+        self.attrs = attrs
+        self.children: List[Union["_Node", str]] = []
+        self.parent = parent
+
+
+class _TreeBuilder(HTMLParser):
+    """
+    Lenient HTML -> _Node tree parser; unclosed elements are closed by their parent's end tag.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("#root", {}, None)
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, {name: value or "" for name, value in attrs}, self._stack[-1])
+        self._stack[-1].children.append(node)
+        if tag not in VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_startendtag(self, tag, attrs):
+        self._stack[-1].children.append(_Node(tag, {name: value or "" for name, value in attrs}, self._stack[-1]))
+
+    def handle_endtag(self, tag):
+        for index in range(len(self._stack) - 1, 0, -1):
+            if self._stack[index].tag == tag:
+                del self._stack[index:]
+                return
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+@dataclass
+class ContentReport:
+    html_chars: int
+    html_tokens: int
+    text_chars: int
+    text_tokens: int
+    used_main_content: bool
+
+    @staticmethod
+    def chunks(tokens: int) -> int:
+        """
+        Number of chunks a text of this many tokens is split into by set_body_html.
+        """
+        return max(1, math.ceil((tokens - CHUNK_OVERLAP) / (CHUNK_TOKENS - CHUNK_OVERLAP))) if tokens else 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.html_tokens} -> {self.text_tokens} tokens, "
+            f"{self.chunks(self.html_tokens)} -> {self.chunks(self.text_tokens)} chunks"
+            f"{'' if self.used_main_content else ' (no main content found, kept the whole visible text)'}"
+        )
+
+
+def _is_invisible(node: _Node) -> bool:
+    attrs = node.attrs
+    if node.tag in INVISIBLE_TAGS or "hidden" in attrs or attrs.get("aria-hidden") == "true":
+        return True
+    return bool(_HIDDEN_STYLE.search(attrs.get("style", "")))
+
+
+def _is_boilerplate(node: _Node) -> bool:
+    attrs = node.attrs
+    if node.tag in DROPPED_TAGS or _is_invisible(node) or attrs.get("role") in BOILERPLATE_ROLES:
+        return True
+    hints = f"{attrs.get('class', '')} {attrs.get('id', '')}"
+    return bool(_NEGATIVE.search(hints)) and not _POSITIVE.search(hints)
+
+
+def _prune(node: _Node, dropped: Callable[[_Node], bool] = _is_boilerplate) -> None:
+    node.children = [child for child in node.children if isinstance(child, str) or not dropped(child)]
+    for child in node.children:
+        if isinstance(child, _Node):
+            _prune(child, dropped)
+
+
+def _parse(page_html: str) -> _Node:
+    builder = _TreeBuilder()
+    builder.feed(page_html)
+    builder.close()
+    return builder.root
+
+
+def _render(node: _Node, lines: List[str]) -> None:
+    """
+    Append the visible text of a node to lines, breaking lines at block elements.
+    """
+    for child in node.children:
+        if isinstance(child, str):
+            lines[-1] += child
+            continue
+        block = child.tag in BLOCK_TAGS or child.tag == "br"
+        if block:
+            lines.append("- " if child.tag == "li" else "")
+        _render(child, lines)
+        if block:
+            lines.append("")
+
+
+def node_text(node: _Node) -> str:
+    lines = [""]
+    _render(node, lines)
+    cleaned = (_SPACES.sub(" ", line).strip() for line in lines)
+    return "\n".join(line for line in cleaned if line and line != "-")
+
+
+def html_to_text(fragment: str) -> str:
+    """
+    The visible text of an HTML fragment, e.g. a description embedded in structured data.
+    """
+    root = _parse(fragment)
+    _prune(root)
+    return node_text(root)
+
+
+def page_body(page_html: str) -> str:
+    """
+    The <body> element of a full page, as its outerHTML; the input itself when it has no body element.
+    """
+    match = _BODY.search(page_html)
+    return match.group(0) if match else page_html
+
+
+class _Scorer:
+    """
+    Readability-style container scores, with text and link lengths computed in one pass.
+    """
+
+    def __init__(self, root: _Node):
+        self.text_length: Dict[int, int] = {}
+        self.link_length: Dict[int, int] = {}
+        self.scores: Dict[int, float] = {}
+        self.nodes: Dict[int, _Node] = {}
+        self._measure(root)
+        self._score(root)
+
+    def _measure(self, node: _Node) -> None:
+        text, links = 0, 0
+        for child in node.children:
+            if isinstance(child, str):
+                text += len(child.strip())
+            else:
+                self._measure(child)
+                text += self.text_length[id(child)]
+                links += self.text_length[id(child)] if child.tag == "a" else self.link_length[id(child)]
+        self.text_length[id(node)] = text
+        self.link_length[id(node)] = links
+        self.nodes[id(node)] = node
+
+    def _own_text(self, node: _Node) -> str:
+        return " ".join(child.strip() for child in node.children if isinstance(child, str) and child.strip())
+
+    def _initial(self, node: _Node) -> float:
+        score = {"article": 10, "main": 10, "section": 5, "div": 5, "td": 3, "pre": 3, "blockquote": 3}.get(node.tag, 0)
+        hints = f"{node.attrs.get('class', '')} {node.attrs.get('id', '')}"
+        if _POSITIVE.search(hints):
+            score += 25
+        if _NEGATIVE.search(hints):
+            score -= 25
+        return score
+
+    def _score(self, root: _Node) -> None:
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            stack.extend(child for child in node.children if isinstance(child, _Node))
+            own = self._own_text(node)
+            paragraph = node.tag in PARAGRAPH_TAGS or (node.tag in ("div", "section", "span") and len(own) >= 25)
+            length = self.text_length[id(node)] if node.tag in PARAGRAPH_TAGS else len(own)
+            if not paragraph or length < 25:
+                continue
+            text = node_text(node) if node.tag in PARAGRAPH_TAGS else own
+            points = 1 + text.count(",") + min(length / 100, 3)
+            for ancestor, share in ((node.parent, 1.0), (node.parent and node.parent.parent, 0.5)):
+                if ancestor is None:
+                    continue
+                key = id(ancestor)
+                if key not in self.scores:
+                    self.scores[key] = self._initial(ancestor)
+                self.scores[key] += points * share
+
+    def final(self, node: _Node) -> float:
+        text = self.text_length[id(node)] or 1
+        return self.scores.get(id(node), 0.0) * (1 - self.link_length[id(node)] / text)
+
+    def best(self) -> Optional[_Node]:
+        if not self.scores:
+            return None
+        return self.nodes[max(self.scores, key=lambda key: self.final(self.nodes[key]))]
+
+
+def _iter_tags(node: _Node, tag: str):
+    """
+    Yield the elements with a tag under a node, in document order.
+    """
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.tag == tag:
+            yield current
+        stack.extend(reversed([child for child in current.children if isinstance(child, _Node)]))
+
+
+def _find(node: _Node, tag: str) -> Optional[_Node]:
+    return next(_iter_tags(node, tag), None)
+
+
+def _contains(ancestor: _Node, node: _Node) -> bool:
+    while node is not None:
+        if node is ancestor:
+            return True
+        node = node.parent
+    return False
+
+
+def _header_card(heading: _Node, parts: List[_Node], scorer: _Scorer) -> _Node:
+    """
+    The small block around a heading, e.g. title, company and location, or the heading alone.
+    """
+    card = heading.parent
+    if card is None or card.tag == "body" or scorer.text_length[id(card)] > HEADER_CARD_CHARS:
+        return heading
+    if any(_contains(card, part) for part in parts):
+        return heading
+    return card
+
+
+def extract_main_content(body_html: str, min_chars: int = 250, model_name: Optional[str] = None) -> tuple:
+    """
+    Reduce a job page to the visible text of its main content.
+    Args:
+        body_html (str): The HTML of the page or of its body.
+        min_chars (int): Main content shorter than this is not trusted; the whole visible text is kept instead.
+        model_name (str): The model whose tokenizer the report counts with.
+    Returns:
+        tuple: The text and its ContentReport.
+    """
+    root = _parse(body_html)
+    title = _find(root, "title")
+    title_text = node_text(title) if title is not None else ""
+    body = _find(root, "body") or root
+    _prune(body)
+
+    scorer = _Scorer(body)
+    main = scorer.best()
+    used_main_content = main is not None and scorer.text_length[id(main)] >= min_chars
+    if used_main_content:
+        # Siblings scoring close to the best container belong to the same content, e.g. split description blocks
+        threshold = max(10.0, scorer.final(main) * 0.2)
+        parts = [
+            child for child in (main.parent.children if main.parent is not None else [main])
+            if child is main or (isinstance(child, _Node) and id(child) in scorer.scores and scorer.final(child) >= threshold)
+        ]
+        headings = [
+            node_text(_header_card(heading, parts, scorer))
+            for heading in _iter_tags(body, "h1")
+            if not any(_contains(part, heading) for part in parts)
+        ]
+        sections = [title_text, *headings, *(node_text(part) for part in parts)]
+    else:
+        # Without trusted main content, boilerplate guesses are not trusted either: only invisible elements are dropped
+        root = _parse(body_html)
+        body = _find(root, "body") or root
+        _prune(body, _is_invisible)
+        sections = [title_text, node_text(body)]
+
+    text = "\n".join(dict.fromkeys(section for section in sections if section))
+    report = ContentReport(
+        html_chars=len(body_html),
+        html_tokens=count_tokens(body_html, model_name),
+        text_chars=len(text),
+        text_tokens=count_tokens(text, model_name),
+        used_main_content=used_main_content,
+    )
+    return text, report
+
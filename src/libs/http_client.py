@@ -0,0 +1,120 @@
+"""
+Process-wide pooled HTTP transport for the LLM clients.
+
+Every ChatOpenAI instance is handed the same httpx clients, so keep-alive
+connections, TLS sessions and (when ``h2`` is installed) HTTP/2 multiplexing
+survive across model instances and jobs instead of being rebuilt for each one.
+"""
+import asyncio
+import threading
+import weakref
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
+
+import config as cfg
+from src.logging import logger
+
+_client: Optional[httpx.Client] = None
+_async_client: Optional["LoopBoundAsyncClient"] = None
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[httpx.AsyncClient, AsyncIterator]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def _http2_enabled() -> bool:
+    if not cfg.LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("LLM_HTTP2 is enabled but the 'h2' package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(cfg.LLM_HTTP_TIMEOUT_SECONDS, connect=cfg.LLM_HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+def _client_options() -> dict:
+    return {
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=cfg.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=cfg.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=cfg.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        "timeout": _timeout(),
+    }
+
+
+def get_http_client() -> httpx.Client:
+    """
+    Return the synchronous HTTP client shared by every LLM client in the process.
+    """
+    global _client
+    with _lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(**_client_options())
+            logger.debug("Shared LLM HTTP client created")
+        return _client
+
+
+async def _close_at_loop_shutdown(client: httpx.AsyncClient) -> AsyncIterator[None]:
+    # Parked at its yield for the lifetime of the loop; asyncio.run closes pending async generators
+    # (loop.shutdown_asyncgens) before closing the loop, which runs the finally and releases the pool
+    try:
+        yield
+    finally:
+        await client.aclose()
+        logger.debug("Shared async LLM HTTP client of a finished event loop closed")
+
+
+async def _running_loop_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client, closer = _loop_clients.get(loop, (None, None))
+        if client is not None and not client.is_closed:
+            return client
+        client = httpx.AsyncClient(**_client_options())
+        closer = _close_at_loop_shutdown(client)
+        _loop_clients[loop] = (client, closer)
+        logger.debug("Shared async LLM HTTP client created for the running event loop")
+    await closer.__anext__()
+    return client
+
+
+class _LoopTransport(httpx.AsyncBaseTransport):
+    """
+    Transport without a connection pool of its own: requests go out through the pooled client of the running loop.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        client = await _running_loop_client()
+        return await client.send(request, stream=True)
+
+
+class LoopBoundAsyncClient(httpx.AsyncClient):
+    """
+    Async client handed to model constructors, which run outside any event loop.
+    An async connection pool only works on the loop that opened it, so every request is
+    sent through the pooled client belonging to whichever loop is running at that moment.
+    The per-loop clients are closed when their loop shuts down.
+    """
+
+    def __init__(self, **kwargs):
+        # Proxies and certificates from the environment are applied by the per-loop clients
+        super().__init__(transport=_LoopTransport(), trust_env=False, **kwargs)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Return the asynchronous HTTP client shared by every LLM client in the process.
+    """
+    global _async_client
+    with _lock:
+        if _async_client is None:
+            _async_client = LoopBoundAsyncClient(timeout=_timeout())
+        return _async_client
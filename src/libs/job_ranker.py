@@ -0,0 +1,202 @@
+"""
+Embedding-based ranking of job postings against the resume.
+
+is_job_suitable used to spend one LLM call per job comparing the full resume
+with the full description. JobRanker embeds a summary of the resume once and
+every job description once (embeddings are kept per content hash), scores all
+jobs in one matrix product of unit vectors, and blends the cosine similarity
+with the share of resume skills the posting names. Jobs scoring at least the
+accept score are suitable and jobs below the reject score are not, without any
+LLM call; only the borderline band in between goes to the LLM scorer, whose
+0-10 score is then held against JOB_SUITABILITY_SCORE.
+"""
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.libs.embedding_cache import get_cached_embeddings
+from src.libs.experience_engine import normalize_skill, skill_pattern
+from src.logging import logger
+
+# A posting naming this many of the resume's skills gets the full skills score
+SKILLS_SATURATION = 5
+
+
+@dataclass
+class RankedJob:
+    job: Any
+    similarity: float
+    skills_overlap: float
+    score: float
+    matched_skills: List[str] = field(default_factory=list)
+    llm_score: Optional[int] = None
+    suitable: Optional[bool] = None
+
+
+def resume_profile_text(resume: Any) -> str:
+    """
+    The part of a resume that says what jobs it fits: positions, skills, studies and projects.
+    Sentence embedding models only read the first few hundred tokens, so contact details and
+    achievements are left out.
+    """
+    lines = []
+    experiences = getattr(resume, "experience_details", None) or []
+    positions = [experience.position for experience in experiences if getattr(experience, "position", None)]
+    if positions:
+        lines.append("Positions: " + ", ".join(positions))
+    skills = resume_skills(resume)
+    if skills:
+        lines.append("Skills: " + ", ".join(skills))
+    studies = [
+        " ".join(filter(None, [education.education_level, education.field_of_study]))
+        for education in getattr(resume, "education_details", None) or []
+    ]
+    if any(studies):
+        lines.append("Education: " + ", ".join(study for study in studies if study))
+    for project in getattr(resume, "projects", None) or []:
+        lines.append("Project: " + ". ".join(filter(None, [project.name, project.description])))
+    return "\n".join(lines)
+
+
+def resume_skills(resume: Any) -> List[str]:
+    """
+    The distinct skills of a resume's experience entries, in resume order.
+    """
+    skills: Dict[str, str] = {}
+    for experience in getattr(resume, "experience_details", None) or []:
+        for skill in getattr(experience, "skills_acquired", None) or []:
+            skills.setdefault(normalize_skill(skill), str(skill))
+    return list(skills.values())
+
+
+class JobRanker:
+    """
+    Ranks jobs by resume similarity and decides the clear cases without the LLM.
+    """
+
+    def __init__(
+        self,
+        embedding_model: str,
+        skills_weight: float,
+        accept_score: float,
+        reject_score: float,
+        embed_documents: Optional[Callable[[List[str]], Sequence[Sequence[float]]]] = None,
+    ):
+        """
+        Args:
+            embedding_model (str): The sentence-transformers model used to embed the resume and jobs.
+            skills_weight (float): Weight of the skills overlap in the score; the similarity gets the rest.
+            accept_score (float): Score from which a job is suitable without asking the LLM.
+            reject_score (float): Score below which a job is unsuitable without asking the LLM.
+            embed_documents (callable): Optional texts -> vectors function replacing the local model.
+        """
+        self.embedding_model = embedding_model
+        self.skills_weight = skills_weight
+        self.accept_score = accept_score
+        self.reject_score = reject_score
+        self._embed_documents_fn = embed_documents
+        self._resume_vector: Optional[np.ndarray] = None
+        self._resume_text = ""
+        self._skills: Dict[str, Any] = {}
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def set_resume(self, resume: Any) -> None:
+        """
+        Use a resume for the following rankings; it is embedded on the first ranking.
+        """
+        self._resume_text = resume_profile_text(resume)
+        self._resume_vector = None
+        self._skills = {skill: skill_pattern(normalize_skill(skill)) for skill in resume_skills(resume)}
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        embed_documents = self._embed_documents_fn or get_cached_embeddings(self.embedding_model).embed_documents
+        vectors = np.asarray(embed_documents(texts), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def _job_vectors(self, texts: List[str]) -> np.ndarray:
+        """
+        Unit embeddings of job texts; texts seen before are not embedded again.
+        """
+        keys = [hashlib.sha256(text.encode("utf-8")).hexdigest() for text in texts]
+        with self._lock:
+            missing = {key: text for key, text in zip(keys, texts) if key not in self._vectors}
+        if missing:
+            logger.debug(f"Embedding {len(missing)} job descriptions")
+            vectors = self._embed(list(missing.values()))
+            with self._lock:
+                self._vectors.update(zip(missing.keys(), vectors))
+        with self._lock:
+            return np.stack([self._vectors[key] for key in keys])
+
+    def rank(self, jobs: Sequence[Any]) -> List[RankedJob]:
+        """
+        Score jobs against the resume.
+        Args:
+            jobs (list): Jobs with a role and a description.
+        Returns:
+            list: The jobs as RankedJob, best score first.
+        """
+        if not jobs:
+            return []
+        if self._resume_vector is None:
+            if not self._resume_text:
+                raise ValueError("No resume set for job ranking")
+            self._resume_vector = self._embed([self._resume_text])[0]
+
+        texts = [f"{job.role}\n{job.description}".strip() for job in jobs]
+        similarities = self._job_vectors(texts) @ self._resume_vector
+        ranked = []
+        for job, text, similarity in zip(jobs, texts, similarities.tolist()):
+            matched = [skill for skill, pattern in self._skills.items() if pattern.search(text)]
+            overlap = min(1.0, len(matched) / min(SKILLS_SATURATION, len(self._skills))) if self._skills else 0.0
+            score = (1 - self.skills_weight) * similarity + self.skills_weight * overlap
+            ranked.append(RankedJob(job, similarity, overlap, score, matched))
+        ranked.sort(key=lambda item: item.score, reverse=True)
+        return ranked
+
+    def decide(self, ranked_job: RankedJob) -> Optional[bool]:
+        """
+        True or False for jobs clearly above or below the thresholds, None for the borderline band.
+        """
+        if ranked_job.score >= self.accept_score:
+            return True
+        if ranked_job.score < self.reject_score:
+            return False
+        return None
+
+    def screen(
+        self,
+        jobs: Sequence[Any],
+        llm_scorer: Callable[[Any], Optional[int]],
+        min_llm_score: int,
+        top_n: Optional[int] = None,
+    ) -> List[RankedJob]:
+        """
+        Rank jobs and decide the suitability of the best ones, asking the LLM only about borderline jobs.
+        Args:
+            jobs (list): Jobs with a role and a description.
+            llm_scorer (callable): Returns the LLM's 0-10 suitability score of a job, or None when it has none.
+            min_llm_score (int): Lowest LLM score of a suitable job, e.g. JOB_SUITABILITY_SCORE.
+            top_n (int): How many of the best ranked jobs to decide and return; all when None.
+        Returns:
+            list: The top jobs as RankedJob with suitable set, best score first.
+        """
+        ranked = self.rank(jobs)[:top_n]
+        borderline = 0
+        for ranked_job in ranked:
+            ranked_job.suitable = self.decide(ranked_job)
+            if ranked_job.suitable is None:
+                borderline += 1
+                ranked_job.llm_score = llm_scorer(ranked_job.job)
+                # A reply without a score does not reject the job, as in is_job_suitable
+                ranked_job.suitable = ranked_job.llm_score is None or ranked_job.llm_score >= min_llm_score
+        logger.info(
+            f"Screened {len(jobs)} jobs: {sum(job.suitable for job in ranked)} of the top {len(ranked)} suitable, "
+            f"{borderline} borderline jobs sent to the LLM"
+        )
+        return ranked
@@ -0,0 +1,230 @@
+"""
+Shared store of job description summaries.
+
+The same job description used to be summarized up to three times per run: by
+GPTAnswerer.set_job and by the resume and the cover letter generators. Summaries
+are kept per model, summarize prompt template and normalized description, in an
+in-memory LRU in front of a SQLite file, and every path asks the store first, so
+paths sharing a template share the summary and an edited template summarizes
+anew. Concurrent requests for the same job in one process wait for the first
+summary instead of producing their own.
+"""
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import config as cfg
+from src.logging import logger
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_description(text: str) -> str:
+    """
+    Collapse whitespace, so the same posting scraped or pasted twice maps to one summary.
+    """
+    return _WHITESPACE.sub(" ", text or "").strip()
+
+
+class JobSummaryCache:
+    """
+    Two tier (memory LRU + SQLite) store of job description summaries.
+    """
+
+    def __init__(self, path: Path, memory_entries: int):
+        """
+        Args:
+            path (Path): The SQLite database file.
+            memory_entries (int): Summaries kept in memory.
+        """
+        self.path = Path(path)
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        # key -> [lock, number of callers holding or waiting for it]
+        self._key_locks: Dict[str, List] = {}
+        self._async_key_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, List]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(description: str, model_name: str, template: str) -> str:
+        template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+        text = f"{model_name}\n{template_hash}\n{normalize_description(description)}"
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, description: str, model_name: str, template: str) -> Optional[str]:
+        """
+        Returns:
+            str: The stored summary of a description by a model with a summarize prompt template, or None.
+        """
+        key = self.key(description, model_name, template)
+        with self._lock:
+            summary = self._memory.get(key)
+            if summary is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    summary = row[0]
+                    self._remember(key, summary)
+            if summary is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return summary
+
+    def put(self, description: str, model_name: str, template: str, summary: str) -> None:
+        key = self.key(description, model_name, template)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, model, summary, created_at) VALUES (?, ?, ?, ?)",
+                (key, model_name, summary, time.time()),
+            )
+            self._conn.commit()
+            self._remember(key, summary)
+
+    def _remember(self, key: str, summary: str) -> None:
+        self._memory[key] = summary
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _acquire(self, locks: Dict[str, List], key: str, new_lock: Callable[[], Any]) -> List:
+        with self._lock:
+            entry = locks.get(key)
+            if entry is None:
+                entry = locks[key] = [new_lock(), 0]
+            entry[1] += 1
+            return entry
+
+    def _release(self, locks: Dict[str, List], key: str, entry: List) -> None:
+        # The lock is dropped once nobody holds or waits for it, so a later caller never gets a second one
+        with self._lock:
+            entry[1] -= 1
+            if not entry[1]:
+                del locks[key]
+
+    @contextmanager
+    def _key_lock(self, key: str) -> Iterator[None]:
+        entry = self._acquire(self._key_locks, key, threading.Lock)
+        try:
+            with entry[0]:
+                yield
+        finally:
+            self._release(self._key_locks, key, entry)
+
+    @asynccontextmanager
+    async def _async_key_lock(self, key: str) -> AsyncIterator[None]:
+        # asyncio locks belong to one event loop, so every loop has its own
+        with self._lock:
+            locks = self._async_key_locks.setdefault(asyncio.get_running_loop(), {})
+        entry = self._acquire(locks, key, asyncio.Lock)
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            self._release(locks, key, entry)
+
+    def get_or_create(self, description: str, model_name: str, template: str, summarize: Callable[[str], str]) -> str:
+        """
+        Return the stored summary, or summarize the description and store the result.
+        Args:
+            description (str): The job description.
+            model_name (str): The model summarizing it.
+            template (str): The summarize prompt template.
+            summarize (callable): Summarizes a description with that model and template.
+        Returns:
+            str: The summary.
+        """
+        with self._key_lock(self.key(description, model_name, template)):
+            summary = self.get(description, model_name, template)
+            if summary is None:
+                logger.debug(f"Summarizing job description with {model_name}")
+                summary = summarize(description)
+                self.put(description, model_name, template, summary)
+            else:
+                logger.debug("Reusing the stored job description summary")
+        return summary
+
+    async def aget_or_create(
+        self, description: str, model_name: str, template: str, summarize: Callable[[str], Awaitable[str]]
+    ) -> str:
+        """
+        Async counterpart of get_or_create.
+        """
+        async with self._async_key_lock(self.key(description, model_name, template)):
+            summary = self.get(description, model_name, template)
+            if summary is None:
+                logger.debug(f"Summarizing job description with {model_name}")
+                summary = await summarize(description)
+                self.put(description, model_name, template, summary)
+            else:
+                logger.debug("Reusing the stored job description summary")
+        return summary
+
+
+_job_summary_cache: Optional[JobSummaryCache] = None
+_job_summary_cache_lock = threading.Lock()
+
+
+def get_job_summary_cache() -> Optional[JobSummaryCache]:
+    """
+    Return the process-wide job summary store, or None when LLM_JOB_SUMMARY_CACHE_ENABLED is off.
+    """
+    global _job_summary_cache
+    if not cfg.LLM_JOB_SUMMARY_CACHE_ENABLED:
+        return None
+    with _job_summary_cache_lock:
+        if _job_summary_cache is None:
+            _job_summary_cache = JobSummaryCache(
+                path=Path(cfg.LLM_JOB_SUMMARY_CACHE_PATH),
+                memory_entries=cfg.LLM_JOB_SUMMARY_CACHE_MEMORY_ENTRIES,
+            )
+        return _job_summary_cache
+
+
+def summarize_once(description: str, model_name: str, template: str, summarize: Callable[[str], str]) -> str:
+    """
+    Summarize a job description through the shared store, or directly when the store is disabled.
+    """
+    cache = get_job_summary_cache()
+    if cache is None:
+        return summarize(description)
+    return cache.get_or_create(description, model_name, template, summarize)
+
+
+async def asummarize_once(
+    description: str, model_name: str, template: str, summarize: Callable[[str], Awaitable[str]]
+) -> str:
+    """
+    Async counterpart of summarize_once.
+    """
+    cache = get_job_summary_cache()
+    if cache is None:
+        return await summarize(description)
+    return await cache.aget_or_create(description, model_name, template, summarize)
@@ -0,0 +1,249 @@
+"""
+Semantic cache of answers to application form questions.
+
+Forms keep asking the same questions in different words ("Years of Python
+experience?", "How many years have you used Python?"). Questions are
+normalized and embedded locally, and a new question reuses the answer of the
+most similar earlier question when the cosine similarity clears
+LLM_ANSWER_CACHE_SIMILARITY. Entries are scoped to a hash of the resume and
+job application profile, plus the job for job-specific answers, and persist in
+SQLite, so a repeat question costs a local embedding instead of LLM calls.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import config as cfg
+from src.libs.embeddings import cosine, get_embedding_model, unit_vector
+from src.libs.prompt_serializer import PromptSerializer
+from src.logging import logger
+
+Vector = List[float]
+
+_REQUIRED_MARKERS = re.compile(r"\*|\((?:required|optional)\)", re.IGNORECASE)
+_NON_WORD = re.compile(r"[^\w+#.]+")
+_SENTENCE_DOT = re.compile(r"\.(?=\s|$)")
+_WORD = re.compile(r"[A-Za-z][\w+#.\-]*")
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a form question for matching: lowercase, without required markers and punctuation.
+    """
+    text = _REQUIRED_MARKERS.sub(" ", question.lower())
+    return " ".join(_SENTENCE_DOT.sub("", _NON_WORD.sub(" ", text)).split())
+
+
+@lru_cache(maxsize=4096)
+def question_entities(question: str, vocabulary: frozenset = frozenset()) -> frozenset:
+    """
+    Names a question is about: capitalized words after the first, acronyms, technical tokens
+    like C++, C# or Node.js, and the terms of ``vocabulary`` in any case. "Years of Python
+    experience?" and "Years of Java experience?" embed very closely, so two questions only
+    share an answer when these match as well.
+    Args:
+        question (str): The form question.
+        vocabulary (frozenset): Lowercase names to find whatever their case, e.g. the resume's skills.
+    Returns:
+        frozenset: The lowercase entities.
+    """
+    entities = set()
+    for index, word in enumerate(_WORD.findall(question)):
+        word = word.rstrip(".-")
+        technical = any(char.isdigit() or char in "+#." for char in word)
+        acronym = len(word) > 1 and word.isupper()
+        if technical or acronym or (index > 0 and word[0].isupper()):
+            entities.add(word.lower())
+    # "Years with react?" names React as much as "Years with React?" does
+    padded = f" {normalize_question(question)} "
+    entities.update(term for term in vocabulary if f" {term} " in padded)
+    return frozenset(entities)
+
+
+class SemanticAnswerCache:
+    """
+    SQLite-backed store of answered questions with an in-memory index per (scope, kind).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        similarity: float,
+        embedding_model: str,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+    ):
+        """
+        Args:
+            path (Path): The SQLite database file.
+            similarity (float): Minimum cosine similarity for a cached answer to be reused.
+            embedding_model (str): The sentence-transformers model used to embed questions.
+            embed (callable): Optional text -> vector function replacing the local model.
+        """
+        self.path = Path(path)
+        self.similarity = similarity
+        self.embedding_model = embedding_model
+        self.hits = 0
+        self.misses = 0
+        self._embed_fn = embed
+        self._index: Dict[Tuple[str, str], List[Tuple[str, str, Vector, str]]] = {}
+        self._recent: "OrderedDict[str, Vector]" = OrderedDict()
+        self._lock = threading.RLock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                scope TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                question TEXT NOT NULL,
+                embedding TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (scope, kind, normalized)
+            )
+            """
+        )
+        self._conn.commit()
+        logger.debug(f"Answer cache opened at {self.path}")
+
+    @staticmethod
+    def profile_scope(resume: Any, job_application_profile: Any) -> str:
+        """
+        Scope of answers that depend only on the candidate: changes whenever the resume or profile does.
+        """
+        digest = hashlib.sha256()
+        for part in (resume, job_application_profile):
+            digest.update(PromptSerializer.content_hash(part).encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def job_scope(profile_scope: str, job_link: str) -> str:
+        """
+        Scope of answers that also depend on the job, like cover letters.
+        """
+        return f"{profile_scope}:{hashlib.md5(job_link.encode('utf-8')).hexdigest()[:10]}"
+
+    def _embed(self, normalized: str) -> Vector:
+        with self._lock:
+            vector = self._recent.get(normalized)
+            if vector is not None:
+                return vector
+        embed = self._embed_fn or get_embedding_model(self.embedding_model).embed_query
+        vector = unit_vector(embed(normalized))
+        with self._lock:
+            self._recent[normalized] = vector
+            while len(self._recent) > 128:
+                self._recent.popitem(last=False)
+        return vector
+
+    def _entries(self, scope: str, kind: str) -> List[Tuple[str, str, Vector, str]]:
+        key = (scope, kind)
+        entries = self._index.get(key)
+        if entries is None:
+            rows = self._conn.execute(
+                "SELECT normalized, question, embedding, answer FROM answers WHERE scope = ? AND kind = ?",
+                (scope, kind),
+            ).fetchall()
+            entries = [
+                (normalized, question, json.loads(embedding), answer) for normalized, question, embedding, answer in rows
+            ]
+            self._index[key] = entries
+        return entries
+
+    def lookup(
+        self, question: str, kind: str, scopes: Sequence[str], vocabulary: frozenset = frozenset()
+    ) -> Optional[str]:
+        """
+        Find the answer of an earlier question with the same meaning.
+        Args:
+            question (str): The form question.
+            kind (str): The kind of answer, e.g. 'textual' or 'numeric'; answers never cross kinds.
+            scopes (list): The scopes to search, e.g. the profile scope and the current job's scope.
+            vocabulary (frozenset): Lowercase names that are entities in any case (see question_entities).
+        Returns:
+            str: The cached answer, or None.
+        """
+        normalized = normalize_question(question)
+        entities = question_entities(question, vocabulary)
+        with self._lock:
+            candidates = [entry for scope in scopes for entry in self._entries(scope, kind)]
+        for cached_normalized, _, _, answer in candidates:
+            if cached_normalized == normalized:
+                self.hits += 1
+                logger.debug(f"Answer cache exact hit for '{question}'")
+                return answer
+        candidates = [entry for entry in candidates if question_entities(entry[1], vocabulary) == entities]
+        if not candidates:
+            self.misses += 1
+            return None
+
+        vector = self._embed(normalized)
+        best_similarity, best = max(
+            ((cosine(vector, entry[2]), entry) for entry in candidates), key=lambda item: item[0]
+        )
+        if best_similarity < self.similarity:
+            self.misses += 1
+            logger.debug(f"Answer cache miss for '{question}' (closest: '{best[0]}', {best_similarity:.3f})")
+            return None
+        self.hits += 1
+        logger.debug(f"Answer cache hit for '{question}' via '{best[0]}' ({best_similarity:.3f})")
+        return best[3]
+
+    def store(self, question: str, kind: str, scope: str, answer: str) -> None:
+        """
+        Remember the answer to a question.
+        Args:
+            question (str): The form question.
+            kind (str): The kind of answer.
+            scope (str): The scope the answer is valid in.
+            answer (str): The answer.
+        """
+        normalized = normalize_question(question)
+        vector = self._embed(normalized)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (scope, kind, normalized, question, embedding, answer, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (scope, kind, normalized, question, json.dumps(vector), answer, time.time()),
+            )
+            self._conn.commit()
+            entries = [entry for entry in self._entries(scope, kind) if entry[0] != normalized]
+            entries.append((normalized, question, vector, answer))
+            self._index[(scope, kind)] = entries
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: The hit and miss counters since the cache was opened.
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """
+    Return the process-wide answer cache, or None when LLM_ANSWER_CACHE_ENABLED is off.
+    """
+    global _answer_cache
+    if not cfg.LLM_ANSWER_CACHE_ENABLED:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache(
+                path=Path(cfg.LLM_ANSWER_CACHE_PATH),
+                similarity=cfg.LLM_ANSWER_CACHE_SIMILARITY,
+                embedding_model=cfg.LLM_ANSWER_CACHE_EMBEDDING_MODEL,
+            )
+        return _answer_cache
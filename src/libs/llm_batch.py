@@ -0,0 +1,281 @@
+"""
+Offline batch submission of LLM prompts.
+
+Prompts are written to a JSONL file in the OpenAI Batch API format, submitted
+through a pluggable backend and polled until the provider has answered them.
+Every answered request is checkpointed to disk, and so is the id of a batch
+that is still in flight, so a restarted run picks up the pending batch and never
+resubmits (or pays for) work that was already done.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import config as cfg
+from src.libs.http_client import get_http_client
+from src.logging import logger
+
+CHAT_COMPLETIONS_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def batch_line(custom_id: str, prompt: str, model: str, temperature: Optional[float]) -> Dict:
+    """
+    Build one request line of a batch file.
+    Args:
+        custom_id (str): Identifier used to match the answer to the request.
+        prompt (str): The fully rendered prompt.
+        model (str): The model to run the prompt on.
+        temperature (float): The sampling temperature.
+    Returns:
+        dict: The request in OpenAI Batch API format.
+    """
+    body = {"model": model, "messages": [{"role": "user", "content": prompt}]}
+    if temperature is not None:
+        body["temperature"] = temperature
+    return {"custom_id": custom_id, "method": "POST", "url": CHAT_COMPLETIONS_ENDPOINT, "body": body}
+
+
+def write_batch_file(path: Path, lines: List[Dict]) -> Path:
+    """
+    Write request lines to a JSONL batch file.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    return path
+
+
+def parse_batch_output(text: str) -> Dict[str, Dict]:
+    """
+    Parse a batch output file into the answer of every request.
+    Args:
+        text (str): The JSONL output of a batch.
+    Returns:
+        dict: custom_id mapped to {"content": str, "usage": dict} or {"error": str}.
+    """
+    results = {}
+    for raw in text.splitlines():
+        if not raw.strip():
+            continue
+        line = json.loads(raw)
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if line.get("error") or response.get("status_code", 200) >= 400 or not body.get("choices"):
+            results[line["custom_id"]] = {"error": str(line.get("error") or body.get("error") or body)}
+            continue
+        results[line["custom_id"]] = {
+            "content": body["choices"][0]["message"]["content"],
+            "usage": body.get("usage") or {},
+        }
+    return results
+
+
+class BatchBackend(ABC):
+    """Submits batch files and collects their results."""
+
+    @abstractmethod
+    def submit(self, batch_file: Path) -> str:
+        """Submit a batch file and return the batch id."""
+        pass
+
+    @abstractmethod
+    def status(self, batch_id: str) -> str:
+        """Return the provider status of a batch, e.g. 'in_progress' or 'completed'."""
+        pass
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        """Return the parsed output of a finished batch (see parse_batch_output)."""
+        pass
+
+
+class OpenAIBatchBackend(BatchBackend):
+    def __init__(self, api_key: str, api_url: Optional[str] = None, completion_window: str = "24h"):
+        import openai
+
+        self.client = openai.OpenAI(api_key=api_key, base_url=api_url or None, http_client=get_http_client())
+        self.completion_window = completion_window
+
+    def submit(self, batch_file: Path) -> str:
+        with open(batch_file, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=CHAT_COMPLETIONS_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                results.update(parse_batch_output(self.client.files.content(file_id).text))
+        return results
+
+
+def echo_responder(body: Dict) -> str:
+    """Default LocalFileBatchBackend responder: answers with the prompt itself."""
+    return body["messages"][-1]["content"]
+
+
+class LocalFileBatchBackend(BatchBackend):
+    """
+    File-based stand-in for a batch provider, for tests and dry runs.
+    Submitted files are copied into ``directory`` and answered immediately by ``responder``,
+    with output files in the same format the OpenAI Batch API produces.
+    """
+
+    def __init__(self, directory: Path, responder: Callable[[Dict], str] = echo_responder):
+        self.directory = Path(directory)
+        self.responder = responder
+
+    def submit(self, batch_file: Path) -> str:
+        batch_id = f"local_{uuid.uuid4().hex[:12]}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(batch_file, self.directory / f"{batch_id}_input.jsonl")
+        output_lines = []
+        with open(batch_file, "r", encoding="utf-8") as f:
+            for raw in f:
+                if not raw.strip():
+                    continue
+                request = json.loads(raw)
+                content = self.responder(request["body"])
+                output_lines.append({
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"role": "assistant", "content": content}}], "usage": {}},
+                    },
+                    "error": None,
+                })
+        write_batch_file(self.directory / f"{batch_id}_output.jsonl", output_lines)
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        return "completed" if (self.directory / f"{batch_id}_output.jsonl").exists() else "failed"
+
+    def results(self, batch_id: str) -> Dict[str, Dict]:
+        with open(self.directory / f"{batch_id}_output.jsonl", "r", encoding="utf-8") as f:
+            return parse_batch_output(f.read())
+
+
+class BatchCheckpoint:
+    """
+    JSON checkpoint of answered requests, in-flight batches and finished items.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        # results: custom_id -> answer, batches: stage -> in-flight batch id,
+        # items: per-item data worth keeping across runs, done: finished items
+        self.data = {"results": {}, "batches": {}, "items": {}, "done": []}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data.update(json.load(f))
+            logger.info(
+                f"Resuming batch run from {self.path}: {len(self.data['results'])} answers, "
+                f"{len(self.data['done'])} finished items"
+            )
+
+    def save(self) -> None:
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    @property
+    def results(self) -> Dict[str, str]:
+        return self.data["results"]
+
+    def is_done(self, item: str) -> bool:
+        return item in self.data["done"]
+
+    def mark_done(self, item: str) -> None:
+        if item not in self.data["done"]:
+            self.data["done"].append(item)
+            self.save()
+
+
+class BatchRunner:
+    """
+    Runs one batch per stage, skipping requests the checkpoint already holds an answer for.
+    """
+
+    def __init__(self, backend: BatchBackend, checkpoint: BatchCheckpoint, work_dir: Path, poll_interval: float):
+        self.backend = backend
+        self.checkpoint = checkpoint
+        self.work_dir = Path(work_dir)
+        self.poll_interval = poll_interval
+
+    def run(self, stage: str, lines: List[Dict]) -> Dict[str, str]:
+        """
+        Submit the stage's requests that have no answer yet and wait for the batch to finish.
+        Args:
+            stage (str): Name of the stage, used for the batch file and the checkpoint.
+            lines (list): Request lines built with batch_line.
+        Returns:
+            dict: custom_id mapped to the answer, for every request of the stage that has one.
+        """
+        results = self.checkpoint.results
+        pending = [line for line in lines if line["custom_id"] not in results]
+        batch_id = self.checkpoint.data["batches"].get(stage)
+
+        if pending and batch_id is None:
+            batch_file = write_batch_file(self.work_dir / f"{stage}.jsonl", pending)
+            batch_id = self.backend.submit(batch_file)
+            self.checkpoint.data["batches"][stage] = batch_id
+            self.checkpoint.save()
+            logger.info(f"Submitted batch {batch_id} for stage '{stage}' with {len(pending)} requests")
+        elif batch_id is not None:
+            logger.info(f"Waiting for batch {batch_id} of stage '{stage}' submitted by a previous run")
+
+        if batch_id is not None:
+            status = self.backend.status(batch_id)
+            while status not in TERMINAL_STATUSES:
+                logger.debug(f"Batch {batch_id} is {status}, checking again in {self.poll_interval} seconds")
+                time.sleep(self.poll_interval)
+                status = self.backend.status(batch_id)
+            logger.info(f"Batch {batch_id} of stage '{stage}' finished with status '{status}'")
+
+            answered = self.backend.results(batch_id) if status == "completed" else {}
+            input_tokens = output_tokens = 0
+            for custom_id, answer in answered.items():
+                if "error" in answer:
+                    logger.error(f"Batch request {custom_id} failed: {answer['error']}")
+                    continue
+                results[custom_id] = answer["content"]
+                input_tokens += answer["usage"].get("prompt_tokens", 0)
+                output_tokens += answer["usage"].get("completion_tokens", 0)
+            logger.info(f"Stage '{stage}' used {input_tokens} input and {output_tokens} output tokens")
+            # Failed requests are submitted again in a new batch on the next run
+            del self.checkpoint.data["batches"][stage]
+            self.checkpoint.save()
+
+        return {line["custom_id"]: results[line["custom_id"]] for line in lines if line["custom_id"] in results}
+
+
+def get_batch_backend(api_key: str) -> BatchBackend:
+    """
+    Create the batch backend selected by LLM_BATCH_BACKEND ('openai' or 'local').
+    """
+    if cfg.LLM_BATCH_BACKEND == "local":
+        return LocalFileBatchBackend(Path(cfg.LLM_BATCH_DIRECTORY) / "local_backend")
+    if cfg.LLM_BATCH_BACKEND == "openai":
+        return OpenAIBatchBackend(api_key, cfg.LLM_BATCH_API_URL, cfg.LLM_BATCH_COMPLETION_WINDOW)
+    raise ValueError(f"Unsupported batch backend: {cfg.LLM_BATCH_BACKEND}")
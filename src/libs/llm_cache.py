@@ -0,0 +1,264 @@
+"""
+Persistent, content-addressed cache for LLM responses.
+
+Replies are keyed on the model name, the temperature and the fully rendered
+prompt, so regenerating the same resume section or re-running a cover letter
+for an already processed job never reaches the provider twice. Entries live in
+a SQLite file with TTL and size based eviction, fronted by an in-memory LRU.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from langchain_core.messages.ai import AIMessage
+
+import config as cfg
+from src.logging import logger
+
+# Memory hits whose SQLite access time is written in one statement
+_TOUCH_BATCH = 32
+
+
+def render_prompt(messages: Any) -> str:
+    """
+    Render a prompt value (or a plain list of messages) into the exact text sent to the model.
+    Args:
+        messages: A StringPromptValue, ChatPromptValue, list of messages or string.
+    Returns:
+        str: The rendered prompt.
+    """
+    if hasattr(messages, "to_string"):
+        return messages.to_string()
+    if isinstance(messages, (list, tuple)):
+        return "\n".join(
+            f"{getattr(message, 'type', 'message')}: {getattr(message, 'content', message)}"
+            for message in messages
+        )
+    return str(messages)
+
+
+def model_identity(llm: Any) -> tuple:
+    """
+    Resolve the model name and temperature of a (possibly wrapped) chat model.
+    Both the builder's ChatOpenAI and llm_manager's AIAdapter -> AIModel -> chat model chain are supported.
+    Args:
+        llm: The chat model or adapter wrapping it.
+    Returns:
+        tuple: (model_name, temperature)
+    """
+    target = llm
+    while hasattr(target, "model") and not isinstance(target.model, (str, type(None))):
+        target = target.model
+    model_name = (
+        getattr(target, "model_name", None)
+        or getattr(target, "model", None)
+        or getattr(target, "repo_id", None)
+        or type(target).__name__
+    )
+    return str(model_name), getattr(target, "temperature", None)
+
+
+class LLMResponseCache:
+    """
+    Two tier (memory LRU + SQLite) cache of parsed LLM replies.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl_seconds: int,
+        max_entries: int,
+        max_bytes: int,
+        memory_entries: int,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        # Memory hits whose accessed_at is not yet written to SQLite, so the disk LRU sees them
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+        self._conn.commit()
+        logger.debug(f"LLM response cache opened at {self.path}")
+
+    @staticmethod
+    def make_key(model_name: str, temperature: Optional[float], prompt: str) -> str:
+        """
+        Build the content address of a request.
+        Args:
+            model_name (str): The model name.
+            temperature (float): The sampling temperature.
+            prompt (str): The fully rendered prompt.
+        Returns:
+            str: The hex digest identifying the request.
+        """
+        payload = json.dumps([model_name, temperature, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, value: Dict, created_at: float) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a parsed reply, counting the hit or miss.
+        Args:
+            key (str): The request key returned by make_key.
+        Returns:
+            dict: The cached parsed reply, or None.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._is_expired(entry[1]):
+                self._memory.move_to_end(key)
+                self._touched[key] = time.time()
+                if len(self._touched) >= _TOUCH_BATCH:
+                    self._flush_touched()
+                    self._conn.commit()
+                self.hits += 1
+                return entry[0]
+            self._memory.pop(key, None)
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, created_at = row
+            if self._is_expired(created_at):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+            parsed = json.loads(value)
+            self._remember(key, parsed, created_at)
+            self.hits += 1
+            return parsed
+
+    def put(self, key: str, parsed_reply: Dict) -> None:
+        """
+        Store a parsed reply and evict expired or least recently used entries past the size limits.
+        Args:
+            key (str): The request key returned by make_key.
+            parsed_reply (dict): The reply as returned by LoggerChatModel.parse_llmresult.
+        """
+        value = json.dumps(parsed_reply, ensure_ascii=False, default=str)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._remember(key, parsed_reply, now)
+            self._flush_touched()
+            self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        if self.ttl_seconds > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        count, total_size = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        while count > self.max_entries or total_size > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at ASC LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self._memory.pop(row[0], None)
+            count -= 1
+            total_size -= row[1]
+            logger.debug(f"Evicted cached LLM response {row[0][:12]}")
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            dict: The hit and miss counters since the cache was opened.
+        """
+        return {"hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def to_message(parsed_reply: Dict) -> AIMessage:
+        """
+        Rebuild the AIMessage a chain expects from a cached parsed reply.
+        Args:
+            parsed_reply (dict): The cached parsed reply.
+        Returns:
+            AIMessage: The reconstructed message.
+        """
+        return AIMessage(
+            content=parsed_reply["content"],
+            id=parsed_reply.get("id"),
+            response_metadata=parsed_reply.get("response_metadata", {}),
+            usage_metadata=parsed_reply.get("usage_metadata"),
+        )
+
+
+_response_cache: Optional[LLMResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """
+    Return the process-wide response cache, or None when LLM_CACHE_ENABLED is off.
+    """
+    global _response_cache
+    if not cfg.LLM_CACHE_ENABLED:
+        return None
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = LLMResponseCache(
+                path=Path(cfg.LLM_CACHE_PATH),
+                ttl_seconds=cfg.LLM_CACHE_TTL_SECONDS,
+                max_entries=cfg.LLM_CACHE_MAX_ENTRIES,
+                max_bytes=cfg.LLM_CACHE_MAX_BYTES,
+                memory_entries=cfg.LLM_CACHE_MEMORY_ENTRIES,
+            )
+        return _response_cache
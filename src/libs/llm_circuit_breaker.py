@@ -0,0 +1,153 @@
+"""
+Error classification and per-endpoint circuit breaking for LLM calls.
+
+Errors are split into retryable ones (rate limits, 5xx, timeouts, dropped
+connections) and fatal ones (bad requests, authentication, parse bugs) that
+no amount of retrying will fix. A circuit breaker per provider/model counts
+consecutive retryable failures and, once the endpoint looks down, fails every
+call immediately until a single probe succeeds again.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+import config as cfg
+from src.libs.llm_rate_limiter import error_status_code
+from src.logging import logger
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERROR_NAMES = (
+    "Timeout",
+    "TimeoutError",
+    "TimeoutException",
+    "ConnectError",
+    "ConnectionError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "RemoteProtocolError",
+    "ReadError",
+    "ServiceUnavailable",
+    "InternalServerError",
+    "RateLimitError",
+    "ResourceExhausted",
+    "TooManyRequests",
+)
+
+
+class LLMCallError(Exception):
+    """Base class for errors raised when an LLM call is given up on."""
+    pass
+
+
+class RetryBudgetExceeded(LLMCallError):
+    """Raised when a call keeps failing past its retry budget or deadline."""
+    pass
+
+
+class CircuitOpenError(LLMCallError):
+    """Raised without calling the provider while its circuit is open."""
+    pass
+
+
+def is_retryable(err: BaseException) -> bool:
+    """
+    Decide whether retrying a failed LLM call can succeed.
+    Args:
+        err (BaseException): The error raised by the provider client.
+    Returns:
+        bool: True for rate limits, server errors and transport failures; False otherwise.
+    """
+    status = error_status_code(err)
+    if status is None and isinstance(getattr(err, "code", None), int):
+        status = err.code
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(err).__mro__)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after ``failure_threshold`` consecutive retryable failures;
+    open -> half-open after ``recovery_timeout`` seconds, letting a single probe through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """
+        Raise CircuitOpenError when the endpoint is considered down.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                logger.info(f"Circuit for {self.name} half-open, sending a probe request")
+                return
+            raise CircuitOpenError(
+                f"Circuit for {self.name} is open after {self.failures} consecutive failures; failing fast"
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit for {self.name} closed again")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_neutral(self) -> None:
+        """
+        Settle a call whose outcome says nothing about the endpoint's health, like a rejected bad request:
+        the failure count is kept, and a half-open circuit lets the next probe through.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.error(
+                        f"Circuit for {self.name} opened after {self.failures} consecutive failures, "
+                        f"failing fast for {self.recovery_timeout} seconds"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_circuit_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, failure_threshold: Optional[int] = None, recovery_timeout: Optional[float] = None) -> CircuitBreaker:
+    """
+    Return the process-wide circuit breaker for a provider/model key.
+    """
+    with _circuit_breakers_lock:
+        breaker = _circuit_breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=failure_threshold or cfg.LLM_CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout=recovery_timeout or cfg.LLM_CIRCUIT_RECOVERY_SECONDS,
+            )
+            _circuit_breakers[name] = breaker
+        return breaker
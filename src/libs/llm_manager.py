@@ -1,12 +1,16 @@
+import functools
+import hashlib
 import json
 import os
 import re
 import textwrap
+import threading
 import time
-from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import Any, Dict, List, Optional, Union
 
 import httpx
 from dotenv import load_dotenv
@@ -15,22 +19,45 @@ from langchain_core.messages.ai import AIMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompt_values import StringPromptValue
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable
 from Levenshtein import distance
 
 import ai_hawk.llm.prompts as prompts
 from config import JOB_SUITABILITY_SCORE
+from src.libs.experience_engine import ExperienceIndex
+from src.libs.job_ranker import JobRanker, RankedJob
+from src.libs.job_summary_cache import summarize_once
+from src.libs.llm_answer_cache import SemanticAnswerCache, get_answer_cache, normalize_question
+from src.libs.llm_cache import LLMResponseCache, get_response_cache, model_identity, render_prompt
+from src.libs.llm_circuit_breaker import RetryBudgetExceeded, get_circuit_breaker, is_retryable
+from src.libs.llm_models import (
+    AIModel,
+    ClaudeModel,
+    GeminiModel,
+    OllamaModel,
+    OpenAIModel,
+    get_model_registry,
+)
+from src.libs.llm_rate_limiter import get_rate_limiter, response_headers
+from src.libs.llm_token_budget import cached_input_tokens, count_tokens, get_prompt_cache_stats, get_token_planner
+from src.libs.option_matcher import ProfileOptionMatcher
+from src.libs.prompt_serializer import serialize_for_prompt
+from src.libs.question_router import get_document_router, get_section_router
 from src.utils.constants import (
     AVAILABILITY,
+    BACKEND,
+    CACHE,
+    CACHE_HIT,
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHED_INPUT_TOKENS,
     CERTIFICATIONS,
-    CLAUDE,
     COMPANY,
     CONTENT,
     COVER_LETTER,
     EDUCATION_DETAILS,
     EXPERIENCE_DETAILS,
     FINISH_REASON,
-    GEMINI,
-    HUGGINGFACE,
     ID,
     INPUT_TOKENS,
     INTERESTS,
@@ -38,16 +65,15 @@ from src.utils.constants import (
     JOB_DESCRIPTION,
     LANGUAGES,
     LEGAL_AUTHORIZATION,
+    LLM_MODEL,
     LLM_MODEL_TYPE,
     LOGPROBS,
     MODEL,
     MODEL_NAME,
-    OLLAMA,
-    OPENAI,
-    PERPLEXITY,
     OPTIONS,
     OUTPUT_TOKENS,
     PERSONAL_INFORMATION,
+    PLANNED_INPUT_TOKENS,
     PHRASE,
     PROJECTS,
     PROMPTS,
@@ -62,6 +88,7 @@ from src.utils.constants import (
     SALARY_EXPECTATIONS,
     SELF_IDENTIFICATION,
     SYSTEM_FINGERPRINT,
+    TASK_JOB_APPLICATION,
     TEXT,
     TIME,
     TOKEN_USAGE,
@@ -77,144 +104,194 @@ import config as cfg
 load_dotenv()
 
 
-class AIModel(ABC):
-    @abstractmethod
-    def invoke(self, prompt: str) -> str:
-        pass
-
+class LatencyTracker:
+    """Rolling latency percentiles and error rate of one backend."""
 
-class OpenAIModel(AIModel):
-    def __init__(self, api_key: str, llm_model: str, api_url: str = None):
-        from langchain_openai import ChatOpenAI
+    def __init__(self, window: int):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self._lock = threading.Lock()
 
-        base_url = api_url if api_url and len(api_url) > 0 else None
+    def record(self, latency: float, success: bool) -> None:
+        with self._lock:
+            self.outcomes.append(success)
+            if success:
+                self.latencies.append(latency)
 
-        self.model = ChatOpenAI(
-            model_name=llm_model, 
-            openai_api_key=api_key, 
-            temperature=0.4,
-            base_url=base_url
-        )
-
-    def invoke(self, prompt: str) -> BaseMessage:
-        logger.debug("Invoking OpenAI API")
-        response = self.model.invoke(prompt)
-        return response
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
 
+    @property
+    def samples(self) -> int:
+        return len(self.latencies)
 
-class ClaudeModel(AIModel):
-    def __init__(self, api_key: str, llm_model: str):
-        from langchain_anthropic import ChatAnthropic
-
-        self.model = ChatAnthropic(model=llm_model, api_key=api_key, temperature=0.4)
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.5)
 
-    def invoke(self, prompt: str) -> BaseMessage:
-        response = self.model.invoke(prompt)
-        logger.debug("Invoking Claude API")
-        return response
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
 
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
 
-class OllamaModel(AIModel):
-    def __init__(self, llm_model: str, llm_api_url: str):
-        from langchain_ollama import ChatOllama
 
-        if len(llm_api_url) > 0:
-            logger.debug(f"Using Ollama with API URL: {llm_api_url}")
-            self.model = ChatOllama(model=llm_model, base_url=llm_api_url)
-        else:
-            self.model = ChatOllama(model=llm_model)
+class LLMBackend:
+    def __init__(self, name: str, model: AIModel, window: int):
+        self.name = name
+        self.model = model
+        self.tracker = LatencyTracker(window)
 
     def invoke(self, prompt: str) -> BaseMessage:
-        response = self.model.invoke(prompt)
-        return response
+        # Every request, hedged and failed-over ones included, is paced by the process-wide limiter
+        limiter = get_rate_limiter()
+        planned_tokens = count_tokens(render_prompt(prompt), model_identity(self.model)[0])
+        limiter.acquire(planned_tokens)
 
-class PerplexityModel(AIModel):
-    def __init__(self, api_key: str, llm_model: str):
-        from langchain_community.chat_models import ChatPerplexity
-        self.model = ChatPerplexity(model=llm_model, api_key=api_key, temperature=0.4)
-
-    def invoke(self, prompt: str) -> BaseMessage:
-        response = self.model.invoke(prompt)
+        # Time every call so hedging and failover decisions follow the observed latency
+        started_at = time.monotonic()
+        try:
+            response = self.model.invoke(prompt)
+        except Exception:
+            self.tracker.record(time.monotonic() - started_at, success=False)
+            raise
+        latency = time.monotonic() - started_at
+        self.tracker.record(latency, success=True)
+        logger.debug(f"Backend {self.name} answered in {latency:.2f}s")
+
+        usage_metadata = getattr(response, USAGE_METADATA, None) or {}
+        limiter.record_success(planned_tokens, usage_metadata.get(TOTAL_TOKENS), response_headers(response))
+        # Tell the caller which backend answered and what its prompt was planned at
+        response_metadata = getattr(response, RESPONSE_METADATA, None)
+        if isinstance(response_metadata, dict):
+            response_metadata[BACKEND] = self.name
+            response_metadata[PLANNED_INPUT_TOKENS] = planned_tokens
         return response
 
-# gemini doesn't seem to work because API doesn't rstitute answers for questions that involve answers that are too short
-class GeminiModel(AIModel):
-    def __init__(self, api_key: str, llm_model: str):
-        from langchain_google_genai import (
-            ChatGoogleGenerativeAI,
-            HarmBlockThreshold,
-            HarmCategory,
-        )
-
-        self.model = ChatGoogleGenerativeAI(
-            model=llm_model,
-            google_api_key=api_key,
-            safety_settings={
-                HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DEROGATORY: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_TOXICITY: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_VIOLENCE: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUAL: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_MEDICAL: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-            },
-        )
-
-    def invoke(self, prompt: str) -> BaseMessage:
-        response = self.model.invoke(prompt)
-        return response
 
+_hedge_executor = ThreadPoolExecutor(max_workers=cfg.LLM_HEDGE_MAX_WORKERS, thread_name_prefix="llm-hedge")
 
-class HuggingFaceModel(AIModel):
-    def __init__(self, api_key: str, llm_model: str):
-        from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
 
-        self.model = HuggingFaceEndpoint(
-            repo_id=llm_model, huggingfacehub_api_token=api_key, temperature=0.4
+class AIAdapter:
+    def __init__(self, config: dict, api_key: str):
+        self.backends = self._create_backends(config, api_key)
+        # The primary backend's model, kept for callers that inspect the adapter
+        self.model = self.backends[0].model
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.failovers = 0
+
+    def _create_backends(self, config: dict, api_key: str) -> List[LLMBackend]:
+        # Ordered backends from LLM_BACKENDS, or the one selected for answering application questions
+        registry = get_model_registry()
+        specs = cfg.LLM_BACKENDS or [registry.task_spec(TASK_JOB_APPLICATION)]
+        backends = []
+        for spec in specs:
+            model = registry.from_spec(spec, api_key)
+            name = f"{spec[LLM_MODEL_TYPE]}/{spec[LLM_MODEL]}"
+            backends.append(LLMBackend(name, model, cfg.LLM_LATENCY_WINDOW))
+        return backends
+
+    def _ranked_backends(self) -> List[LLMBackend]:
+        # Keep the configured order, but move backends with a high recent error rate to the back
+        return sorted(
+            self.backends,
+            key=lambda backend: backend.tracker.error_rate > cfg.LLM_BACKEND_MAX_ERROR_RATE,
         )
-        self.chatmodel = ChatHuggingFace(llm=self.model)
 
-    def invoke(self, prompt: str) -> BaseMessage:
-        response = self.chatmodel.invoke(prompt)
-        logger.debug(
-            f"Invoking Model from Hugging Face API. Response: {response}, Type: {type(response)}"
-        )
-        return response
+    def latency_report(self) -> Dict[str, Dict]:
+        """Rolling p50/p95 latency and error rate per backend, plus hedging counters."""
+        report = {
+            backend.name: {
+                "p50": backend.tracker.p50,
+                "p95": backend.tracker.p95,
+                "error_rate": backend.tracker.error_rate,
+                "samples": backend.tracker.samples,
+            }
+            for backend in self.backends
+        }
+        report["hedging"] = {
+            "sent": self.hedges_sent,
+            "won": self.hedges_won,
+            "failovers": self.failovers,
+        }
+        return report
 
+    def invoke(self, prompt: str) -> str:
+        if len(self.backends) == 1:
+            return self.backends[0].invoke(prompt)
+
+        queue = self._ranked_backends()
+        pending = {}
+
+        def launch() -> LLMBackend:
+            backend = queue.pop(0)
+            pending[_hedge_executor.submit(backend.invoke, prompt)] = backend
+            return backend
+
+        started_at = time.monotonic()
+        primary = launch()
+        # Hedge once the primary runs past its own p95, but only when the p95 is based on enough samples
+        hedge_after = (
+            primary.tracker.p95
+            if cfg.LLM_HEDGE_ENABLED and primary.tracker.samples >= cfg.LLM_HEDGE_MIN_SAMPLES
+            else None
+        )
+        hedged = False
+        last_error = None
+
+        while pending:
+            timeout = None
+            if hedge_after is not None and not hedged and queue:
+                timeout = max(hedge_after - (time.monotonic() - started_at), 0)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                hedged = True
+                self.hedges_sent += 1
+                backend = launch()
+                logger.info(
+                    f"{primary.name} exceeded its p95 of {hedge_after:.2f}s, sending hedged request to {backend.name}"
+                )
+                continue
 
-class AIAdapter:
-    def __init__(self, config: dict, api_key: str):
-        self.model = self._create_model(config, api_key)
-
-    def _create_model(self, config: dict, api_key: str) -> AIModel:
-        # Get LLM configuration from global config
-        llm_model_type = cfg.LLM_MODEL_TYPE
-        llm_model = cfg.LLM_MODEL
-        llm_api_url = cfg.LLM_API_URL
-
-        logger.debug(f"Using {llm_model_type} with {llm_model}")
-
-        if llm_model_type == OPENAI:
-            return OpenAIModel(api_key, llm_model, llm_api_url)
-        elif llm_model_type == CLAUDE:
-            return ClaudeModel(api_key, llm_model)
-        elif llm_model_type == OLLAMA:
-            return OllamaModel(llm_model, llm_api_url)
-        elif llm_model_type == GEMINI:
-            return GeminiModel(api_key, llm_model)
-        elif llm_model_type == HUGGINGFACE:
-            return HuggingFaceModel(api_key, llm_model)
-        elif llm_model_type == PERPLEXITY:
-            return PerplexityModel(api_key, llm_model)
-        else:
-            raise ValueError(f"Unsupported model type: {llm_model_type}")
+            for future in done:
+                backend = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Backend {backend.name} failed: {str(e)}")
+                    if not pending and queue:
+                        self.failovers += 1
+                        next_backend = launch()
+                        logger.info(f"Failing over from {backend.name} to {next_backend.name}")
+                    continue
+
+                # The losers are not waited for; those still queued are dropped, running ones finish unread
+                for loser in pending:
+                    loser.cancel()
+                elapsed = time.monotonic() - started_at
+                if backend is not primary:
+                    if hedged:
+                        self.hedges_won += 1
+                    logger.info(
+                        f"Request answered by {backend.name} in {elapsed:.2f}s instead of {primary.name} "
+                        f"(hedges won {self.hedges_won}/{self.hedges_sent}, failovers {self.failovers})"
+                    )
+                    logger.debug(f"Backend latency report: {self.latency_report()}")
+                return response
 
-    def invoke(self, prompt: str) -> str:
-        return self.model.invoke(prompt)
+        raise last_error
 
 
 class LLMLogger:
@@ -223,7 +300,7 @@ class LLMLogger:
         logger.debug(f"LLMLogger successfully initialized with LLM: {llm}")
 
     @staticmethod
-    def log_request(prompts, parsed_reply: Dict[str, Dict]):
+    def log_request(prompts, parsed_reply: Dict[str, Dict], cache_info: Dict = None, planned_tokens: int = None):
         # Log the LLM request details for tracking and analytics
         logger.debug("Starting log_request method")
         logger.debug(f"Prompts received: {prompts}")
@@ -283,8 +360,10 @@ class LLMLogger:
             output_tokens = token_usage[OUTPUT_TOKENS]
             input_tokens = token_usage[INPUT_TOKENS]
             total_tokens = token_usage[TOTAL_TOKENS]
+            # Entries written before cached tokens were tracked do not have the field
+            cached_tokens = token_usage.get(CACHED_INPUT_TOKENS, 0)
             logger.debug(
-                f"Token usage - Input: {input_tokens}, Output: {output_tokens}, Total: {total_tokens}"
+                f"Token usage - Input: {input_tokens} ({cached_tokens} cached), Output: {output_tokens}, Total: {total_tokens}"
             )
         except KeyError as e:
             logger.error(f"KeyError in parsed_reply structure: {str(e)}")
@@ -302,10 +381,19 @@ class LLMLogger:
             # Calculate the cost of the API call based on token usage
             # Using OpenAI's pricing model (prices may vary by provider)
             prompt_price_per_token = 0.00000015
+            cached_prompt_price_per_token = 0.000000075
             completion_price_per_token = 0.0000006
-            total_cost = (input_tokens * prompt_price_per_token) + (
-                output_tokens * completion_price_per_token
+            total_cost = (
+                (input_tokens - cached_tokens) * prompt_price_per_token
+                + cached_tokens * cached_prompt_price_per_token
+                + output_tokens * completion_price_per_token
             )
+            # Replies served from the response cache did not cost anything
+            if cache_info and cache_info.get(CACHE_HIT):
+                total_cost = 0.0
+            else:
+                hit_rate = get_prompt_cache_stats().record(input_tokens, cached_tokens)
+                logger.debug(f"Prompt cache hit rate so far: {hit_rate:.1%}")
             logger.debug(f"Total cost calculated: {total_cost}")
         except Exception as e:
             logger.error(f"Error calculating total cost: {str(e)}")
@@ -320,9 +408,13 @@ class LLMLogger:
                 REPLIES: parsed_reply[CONTENT],
                 TOTAL_TOKENS: total_tokens,
                 INPUT_TOKENS: input_tokens,
+                PLANNED_INPUT_TOKENS: planned_tokens,
+                CACHED_INPUT_TOKENS: cached_tokens,
                 OUTPUT_TOKENS: output_tokens,
                 TOTAL_COST: total_cost,
             }
+            if cache_info is not None:
+                log_entry[CACHE] = cache_info
             logger.debug(f"Log entry created: {log_entry}")
         except KeyError as e:
             logger.error(
@@ -342,71 +434,146 @@ class LLMLogger:
 
 
 class LoggerChatModel:
-    def __init__(self, llm: Union[OpenAIModel, OllamaModel, ClaudeModel, GeminiModel]):
+    def __init__(
+        self,
+        llm: Union[OpenAIModel, OllamaModel, ClaudeModel, GeminiModel],
+        max_retries: int = None,
+        retry_deadline: float = None,
+    ):
         self.llm = llm
+        self.max_retries = cfg.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_deadline = cfg.LLM_RETRY_DEADLINE_SECONDS if retry_deadline is None else retry_deadline
+        self.circuit_breaker = get_circuit_breaker(self.circuit_name(llm))
         logger.debug(f"LoggerChatModel successfully initialized with LLM: {llm}")
 
+    @staticmethod
+    def circuit_name(llm: Any) -> str:
+        """
+        The circuit breaker key of a model: the provider/model of each backend an adapter calls,
+        or the model's own provider and name.
+        """
+        backends = getattr(llm, "backends", None)
+        if backends:
+            return ",".join(backend.name for backend in backends)
+        model_name, _ = model_identity(llm)
+        return f"{getattr(llm, 'provider', None) or cfg.LLM_MODEL_TYPE}/{model_name}"
+
     def __call__(self, messages: List[Dict[str, str]]) -> str:
         # Main method to handle LLM API calls with logging and error handling
         logger.debug(f"Entering __call__ method with messages: {messages}")
+
+        # Serve the reply from the response cache when the same request was already answered
+        cache = get_response_cache()
+        cache_key = None
+        if cache is not None:
+            model_name, temperature = model_identity(self.llm)
+            cache_key = cache.make_key(model_name, temperature, render_prompt(messages))
+            cached_reply = cache.get(cache_key)
+            if cached_reply is not None:
+                logger.debug("LLM response served from cache")
+                LLMLogger.log_request(
+                    prompts=messages,
+                    parsed_reply=cached_reply,
+                    cache_info=self._cache_info(cache, hit=True),
+                )
+                return LLMResponseCache.to_message(cached_reply)
+
+        # Every call is paced by the process-wide limiter shared with the other LLM clients;
+        # an adapter paces each of its backend requests itself
+        limiter = get_rate_limiter()
+        backends = getattr(self.llm, "backends", None) or []
+        paced_by_backends = bool(backends)
+        # Pre-flight count with the model's tokenizer, also logged next to the provider's actual count
+        estimated_tokens = count_tokens(render_prompt(messages), model_identity(self.llm)[0])
+        deadline = time.monotonic() + self.retry_deadline
+        attempt = 0
         while True:
+            # Fail fast while the endpoint is known to be down
+            self.circuit_breaker.before_call()
+            if not paced_by_backends:
+                limiter.acquire(estimated_tokens)
             try:
                 logger.debug("Attempting to call the LLM with messages")
 
                 # Invoke the LLM with the provided messages
                 reply = self.llm.invoke(messages)
                 logger.debug(f"LLM response received: {reply}")
-
-                # Parse the response to extract metadata for logging
-                parsed_reply = self.parse_llmresult(reply)
-                logger.debug(f"Parsed LLM reply: {parsed_reply}")
-
-                # Log the API request for analytics and cost tracking
-                LLMLogger.log_request(prompts=messages, parsed_reply=parsed_reply)
-                logger.debug("Request successfully logged")
-
-                return reply
-
-            except httpx.HTTPStatusError as e:
-                # Handle HTTP errors, especially rate limiting (429)
-                logger.error(f"HTTPStatusError encountered: {str(e)}")
-                if e.response.status_code == 429:
-                    # Extract retry-after headers to determine wait time
-                    retry_after = e.response.headers.get("retry-after")
-                    retry_after_ms = e.response.headers.get("retry-after-ms")
-
-                    if retry_after:
-                        wait_time = int(retry_after)
-                        logger.warning(
-                            f"Rate limit exceeded. Waiting for {wait_time} seconds before retrying (extracted from 'retry-after' header)..."
-                        )
-                        time.sleep(wait_time)
-                    elif retry_after_ms:
-                        wait_time = int(retry_after_ms) / 1000.0
-                        logger.warning(
-                            f"Rate limit exceeded. Waiting for {wait_time} seconds before retrying (extracted from 'retry-after-ms' header)..."
-                        )
-                        time.sleep(wait_time)
-                    else:
-                        wait_time = 30
-                        logger.warning(
-                            f"'retry-after' header not found. Waiting for {wait_time} seconds before retrying (default)..."
-                        )
-                        time.sleep(wait_time)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Bad requests, authentication errors and the like will not succeed on retry
+                    logger.error(f"Non-retryable error from LLM ({type(e).__name__}): {str(e)}")
+                    # The endpoint answered, but a rejected request says nothing about its health either way
+                    self.circuit_breaker.record_neutral()
+                    raise
+
+                self.circuit_breaker.record_failure()
+                wait_time = limiter.backoff(e, attempt)
+                attempt += 1
+                if attempt > self.max_retries:
+                    logger.error(f"Giving up after {attempt} attempts: {str(e)}")
+                    raise RetryBudgetExceeded(
+                        f"LLM call failed after {attempt} attempts: {str(e)}"
+                    ) from e
+                if time.monotonic() + wait_time > deadline:
+                    logger.error(f"Retry deadline of {self.retry_deadline} seconds reached: {str(e)}")
+                    raise RetryBudgetExceeded(
+                        f"LLM call did not succeed within {self.retry_deadline} seconds: {str(e)}"
+                    ) from e
+
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code == 429:
+                    logger.warning(
+                        f"Rate limit exceeded. Waiting for {wait_time:.1f} seconds before retrying "
+                        f"(attempt {attempt}/{self.max_retries})..."
+                    )
                 else:
-                    logger.error(
-                        f"HTTP error occurred with status code: {e.response.status_code}, waiting 30 seconds before retrying"
+                    logger.warning(
+                        f"Retryable error ({type(e).__name__}): {str(e)}. Waiting for {wait_time:.1f} seconds "
+                        f"before retrying (attempt {attempt}/{self.max_retries})..."
                     )
-                    time.sleep(30)
+                time.sleep(wait_time)
+                continue
 
-            except Exception as e:
-                # Handle any other unexpected errors with a retry mechanism
-                logger.error(f"Unexpected error occurred: {str(e)}")
-                logger.info(
-                    "Waiting for 30 seconds before retrying due to an unexpected error."
+            self.circuit_breaker.record_success()
+            response_metadata = getattr(reply, RESPONSE_METADATA, None) or {}
+            if paced_by_backends:
+                estimated_tokens = response_metadata.get(PLANNED_INPUT_TOKENS, estimated_tokens)
+            else:
+                usage_metadata = getattr(reply, USAGE_METADATA, None) or {}
+                limiter.record_success(
+                    estimated_tokens, usage_metadata.get(TOTAL_TOKENS), response_headers(reply)
                 )
-                time.sleep(30)
-                continue
+
+            # Parse the response to extract metadata for logging; parse errors are bugs, not transient failures
+            parsed_reply = self.parse_llmresult(reply)
+            logger.debug(f"Parsed LLM reply: {parsed_reply}")
+            logger.debug(
+                f"Prompt tokens planned {estimated_tokens}, actual {parsed_reply[USAGE_METADATA][INPUT_TOKENS]}"
+            )
+
+            # The key names the primary backend's model, so replies from a hedge or failover backend are not stored
+            answered_by = response_metadata.get(BACKEND)
+            if cache is not None and (answered_by is None or answered_by == backends[0].name):
+                cache.put(cache_key, parsed_reply)
+
+            # Log the API request for analytics and cost tracking
+            LLMLogger.log_request(
+                prompts=messages,
+                parsed_reply=parsed_reply,
+                cache_info=self._cache_info(cache, hit=False) if cache is not None else None,
+                planned_tokens=estimated_tokens,
+            )
+            logger.debug("Request successfully logged")
+
+            return reply
+
+    @staticmethod
+    def _cache_info(cache: LLMResponseCache, hit: bool) -> Dict:
+        stats = cache.stats()
+        return {
+            CACHE_HIT: hit,
+            CACHE_HITS: stats[CACHE_HITS],
+            CACHE_MISSES: stats[CACHE_MISSES],
+        }
 
     def parse_llmresult(self, llmresult: AIMessage) -> Dict[str, Dict]:
         logger.debug(f"Parsing LLM result: {llmresult}")
@@ -445,6 +612,7 @@ class LoggerChatModel:
                         TOTAL_TOKENS: usage_metadata.get(
                             TOTAL_TOKENS, 0
                         ),
+                        CACHED_INPUT_TOKENS: cached_input_tokens(llmresult),
                     },
                 }
             else:
@@ -468,6 +636,7 @@ class LoggerChatModel:
                         INPUT_TOKENS: token_usage.prompt_tokens,
                         OUTPUT_TOKENS: token_usage.completion_tokens,
                         TOTAL_TOKENS: token_usage.total_tokens,
+                        CACHED_INPUT_TOKENS: cached_input_tokens(llmresult),
                     },
                 }
             logger.debug(f"Parsed LLM result successfully: {parsed_result}")
@@ -482,10 +651,69 @@ class LoggerChatModel:
             raise
 
 
+@functools.lru_cache(maxsize=None)
+def compile_prompt_template(template: str) -> ChatPromptTemplate:
+    """
+    Parse a prompt template once per process; ChatPromptTemplate is immutable, so chains can share it.
+    """
+    return ChatPromptTemplate.from_template(template)
+
+
 class GPTAnswerer:
+    # Order in which prompt inputs are trimmed when a prompt exceeds the token budget (lowest first);
+    # the question, options and other inputs not listed here are never trimmed
+    TRIM_PRIORITIES = {
+        TEXT: 0,
+        JOB_DESCRIPTION: 0,
+        RESUME_PROJECTS: 1,
+        JOB_APPLICATION_PROFILE: 2,
+        RESUME: 2,
+        RESUME_SECTION: 2,
+        RESUME_EDUCATIONS: 3,
+        RESUME_JOBS: 3,
+    }
+
+    # Template in ai_hawk.llm.prompts answering textual questions about each section
+    SECTION_TEMPLATES = {
+        PERSONAL_INFORMATION: "personal_information_template",
+        SELF_IDENTIFICATION: "self_identification_template",
+        LEGAL_AUTHORIZATION: "legal_authorization_template",
+        WORK_PREFERENCES: "work_preferences_template",
+        EDUCATION_DETAILS: "education_details_template",
+        EXPERIENCE_DETAILS: "experience_details_template",
+        PROJECTS: "projects_template",
+        AVAILABILITY: "availability_template",
+        SALARY_EXPECTATIONS: "salary_expectations_template",
+        CERTIFICATIONS: "certifications_template",
+        LANGUAGES: "languages_template",
+        INTERESTS: "interests_template",
+        COVER_LETTER: "coverletter_template",
+    }
+
     def __init__(self, config, llm_api_key):
         self.ai_adapter = AIAdapter(config, llm_api_key)
         self.llm_cheap = LoggerChatModel(self.ai_adapter)
+        self.model_name, _ = model_identity(self.ai_adapter)
+        self.answer_cache = get_answer_cache()
+        self.resume = None
+        self.job_application_profile = None
+        self.job = None
+        self._profile_scope = None
+        self._skill_vocabulary = None
+        self._experience_index = None
+        self.job_ranker = (
+            JobRanker(
+                cfg.LLM_JOB_RANKER_EMBEDDING_MODEL,
+                cfg.LLM_JOB_RANKER_SKILLS_WEIGHT,
+                cfg.LLM_JOB_RANKER_ACCEPT_SCORE,
+                cfg.LLM_JOB_RANKER_REJECT_SCORE,
+            )
+            if cfg.LLM_JOB_RANKER_ENABLED
+            else None
+        )
+        self.option_matcher = ProfileOptionMatcher(cfg.LLM_OPTION_MATCH_MIN_RATIO) if cfg.LLM_OPTION_MATCHER_ENABLED else None
+        self._chains: Dict[tuple, Runnable] = {}
+        self._chains_lock = threading.Lock()
 
     @property
     def job_description(self):
@@ -515,6 +743,11 @@ class GPTAnswerer:
     def set_resume(self, resume):
         logger.debug(f"Setting resume: {resume}")
         self.resume = resume
+        self._profile_scope = None
+        self._skill_vocabulary = None
+        self._experience_index = None
+        if self.job_ranker is not None:
+            self.job_ranker.set_resume(resume)
 
     def set_job(self, job: Job):
         logger.debug(f"Setting job: {job}")
@@ -526,67 +759,107 @@ class GPTAnswerer:
     def set_job_application_profile(self, job_application_profile):
         logger.debug(f"Setting job application profile: {job_application_profile}")
         self.job_application_profile = job_application_profile
+        self._profile_scope = None
+
+    def _answer_scopes(self) -> tuple:
+        """
+        The answer cache scopes of the current candidate and, when a job is set, of the current job.
+        Returns:
+            tuple: The (profile scope, job scope or None) pair.
+        """
+        if self._profile_scope is None:
+            self._profile_scope = SemanticAnswerCache.profile_scope(self.resume, self.job_application_profile)
+        job_scope = None
+        if self.job is not None and self.job.link:
+            job_scope = SemanticAnswerCache.job_scope(self._profile_scope, self.job.link)
+        return self._profile_scope, job_scope
+
+    def _skill_names(self) -> frozenset:
+        """
+        The lowercase skills of the resume, which the answer cache tells apart whatever their case in a question.
+        """
+        if self._skill_vocabulary is None:
+            self._skill_vocabulary = frozenset(
+                normalize_question(str(skill))
+                for experience in getattr(self.resume, "experience_details", None) or []
+                for skill in experience.skills_acquired or []
+            ) - {""}
+        return self._skill_vocabulary
+
+    def _cached_answer(self, question: str, kind: str) -> Optional[str]:
+        if self.answer_cache is None:
+            return None
+        scopes = [scope for scope in self._answer_scopes() if scope]
+        return self.answer_cache.lookup(question, kind, scopes, self._skill_names())
+
+    def _remember_answer(self, question: str, kind: str, answer: str, job_specific: bool = False) -> None:
+        if self.answer_cache is None:
+            return
+        profile_scope, job_scope = self._answer_scopes()
+        if job_specific and job_scope is None:
+            return
+        self.answer_cache.store(question, kind, job_scope if job_specific else profile_scope, answer)
 
     def _clean_llm_output(self, output: str) -> str:
         return output.replace("*", "").replace("#", "").strip()
     
     def summarize_job_description(self, text: str) -> str:
         logger.debug(f"Summarizing job description: {text}")
-        prompts.summarize_prompt_template = self._preprocess_template_string(
-            prompts.summarize_prompt_template
+        chain = self._chain("summarize_prompt_template", dedent=True)
+        # Summarized once per job, model and template, across runs as well
+        raw_output = summarize_once(
+            text,
+            self.model_name,
+            prompts.summarize_prompt_template,
+            lambda description: chain.invoke({TEXT: description}),
         )
-        prompt = ChatPromptTemplate.from_template(prompts.summarize_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        raw_output = chain.invoke({TEXT: text})
         output = self._clean_llm_output(raw_output)
         logger.debug(f"Summary generated: {output}")
         return output
 
+    def _chain(self, template_name: str, dedent: bool = False) -> Runnable:
+        """
+        Return the chain of a template in ai_hawk.llm.prompts, building it on first use.
+        Args:
+            template_name (str): The attribute name of the template, e.g. 'options_template'.
+            dedent (bool): Whether the template is dedented before it is compiled.
+        Returns:
+            Runnable: The chain, shared by every later call on this answerer.
+        """
+        key = (template_name, dedent)
+        with self._chains_lock:
+            chain = self._chains.get(key)
+            if chain is None:
+                template = getattr(prompts, template_name)
+                if dedent:
+                    template = self._preprocess_template_string(template)
+                chain = self._create_chain(template)
+                self._chains[key] = chain
+            return chain
+
     def _create_chain(self, template: str):
         logger.debug(f"Creating chain with template: {template}")
-        prompt = ChatPromptTemplate.from_template(template)
-        return prompt | self.llm_cheap | StrOutputParser()
-
-    def answer_question_textual_wide_range(self, question: str) -> str:
-        # Answer various types of questions by determining the appropriate section and using relevant templates
-        logger.debug(f"Answering textual question: {question}")
-        
-        # Define chains for different types of questions with appropriate templates
-        chains = {
-            PERSONAL_INFORMATION: self._create_chain(
-                prompts.personal_information_template
-            ),
-            SELF_IDENTIFICATION: self._create_chain(
-                prompts.self_identification_template
-            ),
-            LEGAL_AUTHORIZATION: self._create_chain(
-                prompts.legal_authorization_template
-            ),
-            WORK_PREFERENCES: self._create_chain(
-                prompts.work_preferences_template
-            ),
-            EDUCATION_DETAILS: self._create_chain(
-                prompts.education_details_template
-            ),
-            EXPERIENCE_DETAILS: self._create_chain(
-                prompts.experience_details_template
-            ),
-            PROJECTS: self._create_chain(prompts.projects_template),
-            AVAILABILITY: self._create_chain(prompts.availability_template),
-            SALARY_EXPECTATIONS: self._create_chain(
-                prompts.salary_expectations_template
-            ),
-            CERTIFICATIONS: self._create_chain(
-                prompts.certifications_template
-            ),
-            LANGUAGES: self._create_chain(prompts.languages_template),
-            INTERESTS: self._create_chain(prompts.interests_template),
-            COVER_LETTER: self._create_chain(prompts.coverletter_template),
-        }
-
-        # Determine which section of the resume/application the question relates to
-        prompt = ChatPromptTemplate.from_template(prompts.determine_section_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
+        prompt = compile_prompt_template(template)
+        # Trim oversized inputs to the token budget before the prompt is rendered
+        budget = get_token_planner().as_runnable(
+            TASK_JOB_APPLICATION, template, self.TRIM_PRIORITIES, self.model_name
+        )
+        return budget | prompt | self.llm_cheap | StrOutputParser()
+
+    def _determine_section(self, question: str) -> str:
+        """
+        Find the resume or profile section a question is about, locally when the router is confident.
+        Args:
+            question (str): The form question.
+        Returns:
+            str: The section name, e.g. 'experience_details'.
+        """
+        router = get_section_router()
+        section_name = router.route(question) if router is not None else None
+        if section_name is not None:
+            return section_name
+
+        chain = self._chain("determine_section_template")
         raw_output = chain.invoke({QUESTION: question})
         output = self._clean_llm_output(raw_output)
 
@@ -601,20 +874,31 @@ class GPTAnswerer:
         if not match:
             raise ValueError("Could not extract section name from the response.")
 
-        section_name = match.group(1).lower().replace(" ", "_")
+        return match.group(1).lower().replace(" ", "_")
+
+    def answer_question_textual_wide_range(self, question: str) -> str:
+        # Answer various types of questions by determining the appropriate section and using relevant templates
+        logger.debug(f"Answering textual question: {question}")
+        cached = self._cached_answer(question, "textual")
+        if cached is not None:
+            return cached
+
+        # Determine which section of the resume/application the question relates to
+        section_name = self._determine_section(question)
 
         # Handle cover letter generation as a special case
         if section_name == "cover_letter":
-            chain = chains.get(section_name)
+            chain = self._chain(self.SECTION_TEMPLATES[COVER_LETTER])
             raw_output = chain.invoke(
                 {
-                    RESUME: self.resume,
+                    RESUME: serialize_for_prompt(self.resume, RESUME),
                     JOB_DESCRIPTION: self.job_description,
                     COMPANY: self.job.company,
                 }
             )
             output = self._clean_llm_output(raw_output)
             logger.debug(f"Cover letter generated: {output}")
+            self._remember_answer(question, "textual", output, job_specific=True)
             return output
         
         # Get the relevant section from resume or job application profile
@@ -630,31 +914,38 @@ class GPTAnswerer:
             )
         
         # Use the appropriate chain to answer the question based on the section
-        chain = chains.get(section_name)
-        if chain is None:
+        template_name = self.SECTION_TEMPLATES.get(section_name)
+        if template_name is None:
             logger.error(f"Chain not defined for section '{section_name}'")
             raise ValueError(f"Chain not defined for section '{section_name}'")
+        chain = self._chain(template_name)
         raw_output = chain.invoke(
-            {RESUME_SECTION: resume_section, QUESTION: question}
+            {RESUME_SECTION: serialize_for_prompt(resume_section, section_name), QUESTION: question}
         )
         output = self._clean_llm_output(raw_output)
         logger.debug(f"Question answered: {output}")
+        self._remember_answer(question, "textual", output)
         return output
 
     def answer_question_numeric(
         self, question: str, default_experience: str = 3
     ) -> str:
         logger.debug(f"Answering numeric question: {question}")
-        func_template = self._preprocess_template_string(
-            prompts.numeric_question_template
-        )
-        prompt = ChatPromptTemplate.from_template(func_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
+        if cfg.LLM_EXPERIENCE_ENGINE_ENABLED and self.resume is not None:
+            if self._experience_index is None:
+                self._experience_index = ExperienceIndex(self.resume.experience_details)
+            output = self._experience_index.answer(question)
+            if output is not None:
+                return output
+        cached = self._cached_answer(question, "numeric")
+        if cached is not None:
+            return cached
+        chain = self._chain("numeric_question_template", dedent=True)
         raw_output_str = chain.invoke(
             {
-                RESUME_EDUCATIONS: self.resume.education_details,
-                RESUME_JOBS: self.resume.experience_details,
-                RESUME_PROJECTS: self.resume.projects,
+                RESUME_EDUCATIONS: serialize_for_prompt(self.resume.education_details, EDUCATION_DETAILS),
+                RESUME_JOBS: serialize_for_prompt(self.resume.experience_details, EXPERIENCE_DETAILS),
+                RESUME_PROJECTS: serialize_for_prompt(self.resume.projects, PROJECTS),
                 QUESTION: question,
             }
         )
@@ -663,6 +954,7 @@ class GPTAnswerer:
         try:
             output = self.extract_number_from_string(output_str)
             logger.debug(f"Extracted number: {output}")
+            self._remember_answer(question, "numeric", output)
         except ValueError:
             logger.warning(
                 f"Failed to extract number, using default experience: {default_experience}"
@@ -682,13 +974,23 @@ class GPTAnswerer:
 
     def answer_question_from_options(self, question: str, options: list[str]) -> str:
         logger.debug(f"Answering question from options: {question}")
-        func_template = self._preprocess_template_string(prompts.options_template)
-        prompt = ChatPromptTemplate.from_template(func_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
+        # The same question with other options is a different question
+        options_kind = "options:" + hashlib.md5(
+            json.dumps(sorted(option.strip().lower() for option in options)).encode("utf-8")
+        ).hexdigest()[:12]
+        if self.option_matcher is not None and self.job_application_profile is not None:
+            location = self.job.location if self.job is not None else None
+            answer = self.option_matcher.answer(question, options, self.job_application_profile, location)
+            if answer is not None:
+                return answer
+        cached = self._cached_answer(question, options_kind)
+        if cached is not None:
+            return self.find_best_match(cached, options)
+        chain = self._chain("options_template", dedent=True)
         raw_output_str = chain.invoke(
             {
-                RESUME: self.resume,
-                JOB_APPLICATION_PROFILE: self.job_application_profile,
+                RESUME: serialize_for_prompt(self.resume, RESUME),
+                JOB_APPLICATION_PROFILE: serialize_for_prompt(self.job_application_profile, JOB_APPLICATION_PROFILE),
                 QUESTION: question,
                 OPTIONS: options,
             }
@@ -697,16 +999,18 @@ class GPTAnswerer:
         logger.debug(f"Raw output for options question: {output_str}")
         best_option = self.find_best_match(output_str, options)
         logger.debug(f"Best option determined: {best_option}")
+        self._remember_answer(question, options_kind, best_option)
         return best_option
 
     def determine_resume_or_cover(self, phrase: str) -> str:
         logger.debug(
             f"Determining if phrase refers to resume or cover letter: {phrase}"
         )
-        prompt = ChatPromptTemplate.from_template(
-            prompts.resume_or_cover_letter_template
-        )
-        chain = prompt | self.llm_cheap | StrOutputParser()
+        router = get_document_router()
+        document = router.route(phrase) if router is not None else None
+        if document is not None:
+            return document
+        chain = self._chain("resume_or_cover_letter_template")
         raw_response = chain.invoke({PHRASE: phrase})
         response = self._clean_llm_output(raw_response)
         logger.debug(f"Response for resume_or_cover: {response}")
@@ -717,15 +1021,20 @@ class GPTAnswerer:
         else:
             return "resume"
 
-    def is_job_suitable(self):
-        # Determine if the job is suitable for the applicant based on resume and job description
-        logger.info("Checking if job is suitable")
-        prompt = ChatPromptTemplate.from_template(prompts.is_relavant_position_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
+    def job_suitability_score(self, job: Optional[Job] = None) -> Optional[int]:
+        """
+        Ask the LLM how well a job suits the resume.
+        Args:
+            job (Job): The job to score; defaults to the current job.
+        Returns:
+            int: The 0-10 suitability score, or None when the reply has no score.
+        """
+        job = job or self.job
+        chain = self._chain("is_relavant_position_template")
         raw_output = chain.invoke(
             {
-                RESUME: self.resume,
-                JOB_DESCRIPTION: self.job_description,
+                RESUME: serialize_for_prompt(self.resume, RESUME),
+                JOB_DESCRIPTION: job.description,
             }
         )
         output = self._clean_llm_output(raw_output)
@@ -737,9 +1046,61 @@ class GPTAnswerer:
             reasoning = re.search(r"Reasoning:\s*(.+)", output, re.IGNORECASE | re.DOTALL).group(1)
         except AttributeError:
             logger.warning("Failed to extract score or reasoning from LLM. Proceeding with application, but job may or may not be suitable.")
-            return True
+            return None
 
         logger.info(f"Job suitability score: {score}")
         if int(score) < JOB_SUITABILITY_SCORE:
             logger.debug(f"Job is not suitable: {reasoning}")
-        return int(score) >= JOB_SUITABILITY_SCORE
\ No newline at end of file
+        return int(score)
+
+    def _ranked(self, jobs: List[Job]) -> Optional[list]:
+        """
+        Rank jobs with the embedding ranker; None when it is disabled or its model cannot be loaded.
+        """
+        if self.job_ranker is None:
+            return None
+        try:
+            return self.job_ranker.rank(jobs)
+        except ImportError as e:
+            logger.warning(f"Job ranking disabled, the embedding model is not available: {e}")
+            self.job_ranker = None
+            return None
+
+    def is_job_suitable(self):
+        # Determine if the job is suitable for the applicant based on resume and job description
+        logger.info("Checking if job is suitable")
+        ranked = self._ranked([self.job])
+        if ranked:
+            suitable = self.job_ranker.decide(ranked[0])
+            if suitable is not None:
+                logger.info(f"Job suitability decided by ranking: {suitable} (score {ranked[0].score:.3f})")
+                return suitable
+        score = self.job_suitability_score()
+        return score is None or score >= JOB_SUITABILITY_SCORE
+
+    def rank_jobs(self, jobs: List[Job], top_n: Optional[int] = None) -> list:
+        """
+        Rank jobs against the resume and decide which of the best ones are suitable.
+        Only jobs the embedding ranker finds borderline are scored by the LLM.
+        Args:
+            jobs (list): The jobs to screen.
+            top_n (int): How many of the best ranked jobs to return; defaults to LLM_JOB_RANKER_TOP_N.
+        Returns:
+            list: The top jobs as RankedJob, best first, with suitable set.
+        """
+        top_n = top_n or cfg.LLM_JOB_RANKER_TOP_N
+        if self.job_ranker is not None:
+            try:
+                return self.job_ranker.screen(jobs, self.job_suitability_score, JOB_SUITABILITY_SCORE, top_n)
+            except ImportError as e:
+                logger.warning(f"Job ranking disabled, the embedding model is not available: {e}")
+                self.job_ranker = None
+
+        # Without the ranker every job is scored by the LLM
+        ranked = []
+        for job in jobs:
+            score = self.job_suitability_score(job)
+            suitable = score is None or score >= JOB_SUITABILITY_SCORE
+            ranked.append(RankedJob(job, 0.0, 0.0, float(score or 0), llm_score=score, suitable=suitable))
+        ranked.sort(key=lambda item: item.score, reverse=True)
+        return ranked[:top_n]
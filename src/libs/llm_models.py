@@ -0,0 +1,292 @@
+"""
+Provider-agnostic chat model construction shared by the job application
+answerer (llm_manager.AIAdapter) and the resume and cover letter builder.
+
+Constructed models are cached per (type, model, url, temperature), so repeated
+ResumeGenerator.create_* calls and every AIAdapter reuse the same client
+objects. Each task can be routed to its own backend through LLM_TASK_MODELS.
+"""
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_core.messages import BaseMessage
+
+import config as cfg
+from src.libs.http_client import get_async_http_client, get_http_client
+from src.logging import logger
+from src.utils.constants import (
+    API_KEY,
+    CLAUDE,
+    GEMINI,
+    HUGGINGFACE,
+    LLM_API_URL,
+    LLM_MODEL,
+    LLM_MODEL_TYPE,
+    OLLAMA,
+    OPENAI,
+    PERPLEXITY,
+    TEMPERATURE,
+)
+
+DEFAULT_TEMPERATURE = 0.4
+
+
+class AIModel(ABC):
+    # The provider type the model was built for, e.g. 'openai', as in LLM_MODEL_TYPE
+    provider: Optional[str] = None
+
+    @abstractmethod
+    def invoke(self, prompt: str) -> str:
+        pass
+
+    @property
+    def chat_model(self) -> Any:
+        """The underlying LangChain chat model, for callers that build chains or stream."""
+        return self.model
+
+
+class OpenAIModel(AIModel):
+    provider = OPENAI
+
+    def __init__(self, api_key: str, llm_model: str, api_url: str = None, temperature: float = DEFAULT_TEMPERATURE):
+        from langchain_openai import ChatOpenAI
+
+        base_url = api_url if api_url and len(api_url) > 0 else None
+
+        self.model = ChatOpenAI(
+            model_name=llm_model,
+            openai_api_key=api_key,
+            temperature=temperature,
+            base_url=base_url,
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client(),
+            # Attaches the x-ratelimit-* headers to every reply, so the shared rate limiter adapts after successes too
+            include_response_headers=True,
+        )
+
+    def invoke(self, prompt: str) -> BaseMessage:
+        logger.debug("Invoking OpenAI API")
+        response = self.model.invoke(prompt)
+        return response
+
+
+class ClaudeModel(AIModel):
+    provider = CLAUDE
+
+    def __init__(self, api_key: str, llm_model: str, temperature: float = DEFAULT_TEMPERATURE):
+        from langchain_anthropic import ChatAnthropic
+
+        self.model = ChatAnthropic(model=llm_model, api_key=api_key, temperature=temperature)
+
+    def invoke(self, prompt: str) -> BaseMessage:
+        response = self.model.invoke(prompt)
+        logger.debug("Invoking Claude API")
+        return response
+
+
+class OllamaModel(AIModel):
+    provider = OLLAMA
+
+    def __init__(self, llm_model: str, llm_api_url: str, temperature: float = DEFAULT_TEMPERATURE):
+        from langchain_ollama import ChatOllama
+
+        if len(llm_api_url) > 0:
+            logger.debug(f"Using Ollama with API URL: {llm_api_url}")
+            self.model = ChatOllama(model=llm_model, base_url=llm_api_url, temperature=temperature)
+        else:
+            self.model = ChatOllama(model=llm_model, temperature=temperature)
+
+    def invoke(self, prompt: str) -> BaseMessage:
+        response = self.model.invoke(prompt)
+        return response
+
+class PerplexityModel(AIModel):
+    provider = PERPLEXITY
+
+    def __init__(self, api_key: str, llm_model: str, temperature: float = DEFAULT_TEMPERATURE):
+        from langchain_community.chat_models import ChatPerplexity
+        self.model = ChatPerplexity(model=llm_model, api_key=api_key, temperature=temperature)
+
+    def invoke(self, prompt: str) -> BaseMessage:
+        response = self.model.invoke(prompt)
+        return response
+
+# gemini doesn't seem to work because API doesn't rstitute answers for questions that involve answers that are too short
+class GeminiModel(AIModel):
+    provider = GEMINI
+
+    def __init__(self, api_key: str, llm_model: str, temperature: float = DEFAULT_TEMPERATURE):
+        from langchain_google_genai import (
+            ChatGoogleGenerativeAI,
+            HarmBlockThreshold,
+            HarmCategory,
+        )
+
+        self.model = ChatGoogleGenerativeAI(
+            model=llm_model,
+            google_api_key=api_key,
+            temperature=temperature,
+            safety_settings={
+                HarmCategory.HARM_CATEGORY_UNSPECIFIED: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_DEROGATORY: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_TOXICITY: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_VIOLENCE: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_SEXUAL: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_MEDICAL: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_DANGEROUS: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
+                HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
+            },
+        )
+
+    def invoke(self, prompt: str) -> BaseMessage:
+        response = self.model.invoke(prompt)
+        return response
+
+
+class HuggingFaceModel(AIModel):
+    provider = HUGGINGFACE
+
+    def __init__(self, api_key: str, llm_model: str, temperature: float = DEFAULT_TEMPERATURE):
+        from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
+
+        self.model = HuggingFaceEndpoint(
+            repo_id=llm_model, huggingfacehub_api_token=api_key, temperature=temperature
+        )
+        self.chatmodel = ChatHuggingFace(llm=self.model)
+
+    @property
+    def chat_model(self) -> Any:
+        return self.chatmodel
+
+    def invoke(self, prompt: str) -> BaseMessage:
+        response = self.chatmodel.invoke(prompt)
+        logger.debug(
+            f"Invoking Model from Hugging Face API. Response: {response}, Type: {type(response)}"
+        )
+        return response
+
+
+def create_model(llm_model_type: str, llm_model: str, llm_api_url: str, api_key: str, temperature: float) -> AIModel:
+    """
+    Construct a model wrapper for the given provider without caching.
+    Raises:
+        ValueError: If the model type is not supported.
+    """
+    logger.debug(f"Using {llm_model_type} with {llm_model}")
+
+    if llm_model_type == OPENAI:
+        return OpenAIModel(api_key, llm_model, llm_api_url, temperature)
+    elif llm_model_type == CLAUDE:
+        return ClaudeModel(api_key, llm_model, temperature)
+    elif llm_model_type == OLLAMA:
+        return OllamaModel(llm_model, llm_api_url, temperature)
+    elif llm_model_type == GEMINI:
+        return GeminiModel(api_key, llm_model, temperature)
+    elif llm_model_type == HUGGINGFACE:
+        return HuggingFaceModel(api_key, llm_model, temperature)
+    elif llm_model_type == PERPLEXITY:
+        return PerplexityModel(api_key, llm_model, temperature)
+    else:
+        raise ValueError(f"Unsupported model type: {llm_model_type}")
+
+
+class ModelRegistry:
+    """
+    Cache of constructed models keyed by (type, model, url, temperature) and the API key used.
+    """
+
+    def __init__(self):
+        self._models: Dict[Tuple, AIModel] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        llm_model_type: str,
+        llm_model: str,
+        llm_api_url: Optional[str],
+        api_key: Optional[str],
+        temperature: float = DEFAULT_TEMPERATURE,
+    ) -> AIModel:
+        """
+        Return the cached model for this configuration, constructing it on first use.
+        Args:
+            llm_model_type (str): Provider type, e.g. 'openai' or 'ollama'.
+            llm_model (str): The provider's model name.
+            llm_api_url (str): Base URL of the provider, or an empty string for the default.
+            api_key (str): The API key, unused by local providers.
+            temperature (float): The sampling temperature.
+        Returns:
+            AIModel: The shared model wrapper.
+        """
+        key = (llm_model_type, llm_model, llm_api_url or "", temperature, api_key)
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = create_model(llm_model_type, llm_model, llm_api_url or "", api_key, temperature)
+                self._models[key] = model
+            else:
+                logger.debug(f"Reusing {llm_model_type} model {llm_model} (temperature {temperature})")
+            return model
+
+    @staticmethod
+    def task_spec(task: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resolve the backend configured for a task, falling back to LLM_MODEL_TYPE / LLM_MODEL / LLM_API_URL.
+        Args:
+            task (str): A task name from LLM_TASK_MODELS, or None for the default backend.
+        Returns:
+            dict: The backend spec with the type, model, url, temperature and optional API key.
+        """
+        spec = {
+            LLM_MODEL_TYPE: cfg.LLM_MODEL_TYPE,
+            LLM_MODEL: cfg.LLM_MODEL,
+            LLM_API_URL: cfg.LLM_API_URL,
+            TEMPERATURE: DEFAULT_TEMPERATURE,
+        }
+        if task is not None:
+            spec.update(cfg.LLM_TASK_MODELS.get(task, {}))
+        return spec
+
+    def from_spec(self, spec: Dict[str, Any], api_key: Optional[str]) -> AIModel:
+        """
+        Return the model described by a backend spec; a key in the spec overrides ``api_key``.
+        """
+        return self.get(
+            spec[LLM_MODEL_TYPE],
+            spec[LLM_MODEL],
+            spec.get(LLM_API_URL, ""),
+            spec.get(API_KEY) or api_key,
+            spec.get(TEMPERATURE, DEFAULT_TEMPERATURE),
+        )
+
+    def for_task(self, task: str, api_key: Optional[str]) -> AIModel:
+        """
+        Return the model selected for a task.
+        Args:
+            task (str): The task name, e.g. TASK_RESUME.
+            api_key (str): The API key used unless the task spec carries its own.
+        Returns:
+            AIModel: The shared model wrapper.
+        """
+        spec = self.task_spec(task)
+        logger.debug(f"Task {task} uses {spec[LLM_MODEL_TYPE]}/{spec[LLM_MODEL]}")
+        return self.from_spec(spec, api_key)
+
+
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Return the model registry shared by every LLM client in the process.
+    """
+    global _model_registry
+    with _model_registry_lock:
+        if _model_registry is None:
+            _model_registry = ModelRegistry()
+        return _model_registry
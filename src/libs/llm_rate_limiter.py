@@ -0,0 +1,286 @@
+"""
+Process-wide adaptive rate limiter shared by every LLM client.
+
+Requests and tokens per minute are paced with two token buckets. Rate-limit
+responses (429, ``retry-after``/``retry-after-ms`` and the provider's
+``x-ratelimit-*`` headers) pause every caller in the process at once and halve
+the request rate, which then recovers additively on success. Retries use a
+jittered, capped exponential backoff so parallel workers do not retry in waves.
+"""
+import asyncio
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping, Optional
+
+import config as cfg
+from src.logging import logger
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (about four characters per token) used to reserve token-bucket capacity.
+    Args:
+        text (str): The rendered prompt.
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return len(text) // 4 + 1
+
+
+def error_status_code(err: BaseException) -> Optional[int]:
+    """
+    Extract the HTTP status code from httpx, requests or openai errors.
+    Args:
+        err (BaseException): The raised error.
+    Returns:
+        int: The status code, or None when the error carries no HTTP response.
+    """
+    status = getattr(err, "status_code", None)
+    if status is None:
+        status = getattr(getattr(err, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def error_headers(err: BaseException) -> Mapping[str, str]:
+    """
+    Extract the response headers attached to an HTTP error, if any.
+    """
+    headers = getattr(getattr(err, "response", None), "headers", None)
+    return headers if headers is not None else {}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse rate-limit reset durations such as ``"1s"``, ``"20ms"`` or ``"6m0s"`` into seconds.
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Read the server-requested wait from ``retry-after-ms`` or ``retry-after`` (seconds or HTTP date).
+    """
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at ``rate_per_minute``.
+    Reservations may drive the balance negative so that concurrent callers queue up in arrival order.
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = rate_per_minute
+        self.tokens = rate_per_minute
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_minute / 60.0)
+        self.updated_at = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take ``amount`` from the bucket.
+        Returns:
+            float: Seconds the caller has to wait before the reservation is covered.
+        """
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens * 60.0 / self.rate_per_minute
+
+    def adjust(self, amount: float) -> None:
+        """
+        Charge (positive) or refund (negative) tokens after the real usage is known.
+        """
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+    def set_rate(self, rate_per_minute: float) -> None:
+        self.rate_per_minute = max(rate_per_minute, 1.0)
+        self.tokens = min(self.tokens, self.capacity)
+
+
+class RateLimiter:
+    """
+    Shared pacing for every LLM call made by this process.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        self.max_requests_per_minute = requests_per_minute
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            return max(
+                self._blocked_until - now,
+                self.requests.reserve(1, now),
+                self.tokens.reserve(estimated_tokens, now),
+                0.0,
+            )
+
+    def acquire(self, estimated_tokens: int) -> None:
+        """
+        Block until the process may send a request of ``estimated_tokens`` tokens.
+        """
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiter pacing request for {wait:.2f} seconds")
+            time.sleep(wait)
+
+    async def aacquire(self, estimated_tokens: int) -> None:
+        """
+        Async counterpart of acquire that yields to the event loop while waiting.
+        """
+        wait = self._reserve(estimated_tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiter pacing request for {wait:.2f} seconds")
+            await asyncio.sleep(wait)
+
+    def _block_for(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers: Mapping[str, str]) -> None:
+        """
+        Adapt to the provider's advertised limits and remaining quota.
+        """
+        if not headers:
+            return
+        with self._lock:
+            retry_after = parse_retry_after(headers)
+            if retry_after:
+                self._block_for(retry_after)
+
+            for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                limit = headers.get(f"x-ratelimit-limit-{kind}")
+                if limit:
+                    try:
+                        limit = float(limit)
+                    except ValueError:
+                        limit = None
+                    if limit and limit < bucket.capacity:
+                        bucket.capacity = limit
+                        bucket.set_rate(min(bucket.rate_per_minute, limit))
+                        if kind == "requests":
+                            self.max_requests_per_minute = limit
+
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining is not None and reset:
+                    try:
+                        if float(remaining) <= 0:
+                            self._block_for(reset)
+                    except ValueError:
+                        pass
+
+    def record_success(self, estimated_tokens: int, actual_tokens: Optional[int] = None, headers: Optional[Mapping[str, str]] = None) -> None:
+        """
+        Settle the token reservation and let the request rate recover additively.
+        """
+        with self._lock:
+            if actual_tokens:
+                self.tokens.adjust(actual_tokens - estimated_tokens)
+            if self.requests.rate_per_minute < self.max_requests_per_minute:
+                self.requests.set_rate(min(self.requests.rate_per_minute + 1, self.max_requests_per_minute))
+        self.update_from_headers(headers or {})
+
+    def backoff(self, err: BaseException, attempt: int) -> float:
+        """
+        Compute the wait before retrying a failed call.
+        A server-provided retry-after wins, uncapped: retrying earlier only earns another 429 and halves
+        the rate again, and a wait past the caller's deadline is for the caller to refuse.
+        Otherwise the delay is a jittered exponential capped at backoff_max.
+        Rate-limit errors also pause every other caller and halve the request rate.
+        Args:
+            err (BaseException): The error raised by the call.
+            attempt (int): Zero-based attempt number.
+        Returns:
+            float: Seconds to wait before the next attempt.
+        """
+        headers = error_headers(err)
+        delay = parse_retry_after(headers)
+        if delay is None:
+            ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+            delay = ceiling / 2 + random.uniform(0, ceiling / 2)
+
+        if error_status_code(err) == 429 or type(err).__name__ == "RateLimitError":
+            with self._lock:
+                self._block_for(delay)
+                self.requests.set_rate(self.requests.rate_per_minute / 2)
+            logger.warning(
+                f"Rate limited by provider, pausing all LLM calls for {delay:.2f} seconds "
+                f"(request rate now {self.requests.rate_per_minute:.0f}/min)"
+            )
+        self.update_from_headers(headers)
+        return delay
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Return the rate limiter shared by every LLM client in the process.
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(
+                requests_per_minute=cfg.LLM_REQUESTS_PER_MINUTE,
+                tokens_per_minute=cfg.LLM_TOKENS_PER_MINUTE,
+                backoff_base=cfg.LLM_BACKOFF_BASE_SECONDS,
+                backoff_max=cfg.LLM_BACKOFF_MAX_SECONDS,
+            )
+        return _rate_limiter
+
+
+def response_headers(reply: Any) -> Mapping[str, str]:
+    """
+    Return the HTTP headers a chat model attached to its reply, if the provider integration exposes them.
+    """
+    return (getattr(reply, "response_metadata", None) or {}).get("headers") or {}
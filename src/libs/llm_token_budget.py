@@ -0,0 +1,242 @@
+"""
+Pre-flight token counting and prompt budgeting.
+
+Prompts embed whole resumes and scraped job descriptions, so a long page can
+silently inflate latency and cost or overflow the context window. Before a
+chain renders its prompt, the planner counts the static template text (cached
+per template) and every input, and when the total exceeds the task's budget it
+truncates the lowest-priority inputs first. Tokenizers and counts are cached.
+
+It also reads back how many prompt tokens the provider served from its prefix
+cache, so the hit rate of the cache-friendly prompt layout can be tracked.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from langchain_core.runnables import RunnableLambda
+
+import config as cfg
+from src.libs.llm_rate_limiter import estimate_tokens
+from src.logging import logger
+
+TRUNCATION_MARKER = " [...]"
+_TEMPLATE_VARIABLE = re.compile(r"(?<!\{)\{[^{}]*\}(?!\})")
+
+
+@lru_cache(maxsize=32)
+def get_encoding(model_name: Optional[str]) -> Any:
+    """
+    Return the tiktoken encoding for a model, or None when tiktoken is not installed or its encoding cannot be loaded.
+    Models tiktoken does not know (OpenRouter, Gemini, local models) use cl100k_base as an approximation.
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        logger.debug("tiktoken is not installed, token counts are estimated from the text length")
+        return None
+    try:
+        if model_name:
+            try:
+                return tiktoken.encoding_for_model(model_name.split("/")[-1])
+            except KeyError:
+                pass
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use, which fails offline; the None result is cached like the encoding
+        logger.warning(f"Could not load the tiktoken encoding, token counts are estimated from the text length: {e}")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """
+    Count the tokens of a text for the given model.
+    Args:
+        text (str): The text to count.
+        model_name (str): The model whose tokenizer to use.
+    Returns:
+        int: The number of tokens.
+    """
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=256)
+def template_tokens(template: str, model_name: Optional[str] = None) -> int:
+    """
+    Count the static part of a prompt template, i.e. everything but its {variables}.
+    """
+    return count_tokens(_TEMPLATE_VARIABLE.sub("", template), model_name)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_name: Optional[str] = None) -> str:
+    """
+    Keep the beginning of a text that fits in ``max_tokens``, marking the cut.
+    Args:
+        text (str): The text to shorten.
+        max_tokens (int): The number of tokens the result may use.
+        model_name (str): The model whose tokenizer to use.
+    Returns:
+        str: The truncated text.
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model_name) <= max_tokens:
+        return text
+    keep = max(max_tokens - count_tokens(TRUNCATION_MARKER, model_name), 0)
+    encoding = get_encoding(model_name)
+    if encoding is None:
+        return text[: keep * 4] + TRUNCATION_MARKER
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
+
+
+def _usage_field(usage: Any, name: str) -> Any:
+    # Usage blocks arrive as dicts or as provider SDK objects depending on the integration
+    if usage is None:
+        return None
+    if isinstance(usage, Mapping):
+        return usage.get(name)
+    return getattr(usage, name, None)
+
+
+def cached_input_tokens(reply: Any) -> int:
+    """
+    Number of prompt tokens the provider served from its prompt (prefix) cache.
+    Understands LangChain's input_token_details, OpenAI's prompt_tokens_details.cached_tokens
+    and Anthropic's cache_read_input_tokens.
+    Args:
+        reply (AIMessage): The model reply.
+    Returns:
+        int: The cached prompt tokens, 0 when the provider does not report them.
+    """
+    details = _usage_field(getattr(reply, "usage_metadata", None), "input_token_details")
+    cached = _usage_field(details, "cache_read")
+    if cached is None:
+        metadata = getattr(reply, "response_metadata", None) or {}
+        usage = metadata.get("token_usage") or metadata.get("usage")
+        cached = _usage_field(_usage_field(usage, "prompt_tokens_details"), "cached_tokens")
+        if cached is None:
+            cached = _usage_field(usage, "cache_read_input_tokens")
+    return int(cached or 0)
+
+
+class PromptCacheStats:
+    """
+    Running totals of prompt tokens sent and prompt tokens served from the provider's cache.
+    """
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, input_tokens: int, cached_tokens: int) -> float:
+        """
+        Add one request and return the hit rate so far.
+        """
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.cached_tokens += cached_tokens
+            return self.hit_rate
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+_prompt_cache_stats = PromptCacheStats()
+
+
+def get_prompt_cache_stats() -> PromptCacheStats:
+    """
+    Return the process-wide prompt cache statistics.
+    """
+    return _prompt_cache_stats
+
+
+class TokenBudgetPlanner:
+    """
+    Fits prompt inputs into a per-task token budget.
+    """
+
+    def __init__(self, default_budget: int, task_budgets: Mapping[str, int]):
+        self.default_budget = default_budget
+        self.task_budgets = dict(task_budgets)
+
+    def budget_for(self, task: Optional[str]) -> int:
+        return self.task_budgets.get(task, self.default_budget)
+
+    def fit(
+        self,
+        task: Optional[str],
+        template: str,
+        inputs: Dict[str, Any],
+        priorities: Mapping[str, int],
+        model_name: Optional[str] = None,
+    ) -> Tuple[Dict[str, Any], int]:
+        """
+        Count the prompt a template and its inputs will render to and trim inputs that do not fit.
+        Inputs are trimmed in ascending priority order; inputs missing from ``priorities`` are never trimmed.
+        Args:
+            task (str): The task whose budget applies.
+            template (str): The prompt template.
+            inputs (dict): The template variables.
+            priorities (dict): Input name mapped to its priority (lower is trimmed first).
+            model_name (str): The model whose tokenizer to use.
+        Returns:
+            tuple: The (possibly trimmed) inputs and the planned number of prompt tokens.
+        """
+        budget = self.budget_for(task)
+        texts = {key: value if isinstance(value, str) else str(value) for key, value in inputs.items()}
+        counts = {key: count_tokens(text, model_name) for key, text in texts.items()}
+        planned = template_tokens(template, model_name) + sum(counts.values())
+        if planned <= budget:
+            return inputs, planned
+
+        fitted = dict(inputs)
+        trimmable = sorted((key for key in inputs if key in priorities), key=lambda key: priorities[key])
+        for key in trimmable:
+            if planned <= budget:
+                break
+            allowed = max(counts[key] - (planned - budget), 0)
+            fitted[key] = truncate_to_tokens(texts[key], allowed, model_name)
+            trimmed_count = count_tokens(fitted[key], model_name)
+            logger.warning(
+                f"Prompt for {task} exceeds its budget of {budget} tokens, "
+                f"trimmed '{key}' from {counts[key]} to {trimmed_count} tokens"
+            )
+            planned -= counts[key] - trimmed_count
+        if planned > budget:
+            logger.warning(f"Prompt for {task} still uses {planned} tokens after trimming (budget {budget})")
+        return fitted, planned
+
+    def as_runnable(
+        self,
+        task: Optional[str],
+        template: str,
+        priorities: Mapping[str, int],
+        model_name: Optional[str] = None,
+    ) -> RunnableLambda:
+        """
+        Wrap fit as a chain step placed before the prompt template.
+        """
+        return RunnableLambda(lambda inputs: self.fit(task, template, inputs, priorities, model_name)[0])
+
+
+_token_planner: Optional[TokenBudgetPlanner] = None
+_token_planner_lock = threading.Lock()
+
+
+def get_token_planner() -> TokenBudgetPlanner:
+    """
+    Return the process-wide token budget planner.
+    """
+    global _token_planner
+    with _token_planner_lock:
+        if _token_planner is None:
+            _token_planner = TokenBudgetPlanner(cfg.LLM_PROMPT_TOKEN_BUDGET, cfg.LLM_PROMPT_TOKEN_BUDGETS)
+        return _token_planner
@@ -0,0 +1,226 @@
+"""
+Deterministic answers to dropdown and radio questions covered by the job application profile.
+
+Work authorization, visa, sponsorship, relocation, work mode, screening and
+self-identification questions map directly onto JobApplicationProfile fields.
+ProfileOptionMatcher finds the field with keyword rules, reads the candidate's
+value and maps it onto the offered options: yes/no values by the polarity of
+each option ("Yes", "No, I will not require sponsorship", "I am not a protected
+veteran"), other values by normalized token containment and then fuzzy
+similarity. Questions without a rule, a region or a single confident option go
+to the LLM as before.
+"""
+import functools
+import re
+from typing import Any, List, Optional, Sequence, Tuple
+
+from Levenshtein import ratio
+
+from src.logging import logger
+
+US, EU, CANADA, UK = "us", "eu", "canada", "uk"
+
+# Regions are matched case-sensitively for acronyms, so "let us know" is not about the US
+_REGIONS = [
+    (US, re.compile(r"\b(?:US|USA)\b|\bU\.S\.(?:A\.)?|(?i:\bunited states\b|\bamerica\b)")),
+    (UK, re.compile(r"\bUK\b|\bU\.K\.|(?i:\bunited kingdom\b|\bbritain\b|\bengland\b|\bscotland\b|\bwales\b)")),
+    (EU, re.compile(r"\bEU\b|(?i:\beurope(?:an)?\b)")),
+    (CANADA, re.compile(r"(?i:\bcanad(?:a|ian)\b)")),
+]
+_US_STATE = re.compile(
+    r",\s*(?:AL|AK|AZ|AR|CA|CO|CT|DE|DC|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH|NJ|NM|NY"
+    r"|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY)\b"
+)
+
+# (question pattern, profile section, field, inverted) matched against the normalized question, first match wins;
+# '{region}' is filled in from the question or the job location, and an inverted rule answers with the opposite
+# of the profile value ("Can you work without sponsorship?" is answered "No" by a candidate who requires it)
+_AUTHORIZATION = r"authori[sz](?:ed|ation)|eligib|legally|right to work|(?:permitted|allowed) to work|work permit"
+_NEGATION = r"\b(?:without|no|not)\s(?:\w+\s){0,3}"
+PROFILE_RULES: List[Tuple["re.Pattern", str, str, bool]] = [
+    # "Will you require sponsorship for work authorization?" is about sponsorship, not authorization
+    (
+        re.compile(rf"^(?!.*\b(?:requir|need)\w*\b.*\b(?:sponsor|visa)).*(?:{_AUTHORIZATION})"),
+        "legal_authorization",
+        "legally_allowed_to_work_in_{region}",
+        False,
+    ),
+    (re.compile(rf"{_NEGATION}(?:visa\s)?sponsor"), "legal_authorization", "requires_{region}_sponsorship", True),
+    (re.compile(rf"{_NEGATION}visas?\b"), "legal_authorization", "requires_{region}_visa", True),
+    (re.compile(r"sponsor"), "legal_authorization", "requires_{region}_sponsorship", False),
+    (re.compile(r"\bvisas?\b"), "legal_authorization", "requires_{region}_visa", False),
+    (re.compile(r"relocat"), "work_preferences", "open_to_relocation", False),
+    (re.compile(r"\bremote(?:ly)?\b|work(?:ing)? from home"), "work_preferences", "remote_work", False),
+    # Questions are normalized, so 'on-site' and 'in-person' arrive as 'on site' and 'in person'
+    (re.compile(r"\bon ?site\b|\bin person\b|in the office|commut"), "work_preferences", "in_person_work", False),
+    (re.compile(r"drug (?:test|screen)"), "work_preferences", "willing_to_undergo_drug_tests", False),
+    (
+        re.compile(r"background (?:check|screen|investigation)"),
+        "work_preferences",
+        "willing_to_undergo_background_checks",
+        False,
+    ),
+    (
+        re.compile(r"assessment|skills? test|coding (?:test|challenge|exercise)|take home"),
+        "work_preferences",
+        "willing_to_complete_assessments",
+        False,
+    ),
+    (re.compile(r"veteran"), "self_identification", "veteran", False),
+    (re.compile(r"disabilit|disabled"), "self_identification", "disability", False),
+    (re.compile(r"pronoun"), "self_identification", "pronouns", False),
+    (re.compile(r"\bgender\b|\bsex\b"), "self_identification", "gender", False),
+    (re.compile(r"ethnic|\brace\b|hispanic|latin[oax]"), "self_identification", "ethnicity", False),
+]
+
+_YES = re.compile(
+    r"^(?:yes|y|true|i am|i do|i will|i have|i can|i would|i require|i need"
+    r"|i identify as (?:a |an )?(?:protected )?veteran)\b"
+)
+_NO = re.compile(
+    r"^(?:no|n|false|none|not|i am not|i m not|i do not|i don t|i will not|i won t|i have not|i cannot|i can t"
+    r"|i would not)\b"
+)
+_DECLINE = re.compile(
+    r"decline|prefer not|(?:do not|don t) (?:wish|want) to|not to (?:say|answer|disclose)|choose not|wish not|rather not"
+)
+
+
+def normalize_option(text: Any) -> str:
+    """
+    Lowercase an option or profile value and reduce it to words separated by single spaces.
+    """
+    return " ".join(re.sub(r"[^\w+#]+", " ", str(text).lower()).split())
+
+
+def polarity(text: Any) -> Optional[bool]:
+    """
+    True for yes-like values and options, False for no-like ones, None otherwise.
+    """
+    if isinstance(text, bool):
+        return text
+    normalized = normalize_option(text)
+    if not normalized or _DECLINE.search(normalized):
+        return None
+    if _NO.match(normalized):
+        return False
+    if _YES.match(normalized):
+        return True
+    return None
+
+
+def question_region(question: str, location: Optional[str] = None) -> Optional[str]:
+    """
+    The work authorization region a question is about, or else the region of the job location.
+    """
+    for text in (question, location):
+        if not text:
+            continue
+        for region, pattern in _REGIONS:
+            if pattern.search(text):
+                return region
+        if text is location and _US_STATE.search(text):
+            return US
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def match_option(value: str, options: Tuple[str, ...], min_ratio: float) -> Optional[str]:
+    """
+    Map a profile value onto one of the offered options.
+    Args:
+        value (str): The profile value, e.g. 'No' or 'Asian'.
+        options (tuple): The options of the question.
+        min_ratio (float): Minimum normalized similarity of a fuzzy match.
+    Returns:
+        str: The single option the value confidently maps to, or None.
+    """
+    wanted = polarity(value)
+    if wanted is not None:
+        matches = [option for option in options if polarity(option) is wanted]
+        return matches[0] if len(matches) == 1 else None
+
+    normalized = normalize_option(value)
+    if not normalized:
+        return None
+    candidates = [(option, normalize_option(option)) for option in options]
+    exact = [option for option, text in candidates if text == normalized]
+    if exact:
+        return exact[0]
+    # Every word of the value appears in the option: 'Asian' -> 'Asian (Not Hispanic or Latino)', but not 'Male' -> 'Female'
+    words = set(normalized.split())
+    containing = [option for option, text in candidates if words <= set(text.split())]
+    if len(containing) == 1:
+        return containing[0]
+    scored = sorted(
+        ((ratio(normalized, text), option) for option, text in candidates if not _DECLINE.search(text)), reverse=True
+    )
+    if scored and scored[0][0] >= min_ratio and (len(scored) == 1 or scored[0][0] > scored[1][0]):
+        return scored[0][1]
+    return None
+
+
+class ProfileOptionMatcher:
+    """
+    Answers option questions from the job application profile when a rule and a single option fit.
+    """
+
+    def __init__(self, min_ratio: float):
+        """
+        Args:
+            min_ratio (float): Minimum normalized similarity for a fuzzy match of a profile value to an option.
+        """
+        self.min_ratio = min_ratio
+        self.hits = 0
+        self.misses = 0
+
+    def profile_value(self, question: str, profile: Any, location: Optional[str] = None) -> Optional[Any]:
+        """
+        The profile value a question asks for.
+        Args:
+            question (str): The form question.
+            profile (JobApplicationProfile): The candidate's profile.
+            location (str): The job location, used when the question names no region.
+        Returns:
+            The value of the first matching rule's field, negated for inverted rules, or None.
+        """
+        normalized = normalize_option(question)
+        for pattern, section, field, inverted in PROFILE_RULES:
+            if not pattern.search(normalized):
+                continue
+            if "{region}" in field:
+                region = question_region(question, location)
+                if region is None:
+                    return None
+                field = field.format(region=region)
+            value = getattr(getattr(profile, section, None), field, None)
+            if value is None or value == "":
+                return None
+            if inverted:
+                wanted = polarity(value)
+                return None if wanted is None else not wanted
+            return value
+        return None
+
+    def answer(self, question: str, options: Sequence[str], profile: Any, location: Optional[str] = None) -> Optional[str]:
+        """
+        Answer a dropdown or radio question from the profile.
+        Args:
+            question (str): The form question.
+            options (list): The offered options.
+            profile (JobApplicationProfile): The candidate's profile.
+            location (str): The job location, used when the question names no region.
+        Returns:
+            str: The chosen option, or None when the LLM has to decide.
+        """
+        value = self.profile_value(question, profile, location)
+        option = None
+        if value is not None and options:
+            # Booleans from YAML and 'Yes'/'No' strings are matched alike
+            option = match_option(value if isinstance(value, str) else ("yes" if value else "no"), tuple(options), self.min_ratio)
+        if option is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.debug(f"Option answered from the profile: '{question}' -> '{option}' (profile value {value!r})")
+        return option
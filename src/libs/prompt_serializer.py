@@ -0,0 +1,175 @@
+"""
+Compact prompt serialization of Resume and JobApplicationProfile sections.
+
+Prompts used to interpolate the pydantic models and dataclasses directly, so
+every prompt carried their default repr: class names, field names of empty
+fields, ``None`` values and ``HttpUrl(...)`` wrappers. The serializer renders
+them as minimal YAML instead: empty values are dropped, field order follows the
+schema, sets are sorted so the text is stable across runs, and lists of
+single-key mappings (``- responsibility: ...``, ``- Algorithms: A``) are
+flattened. Rendered sections are memoized per content hash, and the tokens
+saved compared to the default repr are tracked per section.
+"""
+import dataclasses
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+from pydantic import BaseModel
+
+from src.libs.llm_token_budget import count_tokens
+from src.logging import logger
+
+_EMPTY = (None, "", [], {})
+
+
+def compact_data(value: Any) -> Any:
+    """
+    Convert a schema object into plain YAML-ready data without empty values.
+    Args:
+        value: A pydantic model, dataclass, mapping, collection or scalar.
+    Returns:
+        The plain data, or None when nothing is left.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, dict):
+        data = {str(key): compact_data(item) for key, item in value.items()}
+        return {key: item for key, item in data.items() if item not in _EMPTY} or None
+    if isinstance(value, (set, frozenset)):
+        return sorted((item for item in map(compact_data, value) if item not in _EMPTY), key=str) or None
+    if isinstance(value, (list, tuple)):
+        items = [item for item in map(compact_data, value) if item not in _EMPTY]
+        return _flatten_single_key_mappings(items) or None
+    if isinstance(value, BaseModel) or dataclasses.is_dataclass(value):
+        return compact_data({key: item for key, item in vars(value).items() if not key.startswith("_")})
+    # HttpUrl, EmailStr and other constrained types render as their plain value
+    return str(value)
+
+
+def _flatten_single_key_mappings(items: list) -> Any:
+    if not items or not all(isinstance(item, dict) and len(item) == 1 for item in items):
+        return items
+    keys = [next(iter(item)) for item in items]
+    if len(set(keys)) == 1:
+        # [{responsibility: a}, {responsibility: b}] -> [a, b]
+        return [item[keys[0]] for item in items]
+    if len(set(keys)) == len(keys):
+        # [{Algorithms: A}, {Databases: B}] -> {Algorithms: A, Databases: B}
+        return {key: item[key] for key, item in zip(keys, items)}
+    return items
+
+
+def to_prompt_text(value: Any) -> str:
+    """
+    Render a schema object as compact YAML for a prompt.
+    """
+    data = compact_data(value)
+    if data is None:
+        return ""
+    if isinstance(data, str):
+        return data
+    return yaml.safe_dump(data, sort_keys=False, allow_unicode=True, default_flow_style=False, width=10**6).strip()
+
+
+class PromptSerializer:
+    """
+    Memoizing serializer that also records the tokens saved per section.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[str, int, int]]" = OrderedDict()
+        self._savings: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def content_hash(value: Any) -> str:
+        """
+        Hash of an object's content; the repr of pydantic models and dataclasses lists every field value.
+        """
+        return hashlib.sha256(f"{type(value).__qualname__}:{value!r}".encode("utf-8")).hexdigest()
+
+    def serialize(self, value: Any, section: Optional[str] = None) -> str:
+        """
+        Render a resume, job application profile or one of their sections for a prompt.
+        Args:
+            value: The object to render; plain strings are returned unchanged.
+            section (str): Name the token savings are reported under, e.g. 'experience_details'.
+        Returns:
+            str: The compact YAML text.
+        """
+        if isinstance(value, str):
+            return value
+        section = section or type(value).__name__
+        key = self.content_hash(value)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+        if entry is None:
+            text = to_prompt_text(value)
+            # Prompts used to render the value with str(), which is the baseline of the report
+            entry = (text, count_tokens(str(value)), count_tokens(text))
+            logger.debug(f"Serialized {section} for prompts: {entry[1]} -> {entry[2]} tokens")
+            with self._lock:
+                self._cache[key] = entry
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        text, default_tokens, compact_tokens = entry
+        with self._lock:
+            stats = self._savings.setdefault(section, {"requests": 0, "default_tokens": 0, "compact_tokens": 0})
+            stats["requests"] += 1
+            stats["default_tokens"] += default_tokens
+            stats["compact_tokens"] += compact_tokens
+        return text
+
+    def savings_report(self) -> Dict[str, Dict[str, int]]:
+        """
+        Input tokens saved per section since the process started.
+        Returns:
+            dict: Section name mapped to its request count, default and compact token totals and the tokens saved.
+        """
+        with self._lock:
+            return {
+                section: {**stats, "saved_tokens": stats["default_tokens"] - stats["compact_tokens"]}
+                for section, stats in sorted(self._savings.items())
+            }
+
+    def log_savings_report(self) -> None:
+        report = self.savings_report()
+        if not report:
+            return
+        for section, stats in report.items():
+            logger.info(
+                f"Prompt section '{section}': {stats['requests']} uses, {stats['default_tokens']} -> "
+                f"{stats['compact_tokens']} tokens ({stats['saved_tokens']} saved)"
+            )
+        logger.info(f"Compact serialization saved {sum(s['saved_tokens'] for s in report.values())} input tokens in total")
+
+
+_prompt_serializer: Optional[PromptSerializer] = None
+_prompt_serializer_lock = threading.Lock()
+
+
+def get_prompt_serializer() -> PromptSerializer:
+    """
+    Return the process-wide prompt serializer.
+    """
+    global _prompt_serializer
+    with _prompt_serializer_lock:
+        if _prompt_serializer is None:
+            _prompt_serializer = PromptSerializer()
+        return _prompt_serializer
+
+
+def serialize_for_prompt(value: Any, section: Optional[str] = None) -> str:
+    """
+    Shortcut for get_prompt_serializer().serialize(value, section).
+    """
+    return get_prompt_serializer().serialize(value, section)
@@ -0,0 +1,306 @@
+"""
+On-device routing of application questions.
+
+GPTAnswerer used to spend a full LLM round trip to learn which resume or
+profile section a question is about, and another one to decide whether an
+upload field wants the resume or the cover letter. A LabelRouter answers both
+locally: keyword rules first, then nearest-centroid matching of the question
+embedding against a few example questions per label. Only when neither is
+confident does the caller fall back to the LLM. Centroids are computed once per
+embedding model and kept on disk.
+"""
+import hashlib
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import config as cfg
+from src.libs.embeddings import cosine, get_embedding_model, unit_vector
+from src.logging import logger
+from src.utils.constants import (
+    AVAILABILITY,
+    CERTIFICATIONS,
+    COVER_LETTER,
+    EDUCATION_DETAILS,
+    EXPERIENCE_DETAILS,
+    INTERESTS,
+    LANGUAGES,
+    LEGAL_AUTHORIZATION,
+    PERSONAL_INFORMATION,
+    PROJECTS,
+    SALARY_EXPECTATIONS,
+    SELF_IDENTIFICATION,
+    WORK_PREFERENCES,
+)
+
+RESUME_DOCUMENT = "resume"
+COVER_DOCUMENT = "cover"
+
+SECTION_RULES = {
+    PERSONAL_INFORMATION: [
+        r"\b(?:first|last|full|sur)\s*name\b", r"\be-?mail\b", r"\bphone\b|\bmobile\b", r"\baddress\b",
+        r"\bcity\b|\bzip\b|\bpostal\b", r"\blinkedin\b|\bgithub\b|\bportfolio\b|\bwebsite\b", r"\bdate of birth\b",
+    ],
+    SELF_IDENTIFICATION: [
+        r"\bgender\b", r"\bpronouns?\b", r"\bveteran\b", r"\bdisabilit", r"\bethnic|\brace\b|\bhispanic\b|\blatino\b",
+    ],
+    LEGAL_AUTHORIZATION: [
+        r"\bauthori[sz](?:ed|ation)\b.*\bwork\b|\bwork\b.*\bauthori[sz]", r"\bvisa\b", r"\bsponsor",
+        r"\bwork permit\b|\bright to work\b|\blegally\b", r"\bcitizen",
+    ],
+    WORK_PREFERENCES: [
+        r"\bremote\b|\bhybrid\b|\bon-?site\b|\bin[- ]person\b", r"\brelocat", r"\bcommut",
+        r"\bdrug (?:test|screen)", r"\bbackground check", r"\bassessments?\b",
+    ],
+    EDUCATION_DETAILS: [
+        r"\bdegree\b|\bbachelor|\bmaster'?s?\b|\bph\.?d\b|\bdiploma\b", r"\buniversity\b|\bcollege\b|\bschool\b",
+        r"\bgpa\b|\bgrade\b", r"\bgraduat", r"\beducation",
+    ],
+    EXPERIENCE_DETAILS: [
+        r"\byears?\b.*\bexperience\b|\bexperience\b.*\byears?\b", r"\bexperience (?:with|in|using)\b",
+        r"\bhow (?:many years|long)\b.*\b(?:used|using|worked|working|programm|develop)",
+        r"\bworked (?:with|on|as)\b|\bcurrent (?:employer|company|job|title)\b", r"\bmanag(?:ed|ing) (?:a )?team",
+    ],
+    PROJECTS: [r"\bprojects?\b", r"\bopen[- ]source\b|\bside project"],
+    AVAILABILITY: [
+        r"\bnotice period\b", r"\bstart date\b|\bwhen can you start\b|\bavailable to start\b", r"\bavailab",
+    ],
+    SALARY_EXPECTATIONS: [
+        r"\bsalary\b", r"\bcompensation\b|\bpay\b|\bwage\b", r"\bexpected (?:ctc|rate)\b|\bhourly rate\b|\bctc\b",
+    ],
+    CERTIFICATIONS: [r"\bcertif", r"\blicen[cs]e[ds]?\b"],
+    LANGUAGES: [
+        r"\blanguages?\b", r"\bfluen|\bnative speaker\b|\bspeak\b",
+        r"\b(?:english|french|german|spanish|italian|portuguese|dutch|mandarin|japanese|hindi)\b",
+    ],
+    INTERESTS: [r"\bhobb", r"\binterests?\b(?! in (?:this|the|our|working))", r"\bfree time\b|\bspare time\b"],
+    COVER_LETTER: [
+        r"\bcover letter\b|\bmotivation(?:al)? letter\b",
+        r"\bwhy (?:do you want|are you interested|should we|would you like)\b", r"\bwhy (?:this|our) (?:company|role)\b",
+        r"\btell us about yourself\b|\bintroduce yourself\b",
+    ],
+}
+
+SECTION_PROTOTYPES = {
+    PERSONAL_INFORMATION: ["What is your full name?", "Email address", "Mobile phone number", "Link to your LinkedIn profile"],
+    SELF_IDENTIFICATION: ["What is your gender?", "Are you a protected veteran?", "Do you have a disability?", "Race or ethnicity"],
+    LEGAL_AUTHORIZATION: [
+        "Are you legally authorized to work in this country?", "Will you now or in the future require visa sponsorship?",
+        "Do you have a valid work permit?",
+    ],
+    WORK_PREFERENCES: [
+        "Are you willing to relocate?", "Are you comfortable working on-site?", "Are you open to remote work?",
+        "Will you consent to a background check?",
+    ],
+    EDUCATION_DETAILS: [
+        "What is your highest level of education?", "Do you have a bachelor's degree?", "Which university did you attend?",
+    ],
+    EXPERIENCE_DETAILS: [
+        "How many years of experience do you have with Python?", "Describe your previous role and responsibilities.",
+        "Have you led a team before?", "What is your current job title?",
+    ],
+    PROJECTS: ["Describe a project you are proud of.", "Share a link to a side project.", "What have you built recently?"],
+    AVAILABILITY: ["What is your notice period?", "When can you start?", "What is your earliest start date?"],
+    SALARY_EXPECTATIONS: ["What are your salary expectations?", "Desired annual compensation", "Expected hourly rate"],
+    CERTIFICATIONS: ["Which certifications do you hold?", "Do you have an AWS certification?", "List your professional licenses."],
+    LANGUAGES: ["Which languages do you speak?", "What is your level of English?", "Are you fluent in German?"],
+    INTERESTS: ["What are your hobbies?", "What do you do in your free time?", "Personal interests"],
+    COVER_LETTER: [
+        "Why do you want to work for us?", "Why are you a good fit for this role?", "Cover letter",
+        "Tell us about yourself.",
+    ],
+}
+
+DOCUMENT_RULES = {
+    RESUME_DOCUMENT: [r"\bresum[eé]\b|\bcv\b|\bcurriculum\b"],
+    COVER_DOCUMENT: [r"\bcover\b|\bmotivation(?:al)? letter\b|\bletter\b"],
+}
+
+DOCUMENT_PROTOTYPES = {
+    RESUME_DOCUMENT: ["Upload your resume", "Attach CV", "Curriculum vitae"],
+    COVER_DOCUMENT: ["Upload your cover letter", "Attach a motivation letter", "Cover letter (optional)"],
+}
+
+
+# Both routers keep their centroids in the same file
+_centroids_file_lock = threading.Lock()
+
+
+class LabelRouter:
+    """
+    Picks a label for a short text with keyword rules and nearest-centroid embedding matching.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rules: Dict[str, Sequence[str]],
+        prototypes: Dict[str, Sequence[str]],
+        embedding_model: str,
+        min_similarity: float,
+        min_margin: float,
+        centroids_path: Optional[Path] = None,
+        embed: Optional[Callable[[str], Sequence[float]]] = None,
+    ):
+        """
+        Args:
+            name (str): Name used in logs and in the centroid file.
+            rules (dict): Label mapped to regular expressions; each match adds one point.
+            prototypes (dict): Label mapped to example texts whose mean embedding is the label centroid.
+            embedding_model (str): The sentence-transformers model used for the centroids.
+            min_similarity (float): Minimum cosine similarity to the best centroid.
+            min_margin (float): Minimum lead of the best centroid over the second best.
+            centroids_path (Path): Optional JSON file the centroids are kept in between runs.
+            embed (callable): Optional text -> vector function replacing the local model.
+        """
+        self.name = name
+        self.rules = {label: [re.compile(pattern, re.IGNORECASE) for pattern in patterns] for label, patterns in rules.items()}
+        self.prototypes = prototypes
+        self.embedding_model = embedding_model
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.centroids_path = Path(centroids_path) if centroids_path else None
+        self.stats = {"rules": 0, "centroids": 0, "fallback": 0}
+        self._embed_fn = embed
+        self._centroids: Optional[Dict[str, List[float]]] = None
+        self._embeddings_available = True
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> List[float]:
+        embed = self._embed_fn or get_embedding_model(self.embedding_model).embed_query
+        return unit_vector(embed(text))
+
+    def _centroid_key(self) -> str:
+        payload = json.dumps([self.embedding_model, self.prototypes], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def _read_centroids_file(self) -> Dict:
+        if self.centroids_path is None or not self.centroids_path.exists():
+            return {}
+        try:
+            with open(self.centroids_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable router centroids at {self.centroids_path}: {e}")
+            return {}
+
+    def centroids(self) -> Dict[str, List[float]]:
+        """
+        The unit-length mean embedding of every label's prototypes, computed once and kept on disk.
+        """
+        with self._lock:
+            if self._centroids is not None:
+                return self._centroids
+            key = self._centroid_key()
+            stored = self._read_centroids_file()
+            if stored.get(self.name, {}).get("key") == key:
+                self._centroids = stored[self.name]["centroids"]
+                return self._centroids
+
+            centroids = {}
+            for label, examples in self.prototypes.items():
+                vectors = [self._embed(example) for example in examples]
+                centroids[label] = unit_vector([sum(values) / len(vectors) for values in zip(*vectors)])
+            self._centroids = centroids
+            if self.centroids_path is not None:
+                with _centroids_file_lock:
+                    stored = self._read_centroids_file()
+                    stored[self.name] = {"key": key, "centroids": centroids}
+                    self.centroids_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.centroids_path, "w", encoding="utf-8") as f:
+                        json.dump(stored, f)
+            logger.debug(f"Computed {len(centroids)} {self.name} router centroids")
+            return centroids
+
+    def route_by_rules(self, text: str) -> Optional[str]:
+        """
+        Return the label with the most keyword matches, or None when no label matches or the best ones tie.
+        """
+        scores = {label: sum(1 for pattern in patterns if pattern.search(text)) for label, patterns in self.rules.items()}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] == 0 or (len(ranked) > 1 and ranked[0][1] == ranked[1][1]):
+            return None
+        return ranked[0][0]
+
+    def route_by_centroids(self, text: str) -> Optional[str]:
+        """
+        Return the label of the nearest centroid, or None when the match is weak or ambiguous.
+        """
+        vector = self._embed(text)
+        ranked = sorted(
+            ((cosine(vector, centroid), label) for label, centroid in self.centroids().items()), reverse=True
+        )
+        best_similarity, best_label = ranked[0]
+        margin = best_similarity - ranked[1][0] if len(ranked) > 1 else best_similarity
+        if best_similarity < self.min_similarity or margin < self.min_margin:
+            logger.debug(
+                f"{self.name} router unsure about '{text}': {best_label} at {best_similarity:.3f}, margin {margin:.3f}"
+            )
+            return None
+        return best_label
+
+    def route(self, text: str) -> Optional[str]:
+        """
+        Route a text locally.
+        Args:
+            text (str): The question or phrase.
+        Returns:
+            str: The label, or None when the caller should ask the LLM.
+        """
+        label = self.route_by_rules(text)
+        if label is not None:
+            self.stats["rules"] += 1
+            logger.debug(f"{self.name} router: '{text}' -> {label} (rules)")
+            return label
+        label = None
+        if self._embeddings_available:
+            try:
+                label = self.route_by_centroids(text)
+            except ImportError as e:
+                self._embeddings_available = False
+                logger.warning(f"Embedding model unavailable for the {self.name} router, ambiguous texts go to the LLM: {e}")
+        if label is None:
+            self.stats["fallback"] += 1
+            return None
+        self.stats["centroids"] += 1
+        logger.debug(f"{self.name} router: '{text}' -> {label} (centroids)")
+        return label
+
+
+_routers: Dict[str, LabelRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def _get_router(name: str, rules: Dict[str, Sequence[str]], prototypes: Dict[str, Sequence[str]]) -> Optional[LabelRouter]:
+    if not cfg.LLM_ROUTER_ENABLED:
+        return None
+    with _routers_lock:
+        router = _routers.get(name)
+        if router is None:
+            router = LabelRouter(
+                name,
+                rules,
+                prototypes,
+                embedding_model=cfg.LLM_ROUTER_EMBEDDING_MODEL,
+                min_similarity=cfg.LLM_ROUTER_MIN_SIMILARITY,
+                min_margin=cfg.LLM_ROUTER_MIN_MARGIN,
+                centroids_path=Path(cfg.LLM_ROUTER_CENTROIDS_PATH),
+            )
+            _routers[name] = router
+        return router
+
+
+def get_section_router() -> Optional[LabelRouter]:
+    """
+    Return the router mapping a question to its resume or profile section, or None when LLM_ROUTER_ENABLED is off.
+    """
+    return _get_router("section", SECTION_RULES, SECTION_PROTOTYPES)
+
+
+def get_document_router() -> Optional[LabelRouter]:
+    """
+    Return the router deciding whether an upload field wants the resume or the cover letter.
+    """
+    return _get_router("document", DOCUMENT_RULES, DOCUMENT_PROTOTYPES)
@@ -0,0 +1,265 @@
+"""
+Offline batch generation of tailored resumes and cover letters for many jobs.
+
+Instead of calling the model prompt by prompt, every extraction, summary,
+resume section and cover letter prompt of a run is collected per stage and sent
+as one batch (see src.libs.llm_batch). Answers are rehydrated into the same HTML
+the interactive path builds and rendered to PDF files. Request ids are content
+addressed, so identical prompts are sent once and a restarted run only submits
+what is still missing.
+"""
+# app/libs/resume_and_cover_builder/batch_generator.py
+import base64
+import hashlib
+import json
+from pathlib import Path
+from string import Template
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from loguru import logger
+
+import config as cfg
+from src.libs.job_summary_cache import get_job_summary_cache
+from src.libs.llm_batch import BatchBackend, BatchCheckpoint, BatchRunner, batch_line
+from src.libs.llm_cache import model_identity
+from src.libs.prompt_serializer import serialize_for_prompt
+from src.libs.resume_and_cover_builder.llm.llm_generate_cover_letter_from_job import LLMCoverLetterJobDescription
+from src.libs.resume_and_cover_builder.llm.llm_generate_resume_from_job import LLMResumeJobDescription
+from src.libs.resume_and_cover_builder.llm.llm_job_parser import LLMParser
+from src.libs.resume_and_cover_builder.utils import LoggerChatModel
+from src.utils.chrome_utils import HTML_to_PDF
+from .config import global_config
+from .module_loader import load_module
+
+# Job fields extracted from a fetched page, with the question and retrieval query used by LLMParser
+EXTRACTION_FIELDS = LLMParser.EXTRACTION_FIELDS
+
+
+def render_prompt_text(template: str, input_data: Dict[str, Any]) -> str:
+    """
+    Render a prompt template into the text of the user message the interactive chains send.
+    """
+    return ChatPromptTemplate.from_template(template).format_messages(**input_data)[0].content
+
+
+def job_key(link: str) -> str:
+    """
+    The per-job output folder name, the same one ResumeFacade suggests for a job URL.
+    """
+    return hashlib.md5(link.encode()).hexdigest()[:10]
+
+
+class BatchApplicationGenerator:
+    def __init__(
+        self,
+        resume_object: Any,
+        style_css: str,
+        output_dir: Path,
+        backend: BatchBackend,
+        driver: Any,
+        fetch_body_html: Optional[Callable[[str], str]] = None,
+    ):
+        """
+        Args:
+            resume_object (Resume): The resume to tailor.
+            style_css (str): The CSS of the selected style.
+            output_dir (Path): Folder receiving one sub-folder of PDFs per job.
+            backend (BatchBackend): Where batches are submitted.
+            driver (WebDriver): Browser used to render the PDFs.
+            fetch_body_html (callable): Returns the page HTML of a job URL; needed for jobs without a description.
+        """
+        self.resume_object = resume_object
+        self.style_css = style_css
+        self.output_dir = Path(output_dir)
+        self.driver = driver
+        self.fetch_body_html = fetch_body_html
+        work_dir = self.output_dir / "batch"
+        self.checkpoint = BatchCheckpoint(work_dir / "checkpoint.json")
+        self.runner = BatchRunner(backend, self.checkpoint, work_dir, cfg.LLM_BATCH_POLL_SECONDS)
+
+        # The interactive generators build the prompts, so batch and interactive output match
+        resume_strings = load_module(global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
+        self.resumer = LLMResumeJobDescription(global_config.API_KEY, resume_strings)
+        self.resumer.set_resume(resume_object)
+        cover_strings = load_module(global_config.STRINGS_MODULE_COVER_LETTER_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
+        self.cover_letter_writer = LLMCoverLetterJobDescription(global_config.API_KEY, cover_strings)
+        self.cover_letter_writer.set_resume(resume_object)
+        self.lines: Dict[str, Dict] = {}
+
+    def _request(self, stage: str, llm: LoggerChatModel, prompt: str) -> str:
+        """
+        Queue a prompt for the stage's batch and return its content-addressed custom_id.
+        """
+        model_name, temperature = model_identity(llm.llm)
+        digest = hashlib.sha256(json.dumps([model_name, temperature, prompt]).encode("utf-8")).hexdigest()[:32]
+        custom_id = f"{stage}-{digest}"
+        self.lines[custom_id] = batch_line(custom_id, prompt, model_name, temperature)
+        return custom_id
+
+    def _run_stage(self, stage: str) -> Dict[str, str]:
+        lines = [line for custom_id, line in self.lines.items() if custom_id.startswith(f"{stage}-")]
+        return self.runner.run(stage, lines) if lines else {}
+
+    def _extract_jobs(self, jobs: List[Dict[str, str]]) -> None:
+        """
+        Stage 1: extract description, company, role and location of jobs given only by URL.
+        """
+        items = self.checkpoint.data["items"]
+        pending = {}
+        for job in jobs:
+            key = job_key(job["link"])
+            if job.get("description") or key in items or self.checkpoint.is_done(key):
+                continue
+            if self.fetch_body_html is None:
+                raise ValueError(f"Job {job['link']} has no description and no way to fetch its page")
+            parser = LLMParser(openai_api_key=global_config.API_KEY)
+            parser.set_body_html(self.fetch_body_html(job["link"]))
+            # Fields found in the page's structured data need no request
+            found = {field: parser.structured_fields[field] for field in EXTRACTION_FIELDS if field in parser.structured_fields}
+            pending[key] = (found, {
+                field: self._request("extract", parser.llm, parser.build_extraction_prompt(question, query))
+                for field, (question, query) in EXTRACTION_FIELDS.items()
+                if field not in found
+            })
+
+        answers = self._run_stage("extract")
+        for key, (found, fields) in pending.items():
+            if all(custom_id in answers for custom_id in fields.values()):
+                items[key] = {
+                    **found,
+                    **{
+                        field: LoggerChatModel.sanitize_llm_output(answers[custom_id])
+                        for field, custom_id in fields.items()
+                    },
+                }
+        self.checkpoint.save()
+
+    def _summarize_jobs(self, jobs: List[Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+        """
+        Stage 2: summarize every job description for the resume and the cover letter prompts.
+        """
+        summary_cache = get_job_summary_cache()
+        summaries: Dict[str, Dict[str, str]] = {}
+        requests = {}
+        for job in jobs:
+            key = job["key"]
+            summaries[key] = {}
+            requests[key] = {}
+            for purpose, writer in (("resume", self.resumer), ("cover_letter", self.cover_letter_writer)):
+                model_name, _ = model_identity(writer.llm_cheap.llm)
+                template = writer.strings.summarize_prompt_template
+                stored = None
+                if summary_cache is not None:
+                    stored = summary_cache.get(job["description"], model_name, template)
+                if stored is not None:
+                    summaries[key][purpose] = LoggerChatModel.sanitize_llm_output(stored)
+                    continue
+                input_data = writer.llm_cheap.fit_inputs(
+                    writer.model_task, template, {"text": job["description"]}, writer.trim_priorities
+                )
+                requests[key][purpose] = self._request("summarize", writer.llm_cheap, render_prompt_text(template, input_data))
+
+        answers = self._run_stage("summarize")
+        for job in jobs:
+            key = job["key"]
+            for purpose, custom_id in requests[key].items():
+                if custom_id not in answers:
+                    continue
+                if summary_cache is not None:
+                    writer = self.resumer if purpose == "resume" else self.cover_letter_writer
+                    summary_cache.put(
+                        job["description"],
+                        model_identity(writer.llm_cheap.llm)[0],
+                        writer.strings.summarize_prompt_template,
+                        answers[custom_id],
+                    )
+                summaries[key][purpose] = LoggerChatModel.sanitize_llm_output(answers[custom_id])
+        return {key: summary for key, summary in summaries.items() if len(summary) == 2}
+
+    def _generate_documents(self, summaries: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Stage 3: generate every resume section and cover letter.
+        """
+        requests = {}
+        for key, summary in summaries.items():
+            self.resumer.job_description = summary["resume"]
+            sections = {}
+            for section, (template, input_data) in self.resumer._section_requests().items():
+                template = self.resumer._preprocess_template_string(template)
+                input_data = self.resumer.llm_cheap.fit_inputs(
+                    self.resumer.model_task, template, input_data, self.resumer.trim_priorities
+                )
+                sections[section] = self._request("generate", self.resumer.llm_cheap, render_prompt_text(template, input_data))
+
+            writer = self.cover_letter_writer
+            template = writer._preprocess_template_string(writer.strings.cover_letter_template)
+            input_data = writer.llm_cheap.fit_inputs(
+                writer.model_task,
+                template,
+                {"job_description": summary["cover_letter"], "resume": serialize_for_prompt(self.resume_object, "resume")},
+                writer.trim_priorities,
+            )
+            cover_letter = self._request("generate", writer.llm_cheap, render_prompt_text(template, input_data))
+            requests[key] = {"sections": sections, "cover_letter": cover_letter}
+
+        answers = self._run_stage("generate")
+        documents = {}
+        for key, ids in requests.items():
+            if ids["cover_letter"] not in answers or not all(custom_id in answers for custom_id in ids["sections"].values()):
+                logger.warning(f"Job {key} is incomplete after the generation batch and will be retried on the next run")
+                continue
+            documents[key] = {
+                "sections": {
+                    section: LoggerChatModel.sanitize_llm_output(answers[custom_id])
+                    for section, custom_id in ids["sections"].items()
+                },
+                "cover_letter": LoggerChatModel.sanitize_llm_output(answers[ids["cover_letter"]]),
+            }
+        return documents
+
+    def _render_pdf(self, body_html: str, path: Path) -> None:
+        html = Template(global_config.html_template).substitute(body=body_html, style_css=self.style_css)
+        pdf_data = base64.b64decode(HTML_to_PDF(html, self.driver))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(pdf_data)
+        logger.info(f"Saved {path}")
+
+    def run(self, jobs: List[Dict[str, str]]) -> List[Path]:
+        """
+        Generate a tailored resume and cover letter PDF for every job.
+        Args:
+            jobs (list): Jobs as dicts with a "link" and optionally a "description"; jobs without a
+                description have their page fetched and parsed in an extraction batch first.
+        Returns:
+            list: The output folders of the jobs finished by this call.
+        """
+        self._extract_jobs(jobs)
+        items = self.checkpoint.data["items"]
+        pending_jobs = []
+        for job in jobs:
+            key = job_key(job["link"])
+            if self.checkpoint.is_done(key):
+                logger.info(f"Skipping {job['link']}, already generated by a previous run")
+                continue
+            description = job.get("description") or items.get(key, {}).get("description")
+            if not description:
+                logger.warning(f"No job description available for {job['link']}, skipping it")
+                continue
+            pending_jobs.append({"key": key, "link": job["link"], "description": description})
+        if not pending_jobs:
+            return []
+
+        summaries = self._summarize_jobs(pending_jobs)
+        documents = self._generate_documents(summaries)
+
+        finished = []
+        for key, document in documents.items():
+            job_dir = self.output_dir / key
+            self._render_pdf(self.resumer._assemble_html(document["sections"]), job_dir / "resume_tailored.pdf")
+            self._render_pdf(document["cover_letter"], job_dir / "cover_letter_tailored.pdf")
+            self.checkpoint.mark_done(key)
+            finished.append(job_dir)
+        logger.info(f"Batch run finished {len(finished)} of {len(pending_jobs)} pending jobs")
+        return finished
@@ -10,17 +10,18 @@ Please write the cover letter in a way that directly addresses the job role and
 
 ## Rules:
 - Do not include any introductions, explanations, or additional information.
+""" + prompt_cover_letter_template + """
 
 ## Details :
-- **Job Description:**
-```
-{job_description}
-```
 - **My resume:**
 ```
 {resume}
 ```
-"""+ prompt_cover_letter_template
+- **Job Description:**
+```
+{job_description}
+```
+"""
 
 
 summarize_prompt_template = """
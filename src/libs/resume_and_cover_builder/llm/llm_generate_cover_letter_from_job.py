@@ -4,17 +4,21 @@ This creates the cover letter (in html, utils will then convert in PDF) matching
 # app/libs/resume_and_cover_builder/llm_generate_cover_letter_from_job.py
 import os
 import textwrap
-from ..utils import LoggerChatModel
+import time
+from typing import Callable, Optional
+from ..utils import LoggerChatModel, StreamEvent
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
-from langchain_huggingface import HuggingFaceEmbeddings  # Switched from OpenAI to HuggingFace embeddings for cost efficiency
 from pathlib import Path
 from dotenv import load_dotenv
 from requests.exceptions import HTTPError as HTTPStatusError
 from pathlib import Path
 from loguru import logger
-import config as cfg  # Import configuration for LLM settings
+from src.libs.job_summary_cache import asummarize_once, summarize_once
+from src.libs.llm_cache import model_identity
+from src.libs.llm_models import get_model_registry
+from src.libs.prompt_serializer import serialize_for_prompt
+from src.utils.constants import TASK_COVER_LETTER
 
 # Load environment variables from .env file
 load_dotenv()
@@ -27,21 +31,16 @@ log_path = Path(log_folder).resolve()
 logger.add(log_path / "gpt_cover_letter_job_descr.log", rotation="1 day", compression="zip", retention="7 days", level="DEBUG")
 
 class LLMCoverLetterJobDescription:
+    # Task name used to pick the model and token budget
+    model_task = TASK_COVER_LETTER
+    # The job description summary is trimmed before the resume when a prompt exceeds its token budget
+    trim_priorities = {"text": 0, "job_description": 0, "resume": 1}
+
     def __init__(self, openai_api_key, strings):
-        # Configure LLM with settings from config file instead of hardcoded values
-        # This allows for flexibility in using different LLM providers
-        base_url = cfg.LLM_API_URL if cfg.LLM_API_URL and len(cfg.LLM_API_URL) > 0 else None
-        
+        # Cover letters can be routed to their own backend through LLM_TASK_MODELS
         self.llm_cheap = LoggerChatModel(
-            ChatOpenAI(
-                model_name=cfg.LLM_MODEL,  # Use model from config
-                openai_api_key=openai_api_key, 
-                temperature=0.4,
-                base_url=base_url  # Use custom API URL if provided in config
-            )
+            get_model_registry().for_task(self.model_task, openai_api_key).chat_model
         )
-        # Use HuggingFace embeddings instead of OpenAI for cost efficiency
-        self.llm_embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
         self.strings = strings
 
     @staticmethod
@@ -55,6 +54,12 @@ class LLMCoverLetterJobDescription:
         """
         return textwrap.dedent(template)
 
+    def _budget_step(self, template: str):
+        """
+        Chain step trimming the prompt inputs to the cover letter token budget.
+        """
+        return self.llm_cheap.budget_step(self.model_task, template, self.trim_priorities)
+
     def set_resume(self, resume) -> None:
         """
         Set the resume text to be used for generating the cover letter.
@@ -70,10 +75,29 @@ class LLMCoverLetterJobDescription:
             job_description_text (str): The plain text job description to be used.
         """
         logger.debug("Starting job description summarization...")
-        prompt = ChatPromptTemplate.from_template(self.strings.summarize_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        output = chain.invoke({"text": job_description_text})
-        self.job_description = output
+        template = self.strings.summarize_prompt_template
+        prompt = ChatPromptTemplate.from_template(template)
+        chain = self._budget_step(template) | prompt | self.llm_cheap | StrOutputParser()
+        model_name, _ = model_identity(self.llm_cheap.llm)
+        self.job_description = summarize_once(
+            job_description_text, model_name, template, lambda description: chain.invoke({"text": description})
+        )
+        logger.debug(f"Job description summarization complete: {self.job_description}")
+
+    async def aset_job_description_from_text(self, job_description_text) -> None:
+        """
+        Async counterpart of set_job_description_from_text.
+        Args:
+            job_description_text (str): The plain text job description to be used.
+        """
+        logger.debug("Starting job description summarization...")
+        template = self.strings.summarize_prompt_template
+        prompt = ChatPromptTemplate.from_template(template)
+        chain = self._budget_step(template) | prompt | self.llm_cheap.as_runnable() | StrOutputParser()
+        model_name, _ = model_identity(self.llm_cheap.llm)
+        self.job_description = await asummarize_once(
+            job_description_text, model_name, template, lambda description: chain.ainvoke({"text": description})
+        )
         logger.debug(f"Job description summarization complete: {self.job_description}")
 
     def generate_cover_letter(self) -> str:
@@ -89,12 +113,12 @@ class LLMCoverLetterJobDescription:
         prompt = ChatPromptTemplate.from_template(prompt_template)
         logger.debug(f"Prompt created: {prompt}")
 
-        chain = prompt | self.llm_cheap | StrOutputParser()
+        chain = self._budget_step(prompt_template) | prompt | self.llm_cheap | StrOutputParser()
         logger.debug(f"Chain created: {chain}")
 
         input_data = {
             "job_description": self.job_description,
-            "resume": self.resume
+            "resume": serialize_for_prompt(self.resume, "resume")
         }
         logger.debug(f"Input data: {input_data}")
 
@@ -102,4 +126,34 @@ class LLMCoverLetterJobDescription:
         logger.debug(f"Cover letter generation result: {output}")
 
         logger.debug("Cover letter generation completed")
-        return output
\ No newline at end of file
+        return output
+
+    async def agenerate_cover_letter(self, on_event: Optional[Callable[[StreamEvent], None]] = None) -> str:
+        """
+        Async counterpart of generate_cover_letter.
+        Args:
+            on_event (callable): Optional progress callback; when given, the letter is streamed and every
+                StreamEvent is passed to it as tokens arrive.
+        Returns:
+            str: The generated cover letter
+        """
+        logger.debug("Starting cover letter generation...")
+        prompt_template = self._preprocess_template_string(self.strings.cover_letter_template)
+        prompt = ChatPromptTemplate.from_template(prompt_template)
+        input_data = self.llm_cheap.fit_inputs(self.model_task, prompt_template, {
+            "job_description": self.job_description,
+            "resume": serialize_for_prompt(self.resume, "resume")
+        }, self.trim_priorities)
+        if on_event is not None:
+            started_at = time.monotonic()
+            parts = []
+            async for delta in self.llm_cheap.astream(await prompt.ainvoke(input_data)):
+                parts.append(delta)
+                on_event(StreamEvent("cover_letter", delta=delta, elapsed=time.monotonic() - started_at))
+            output = "".join(parts)
+            on_event(StreamEvent("cover_letter", text=output, done=True, elapsed=time.monotonic() - started_at))
+        else:
+            chain = prompt | self.llm_cheap.as_runnable() | StrOutputParser()
+            output = await chain.ainvoke(input_data)
+        logger.debug("Cover letter generation completed")
+        return output
@@ -2,17 +2,20 @@
 Create a class that generates a resume based on a resume and a resume template.
 """
 # app/libs/resume_and_cover_builder/gpt_resume.py
+import asyncio
 import os
 import textwrap
-from src.libs.resume_and_cover_builder.utils import LoggerChatModel
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from src.libs.resume_and_cover_builder.utils import LoggerChatModel, StreamEvent, run_sync
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
 from pathlib import Path
-import config as cfg  # Import configuration for LLM settings
+from src.libs.llm_models import get_model_registry
+from src.libs.prompt_serializer import serialize_for_prompt
+from src.utils.constants import TASK_RESUME
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,18 +28,46 @@ log_path = Path(log_folder).resolve()
 logger.add(log_path / "gpt_resume.log", rotation="1 day", compression="zip", retention="7 days", level="DEBUG")
 
 class LLMResumer:
+    # Task name used to pick the model from LLM_TASK_MODELS
+    model_task = TASK_RESUME
+    # Order in which prompt inputs are trimmed when a prompt exceeds its token budget (lowest first);
+    # inputs not listed here, like the personal information, are never trimmed
+    trim_priorities = {
+        "text": 0,
+        "job_description": 0,
+        "interests": 1,
+        "languages": 1,
+        "skills": 1,
+        "achievements": 2,
+        "certifications": 2,
+        "projects": 2,
+        "experience_details": 3,
+        "education_details": 3,
+    }
+    # Resume sections in document order, with the name of their prompt template in the strings module
+    SECTION_PROMPTS = {
+        "header": "prompt_header",
+        "education": "prompt_education",
+        "work_experience": "prompt_working_experience",
+        "projects": "prompt_projects",
+        "achievements": "prompt_achievements",
+        "certifications": "prompt_certifications",
+        "additional_skills": "prompt_additional_skills",
+    }
+    # The Resume attribute each section is generated from
+    SECTION_SOURCES = {
+        "header": "personal_information",
+        "education": "education_details",
+        "work_experience": "experience_details",
+        "projects": "projects",
+        "achievements": "achievements",
+        "certifications": "certifications",
+    }
+
     def __init__(self, openai_api_key, strings):
-        # Configure LLM with settings from config file instead of hardcoded values
-        # This allows for flexibility in using different LLM providers
-        base_url = cfg.LLM_API_URL if cfg.LLM_API_URL and len(cfg.LLM_API_URL) > 0 else None
-        
+        # Shared, cached model for this task (any provider configured in LLM_TASK_MODELS)
         self.llm_cheap = LoggerChatModel(
-            ChatOpenAI(
-                model_name=cfg.LLM_MODEL,  # Use model from config
-                openai_api_key=openai_api_key, 
-                temperature=0.4,
-                base_url=base_url  # Use custom API URL if provided in config
-            )
+            get_model_registry().for_task(self.model_task, openai_api_key).chat_model
         )
         self.strings = strings
 
@@ -59,176 +90,109 @@ class LLMResumer:
         """
         self.resume = resume
 
+    def _serialized(self, section: str) -> str:
+        """
+        Render a resume section as compact YAML for a prompt, without empty fields or model reprs.
+        Args:
+            section (str): The Resume attribute, e.g. 'experience_details'.
+        Returns:
+            str: The serialized section.
+        """
+        return serialize_for_prompt(getattr(self.resume, section), section)
+
     def generate_header(self, data = None) -> str:
         """
         Generate the header section of the resume.
         Args:
-            data (dict): The personal information to use for generating the header.
+            data (dict): The prompt inputs; defaults to the resume's personal information.
         Returns:
             str: The generated header section.
         """
-        header_prompt_template = self._preprocess_template_string(
-            self.strings.prompt_header
-        )
-        prompt = ChatPromptTemplate.from_template(header_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        input_data = {
-            "personal_information": self.resume.personal_information
-        } if data is None else data
-        output = chain.invoke(input_data)
-        return output
-    
+        return self.generate_section("header", data)
+
     def generate_education_section(self, data = None) -> str:
         """
         Generate the education section of the resume.
         Args:
-            data (dict): The education details to use for generating the education section.
+            data (dict): The prompt inputs; defaults to the resume's education details.
         Returns:
             str: The generated education section.
         """
-        logger.debug("Starting education section generation")
-
-        education_prompt_template = self._preprocess_template_string(self.strings.prompt_education)
-        logger.debug(f"Education template: {education_prompt_template}")
-
-        prompt = ChatPromptTemplate.from_template(education_prompt_template)
-        logger.debug(f"Prompt: {prompt}")
-        
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        logger.debug(f"Chain created: {chain}")
-        
-        input_data = {
-            "education_details": self.resume.education_details
-        } if data is None else data
-        output = chain.invoke(input_data)
-        logger.debug(f"Chain invocation result: {output}")
-
-        logger.debug("Education section generation completed")
-        return output
+        return self.generate_section("education", data)
 
     def generate_work_experience_section(self, data = None) -> str:
         """
         Generate the work experience section of the resume.
         Args:
-            data (dict): The work experience details to use for generating the work experience section.
+            data (dict): The prompt inputs; defaults to the resume's experience details.
         Returns:
             str: The generated work experience section.
         """
-        logger.debug("Starting work experience section generation")
-
-        work_experience_prompt_template = self._preprocess_template_string(self.strings.prompt_working_experience)
-        logger.debug(f"Work experience template: {work_experience_prompt_template}")
-
-        prompt = ChatPromptTemplate.from_template(work_experience_prompt_template)
-        logger.debug(f"Prompt: {prompt}")
-        
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        logger.debug(f"Chain created: {chain}")
-        
-        input_data = {
-            "experience_details": self.resume.experience_details
-        } if data is None else data
-        output = chain.invoke(input_data)
-        logger.debug(f"Chain invocation result: {output}")
-
-        logger.debug("Work experience section generation completed")
-        return output
+        return self.generate_section("work_experience", data)
 
     def generate_projects_section(self, data = None) -> str:
         """
         Generate the side projects section of the resume.
         Args:
-            data (dict): The side projects to use for generating the side projects section.
+            data (dict): The prompt inputs; defaults to the resume's projects.
         Returns:
             str: The generated side projects section.
         """
-        logger.debug("Starting side projects section generation")
-
-        projects_prompt_template = self._preprocess_template_string(self.strings.prompt_projects)
-        logger.debug(f"Side projects template: {projects_prompt_template}")
-
-        prompt = ChatPromptTemplate.from_template(projects_prompt_template)
-        logger.debug(f"Prompt: {prompt}")
-        
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        logger.debug(f"Chain created: {chain}")
-        
-        input_data = {
-            "projects": self.resume.projects
-        } if data is None else data
-        output = chain.invoke(input_data)
-        logger.debug(f"Chain invocation result: {output}")
-
-        logger.debug("Side projects section generation completed")
-        return output
+        return self.generate_section("projects", data)
 
     def generate_achievements_section(self, data = None) -> str:
         """
         Generate the achievements section of the resume.
         Args:
-            data (dict): The achievements to use for generating the achievements section.
+            data (dict): The prompt inputs; defaults to the resume's achievements and certifications.
         Returns:
             str: The generated achievements section.
         """
-        logger.debug("Starting achievements section generation")
-
-        achievements_prompt_template = self._preprocess_template_string(self.strings.prompt_achievements)
-        logger.debug(f"Achievements template: {achievements_prompt_template}")
-
-        prompt = ChatPromptTemplate.from_template(achievements_prompt_template)
-        logger.debug(f"Prompt: {prompt}")
-
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        logger.debug(f"Chain created: {chain}")
-
-        input_data = {
-            "achievements": self.resume.achievements,
-            "certifications": self.resume.certifications,
-        } if data is None else data
-        logger.debug(f"Input data for the chain: {input_data}")
-
-        output = chain.invoke(input_data)
-        logger.debug(f"Chain invocation result: {output}")
-
-        logger.debug("Achievements section generation completed")
-        return output
+        return self.generate_section("achievements", data)
 
     def generate_certifications_section(self, data = None) -> str:
         """
         Generate the certifications section of the resume.
+        Args:
+            data (dict): The prompt inputs; defaults to the resume's certifications.
         Returns:
             str: The generated certifications section.
         """
-        logger.debug("Starting Certifications section generation")
+        return self.generate_section("certifications", data)
 
-        certifications_prompt_template = self._preprocess_template_string(self.strings.prompt_certifications)
-        logger.debug(f"Certifications template: {certifications_prompt_template}")
-
-        prompt = ChatPromptTemplate.from_template(certifications_prompt_template)
-        logger.debug(f"Prompt: {prompt}")
+    def generate_additional_skills_section(self, data = None) -> str:
+        """
+        Generate the additional skills section of the resume.
+        Args:
+            data (dict): The prompt inputs; defaults to the resume's languages, interests and skills.
+        Returns:
+            str: The generated additional skills section.
+        """
+        return self.generate_section("additional_skills", data)
 
+    def generate_section(self, section: str, data: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate one section synchronously, through the same prompt preparation as the concurrent path.
+        Args:
+            section (str): The section name, a key of SECTION_PROMPTS.
+            data (dict): The prompt inputs; defaults to the section's inputs from the resume.
+        Returns:
+            str: The generated section.
+        """
+        logger.debug(f"Starting {section} section generation")
+        input_data = self._section_inputs(section) if data is None else data
+        prompt, input_data = self._prepare_section(getattr(self.strings, self.SECTION_PROMPTS[section]), input_data)
         chain = prompt | self.llm_cheap | StrOutputParser()
-        logger.debug(f"Chain created: {chain}")
-
-        input_data = {
-            "certifications": self.resume.certifications
-        } if data is None else data
-        logger.debug(f"Input data for the chain: {input_data}")
-
         output = chain.invoke(input_data)
-        logger.debug(f"Chain invocation result: {output}")
-
-        logger.debug("Certifications section generation completed")
+        logger.debug(f"{section} section generation completed")
         return output
-    
-    def generate_additional_skills_section(self, data = None) -> str:
+
+    def _collect_skills(self) -> set:
         """
-        Generate the additional skills section of the resume.
+        Collect the skills acquired across work experience and education exams.
         Returns:
-            str: The generated additional skills section.
+            set: The collected skills.
         """
-        additional_skills_prompt_template = self._preprocess_template_string(self.strings.prompt_additional_skills)
-        
         skills = set()
         if self.resume.experience_details:
             for exp in self.resume.experience_details:
@@ -240,82 +204,96 @@ class LLMResumer:
                 if edu.exam:
                     for exam in edu.exam:
                         skills.update(exam.keys())
-        prompt = ChatPromptTemplate.from_template(additional_skills_prompt_template)
-        chain = prompt | self.llm_cheap | StrOutputParser()
-        input_data = {
-            "languages": self.resume.languages,
-            "interests": self.resume.interests,
-            "skills": skills,
-        } if data is None else data
-        output = chain.invoke(input_data)
-        
-        return output
+        return skills
 
-    def generate_html_resume(self) -> str:
+    def _extra_prompt_inputs(self) -> Dict[str, Any]:
         """
-        Generate the full HTML resume based on the resume object.
+        Additional variables shared by every section prompt. Subclasses extend this, e.g. with the job description.
         Returns:
-            str: The generated HTML resume.
+            dict: The extra prompt variables.
         """
-        def header_fn():
-            if self.resume.personal_information:
-                return self.generate_header()
-            return ""
-
-        def education_fn():
-            if self.resume.education_details:
-                return self.generate_education_section()
-            return ""
-
-        def work_experience_fn():
-            if self.resume.experience_details:
-                return self.generate_work_experience_section()
-            return ""
+        return {}
 
-        def projects_fn():
-            if self.resume.projects:
-                return self.generate_projects_section()
-            return ""
+    def _has_content(self, section: str) -> bool:
+        """
+        Whether the resume has anything to generate a section from.
+        """
+        resume = self.resume
+        if section == "additional_skills":
+            return bool(resume.experience_details or resume.education_details or resume.languages or resume.interests)
+        return bool(getattr(resume, self.SECTION_SOURCES[section]))
 
-        def achievements_fn():
-            if self.resume.achievements:
-                return self.generate_achievements_section()
-            return ""
-        
-        def certifications_fn():
-            if self.resume.certifications:
-                return self.generate_certifications_section()
-            return ""
+    def _section_inputs(self, section: str) -> Dict[str, Any]:
+        """
+        The prompt inputs of one section, including the variables shared by every section prompt.
+        Args:
+            section (str): The section name, a key of SECTION_PROMPTS.
+        Returns:
+            dict: The prompt variables.
+        """
+        if section == "additional_skills":
+            data = {
+                "languages": self._serialized("languages"),
+                "interests": self._serialized("interests"),
+                "skills": serialize_for_prompt(self._collect_skills(), "skills"),
+            }
+        elif section == "achievements":
+            data = {
+                "achievements": self._serialized("achievements"),
+                "certifications": self._serialized("certifications"),
+            }
+        else:
+            source = self.SECTION_SOURCES[section]
+            data = {source: self._serialized(source)}
+        return {**data, **self._extra_prompt_inputs()}
+
+    def _section_requests(self) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """
+        Build the prompt template and input data of every section the resume has content for.
+        Returns:
+            dict: Section name mapped to its (template, input data) pair.
+        """
+        return {
+            section: (getattr(self.strings, prompt_name), self._section_inputs(section))
+            for section, prompt_name in self.SECTION_PROMPTS.items()
+            if self._has_content(section)
+        }
 
-        def additional_skills_fn():
-            if (self.resume.experience_details or self.resume.education_details or
-                self.resume.languages or self.resume.interests):
-                return self.generate_additional_skills_section()
-            return ""
+    def _prepare_section(self, template: str, input_data: Dict[str, Any]) -> Tuple[ChatPromptTemplate, Dict[str, Any]]:
+        """
+        Build the prompt of a section and fit its inputs into the task's token budget.
+        Args:
+            template (str): The section prompt template.
+            input_data (dict): The variables to render the prompt with.
+        Returns:
+            tuple: The prompt template and the fitted inputs.
+        """
+        template = self._preprocess_template_string(template)
+        input_data = self.llm_cheap.fit_inputs(self.model_task, template, input_data, self.trim_priorities)
+        return ChatPromptTemplate.from_template(template), input_data
 
-        # Create a dictionary to map the function names to their respective callables
-        functions = {
-            "header": header_fn,
-            "education": education_fn,
-            "work_experience": work_experience_fn,
-            "projects": projects_fn,
-            "achievements": achievements_fn,
-            "certifications": certifications_fn,
-            "additional_skills": additional_skills_fn,
-        }
+    async def _agenerate_section(self, template: str, input_data: Dict[str, Any]) -> str:
+        """
+        Generate one section on the event loop, awaiting the model instead of blocking a thread.
+        Args:
+            template (str): The section prompt template.
+            input_data (dict): The variables to render the prompt with.
+        Returns:
+            str: The generated section.
+        """
+        prompt, input_data = self._prepare_section(template, input_data)
+        chain = prompt | self.llm_cheap.as_runnable() | StrOutputParser()
+        return await chain.ainvoke(input_data)
 
-        # Use ThreadPoolExecutor to run the functions in parallel
-        with ThreadPoolExecutor() as executor:
-            future_to_section = {executor.submit(fn): section for section, fn in functions.items()}
-            results = {}
-            for future in as_completed(future_to_section):
-                section = future_to_section[future]
-                try:
-                    result = future.result()
-                    if result:
-                        results[section] = result
-                except Exception as exc:
-                    logger.error(f'{section} raised an exception: {exc}')
+    @staticmethod
+    def _assemble_html(results: Dict[str, str]) -> str:
+        """
+        Assemble the generated sections into the resume body.
+        Args:
+            results (dict): Section name mapped to its generated HTML.
+        Returns:
+            str: The HTML resume body.
+        """
         full_resume = "<body>\n"
         full_resume += f"  {results.get('header', '')}\n"
         full_resume += "  <main>\n"
@@ -327,4 +305,82 @@ class LLMResumer:
         full_resume += f"    {results.get('additional_skills', '')}\n"
         full_resume += "  </main>\n"
         full_resume += "</body>"
-        return full_resume
\ No newline at end of file
+        return full_resume
+
+    async def _astream_section(self, section: str, template: str, input_data: Dict[str, Any], queue: asyncio.Queue, started_at: float) -> None:
+        """
+        Stream one section into the shared event queue, finishing with a done event carrying the full text.
+        """
+        parts = []
+        try:
+            prompt, input_data = self._prepare_section(template, input_data)
+            prompt_value = await prompt.ainvoke(input_data)
+            async for delta in self.llm_cheap.astream(prompt_value):
+                parts.append(delta)
+                await queue.put(StreamEvent(section, delta=delta, elapsed=time.monotonic() - started_at))
+        except Exception as exc:
+            logger.error(f'{section} raised an exception: {exc}')
+            parts = []
+        await queue.put(StreamEvent(section, text="".join(parts), done=True, elapsed=time.monotonic() - started_at))
+
+    async def astream_html_resume(self) -> AsyncIterator[StreamEvent]:
+        """
+        Generate every section concurrently and yield their text as it streams in.
+        Yields:
+            StreamEvent: A delta of one section, or its completion with the full section text.
+        """
+        requests = self._section_requests()
+        queue = asyncio.Queue()
+        started_at = time.monotonic()
+        tasks = [
+            asyncio.create_task(self._astream_section(section, template, data, queue, started_at))
+            for section, (template, data) in requests.items()
+        ]
+        try:
+            pending = len(tasks)
+            while pending:
+                event = await queue.get()
+                if event.done:
+                    pending -= 1
+                yield event
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def agenerate_html_resume(self, on_event: Optional[Callable[[StreamEvent], None]] = None) -> str:
+        """
+        Generate the full HTML resume, running every section concurrently on the current event loop.
+        Args:
+            on_event (callable): Optional progress callback; when given, sections are streamed and every
+                StreamEvent is passed to it as tokens arrive.
+        Returns:
+            str: The generated HTML resume.
+        """
+        if on_event is not None:
+            results = {}
+            async for event in self.astream_html_resume():
+                on_event(event)
+                if event.done and event.text:
+                    results[event.section] = event.text
+            return self._assemble_html(results)
+
+        requests = self._section_requests()
+        outputs = await asyncio.gather(
+            *(self._agenerate_section(template, data) for template, data in requests.values()),
+            return_exceptions=True,
+        )
+        results = {}
+        for section, output in zip(requests, outputs):
+            if isinstance(output, BaseException):
+                logger.error(f'{section} raised an exception: {output}')
+            elif output:
+                results[section] = output
+        return self._assemble_html(results)
+
+    def generate_html_resume(self) -> str:
+        """
+        Generate the full HTML resume based on the resume object.
+        Returns:
+            str: The generated HTML resume.
+        """
+        return run_sync(self.agenerate_html_resume())
@@ -1,3 +1,4 @@
+import json
 import os
 import tempfile
 import textwrap
@@ -6,7 +7,6 @@ import re  # For email validation
 from src.libs.resume_and_cover_builder.utils import LoggerChatModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
@@ -14,13 +14,20 @@ from pathlib import Path
 from langchain_core.prompt_values import StringPromptValue
 from langchain_core.runnables import RunnablePassthrough
 from langchain_text_splitters import TokenTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings  # Switched from OpenAI to HuggingFace embeddings for cost efficiency
 from langchain_community.vectorstores import FAISS
 from lib_resume_builder_AIHawk.config import global_config
 from langchain_community.document_loaders import TextLoader
 from requests.exceptions import HTTPError as HTTPStatusError  # HTTP error handling
 import openai
-import config as cfg  # Import configuration for LLM settings
+from typing import Dict, List, Optional
+import config as cfg
+from src.job import Job
+from src.libs.embedding_cache import get_cached_embeddings
+from src.libs.html_content import extract_main_content, page_body
+from src.libs.llm_models import get_model_registry
+from src.libs.structured_job_data import EXTRACTORS, extract_structured
+from src.libs.llm_token_budget import count_tokens, get_token_planner, template_tokens, truncate_to_tokens
+from src.utils.constants import TASK_JOB_PARSER
 
 # Load environment variables from the .env file
 load_dotenv()
@@ -33,23 +40,70 @@ log_path = Path(log_folder).resolve()
 logger.add(log_path / "gpt_resume.log", rotation="1 day", compression="zip", retention="7 days", level="DEBUG")
 
 
+
 class LLMParser:
-    def __init__(self, openai_api_key):
-        # Configure LLM with settings from config file instead of hardcoded values
-        # This allows for flexibility in using different LLM providers
-        base_url = cfg.LLM_API_URL if cfg.LLM_API_URL and len(cfg.LLM_API_URL) > 0 else None
+    EXTRACTION_TEMPLATE = """
+            You are an expert in extracting specific information from job descriptions. 
+            Carefully read the job description context below and provide a clear and concise answer to the question.
+
+            Context: {context}
+
+            Question: {question}
+            Answer:
+            """
+
+    EXTRACT_ALL_TEMPLATE = """
+            You are an expert in extracting specific information from job descriptions.
+            Carefully read the job posting context below and extract every field of the JSON schema.
+
+            Context: {context}
+
+            Reply with one JSON object that validates against this JSON schema, and nothing else.
+            Use an empty string for a field the context does not mention.
+
+            Schema: {schema}
+            JSON:
+            """
+
+    EXTRACT_MANY_TEMPLATE = """
+            You are an expert in extracting specific information from job descriptions.
+            Below are {count} job postings, each one starting with a line "### Job <id>".
+            Extract every field of every posting.
+
+            {jobs}
+
+            Reply with one JSON object that validates against this JSON schema, and nothing else.
+            It maps every job id to that posting's fields; use an empty string for a field a posting does not mention.
+
+            Schema: {schema}
+            JSON:
+            """
+
+    # Job fields with the question and the retrieval query used to extract each of them
+    EXTRACTION_FIELDS = {
+        "role": ("What is the role or title sought in this job description?", "Job title"),
+        "company": ("What is the company's name?", "Company name"),
+        "description": ("What is the job description of the company?", "Job description"),
+        "location": ("What is the location mentioned in this job description?", "Location"),
+    }
+
+    # Deterministic extractors run over the page before any retrieval or LLM call, in order of trust
+    STRUCTURED_EXTRACTORS = EXTRACTORS
 
+    def __init__(self, openai_api_key):
+        # Extraction is a light task; LLM_TASK_MODELS can point it at a cheaper or local model
         self.llm = LoggerChatModel(
-            ChatOpenAI(
-                model_name=cfg.LLM_MODEL,  # Use model from config
-                openai_api_key=openai_api_key, 
-                temperature=0.4,
-                base_url=base_url  # Use custom API URL if provided in config
-            )
+            get_model_registry().for_task(TASK_JOB_PARSER, openai_api_key).chat_model
         )
-        # Use HuggingFace embeddings instead of OpenAI for cost efficiency
-        self.llm_embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
         self.vectorstore = None  # Will be initialized after document loading
+        self.body_html = None
+        self.structured_fields = {}
+
+    @property
+    def llm_embeddings(self):
+        # Local HuggingFace embeddings shared by the whole process, loaded when a chunk is first embedded;
+        # chunks and queries embedded before come from the on-disk embedding store
+        return get_cached_embeddings(cfg.LLM_EMBEDDING_MODEL)
 
     @staticmethod
     def _preprocess_template_string(template: str) -> str:
@@ -64,14 +118,31 @@ class LLMParser:
     
     def set_body_html(self, body_html):
         """
-        Retrieves the job description from HTML, processes it, and initializes the vectorstore.
+        Reads the structured data of a job page; the vectorstore is only built when a field is missing from it.
         Args:
             body_html (str): The HTML content to process.
         """
+        self.body_html = body_html
+        self.vectorstore = None
+        self.structured_fields = {}
+        if cfg.LLM_STRUCTURED_EXTRACTION:
+            self.structured_fields = extract_structured(
+                body_html, self.STRUCTURED_EXTRACTORS, cfg.LLM_STRUCTURED_MIN_DESCRIPTION_CHARS
+            )
+            logger.debug(f"Fields found in the page's structured data: {list(self.structured_fields)}")
+
+    def _build_vectorstore(self):
+        """
+        Retrieves the job description from the page HTML, processes it, and initializes the vectorstore.
+        """
+        # Only the visible main content of the page is chunked and embedded; without it, the body element,
+        # since the page may be the whole document fetched for its structured data
+        body_html = self.body_html
+        page_text = self.page_text(body_html) if cfg.LLM_MAIN_CONTENT_EXTRACTION else page_body(body_html)
 
-        # Save the HTML content to a temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html", mode="w", encoding="utf-8") as temp_file:
-            temp_file.write(body_html)
+        # Save the page text to a temporary file
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt", mode="w", encoding="utf-8") as temp_file:
+            temp_file.write(page_text)
             temp_file_path = temp_file.name 
         try:
             loader = TextLoader(temp_file_path, encoding="utf-8", autodetect_encoding=True)
@@ -91,30 +162,102 @@ class LLMParser:
         
         # Create the vectorstore using FAISS
         try:
+            start = time.perf_counter()
             self.vectorstore = FAISS.from_documents(documents=all_splits, embedding=self.llm_embeddings)
-            logger.debug("Vectorstore successfully initialized.")
+            logger.debug(f"Vectorstore successfully initialized in {time.perf_counter() - start:.2f}s.")
         except Exception as e:
             logger.error(f"Error during vectorstore creation: {e}")
             raise
 
-    def _retrieve_context(self, query: str, top_k: int = 3) -> str:
+    def _retrieve_documents(self, query: str, top_k: int = 3) -> list:
         """
         Retrieves the most relevant text fragments using the retriever.
         Args:
             query (str): The search query.
             top_k (int): Number of fragments to retrieve.
         Returns:
-            str: Concatenated text fragments.
+            list: The retrieved documents, most relevant first.
         """
         if not self.vectorstore:
-            raise ValueError("Vectorstore not initialized. Run extract_job_description first.")
+            if self.body_html is None:
+                raise ValueError("Vectorstore not initialized. Run set_body_html first.")
+            self._build_vectorstore()
         
         retriever = self.vectorstore.as_retriever()
-        retrieved_docs = retriever.invoke(query)[:top_k]
+        return retriever.invoke(query)[:top_k]
+
+    def _retrieve_context(self, query: str, top_k: int = 3) -> str:
+        """
+        Retrieves the most relevant text fragments using the retriever.
+        Args:
+            query (str): The search query.
+            top_k (int): Number of fragments to retrieve.
+        Returns:
+            str: Concatenated text fragments.
+        """
+        retrieved_docs = self._retrieve_documents(query, top_k)
         context = "\n\n".join(doc.page_content for doc in retrieved_docs)
         logger.debug(f"Context retrieved for query '{query}': {context[:200]}...")  # Log the first 200 characters
         return context
-    
+
+    def _shared_context(self, fields: Optional[List[str]] = None, top_k: int = 3) -> str:
+        """
+        The fragments retrieved for every extraction field, each included once, in retrieval order.
+        Args:
+            fields (list): The fields to retrieve context for; all extraction fields when None.
+            top_k (int): Number of fragments to retrieve per field.
+        Returns:
+            str: Concatenated text fragments.
+        """
+        fields = list(self.EXTRACTION_FIELDS) if fields is None else fields
+        fragments = {}
+        for field in fields:
+            for doc in self._retrieve_documents(self.EXTRACTION_FIELDS[field][1], top_k):
+                fragments.setdefault(doc.page_content, None)
+        logger.debug(f"Shared context of {len(fragments)} fragments retrieved for {len(fields)} fields.")
+        return "\n\n".join(fragments)
+
+    @classmethod
+    def extraction_schema(cls, fields: Optional[List[str]] = None) -> dict:
+        """
+        JSON schema of the extract_all reply: one required string per extraction field.
+        Args:
+            fields (list): The fields to extract; all extraction fields when None.
+        """
+        fields = list(cls.EXTRACTION_FIELDS) if fields is None else fields
+        return {
+            "type": "object",
+            "properties": {
+                field: {"type": "string", "description": cls.EXTRACTION_FIELDS[field][0]}
+                for field in fields
+            },
+            "required": list(fields),
+            "additionalProperties": False,
+        }
+
+    @classmethod
+    def parse_extraction_reply(cls, reply: str) -> dict:
+        """
+        Read the extraction fields out of a JSON reply; fields that are missing or not text are left out.
+        Args:
+            reply (str): The model reply, possibly with text around the JSON object.
+        Returns:
+            dict: The non-empty fields.
+        Raises:
+            ValueError: If the reply holds no JSON object.
+        """
+        start, end = reply.find("{"), reply.rfind("}")
+        if start == -1 or end < start:
+            raise ValueError("No JSON object in the extraction reply.")
+        data = json.loads(reply[start:end + 1])
+        if not isinstance(data, dict):
+            raise ValueError("The extraction reply is not a JSON object.")
+        return {
+            field: data[field].strip()
+            for field in cls.EXTRACTION_FIELDS
+            if isinstance(data.get(field), str) and data[field].strip()
+        }
+
     def _extract_information(self, question: str, retrieval_query: str) -> str:
         """
         Generic method to extract specific information using the retriever and LLM.
@@ -126,17 +269,7 @@ class LLMParser:
         """
         context = self._retrieve_context(retrieval_query)
         
-        prompt = ChatPromptTemplate.from_template(
-            template="""
-            You are an expert in extracting specific information from job descriptions. 
-            Carefully read the job description context below and provide a clear and concise answer to the question.
-
-            Context: {context}
-
-            Question: {question}
-            Answer:
-            """
-        )
+        prompt = ChatPromptTemplate.from_template(template=self.EXTRACTION_TEMPLATE)
         
         formatted_prompt = prompt.format(context=context, question=question)
         logger.debug(f"Formatted prompt for extraction: {formatted_prompt[:200]}...")  # Log the first 200 characters
@@ -151,6 +284,210 @@ class LLMParser:
             logger.error(f"Error during information extraction: {e}")
             return ""
     
+    def build_extraction_prompt(self, question: str, retrieval_query: str) -> str:
+        """
+        Render the extraction prompt _extract_information would send, without calling the LLM.
+        Used by the batch mode to submit extractions offline.
+        Args:
+            question (str): The question to ask the LLM for extraction.
+            retrieval_query (str): The query to use for retrieving relevant context.
+        Returns:
+            str: The rendered prompt.
+        """
+        context = self._retrieve_context(retrieval_query)
+        prompt = ChatPromptTemplate.from_template(template=self.EXTRACTION_TEMPLATE)
+        return prompt.format_messages(context=context, question=question)[0].content
+
+    def extract_all(self) -> dict:
+        """
+        Extracts every job field the page's structured data lacks in one LLM call over the context
+        retrieved for all of them. Fields the reply leaves empty, or all of them when the reply is
+        not valid JSON, are extracted one by one with _extract_information.
+        Returns:
+            dict: The role, company, description and location.
+        """
+        logger.debug("Starting extraction of all job fields.")
+        fields = {
+            field: self.structured_fields[field] for field in self.EXTRACTION_FIELDS if field in self.structured_fields
+        }
+        missing = [field for field in self.EXTRACTION_FIELDS if field not in fields]
+        if not missing:
+            logger.info("All job fields found in the page's structured data, no LLM call needed.")
+            return fields
+
+        context = self._shared_context(missing)
+        prompt = ChatPromptTemplate.from_template(template=self._preprocess_template_string(self.EXTRACT_ALL_TEMPLATE))
+        try:
+            chain = prompt | self.llm | StrOutputParser()
+            reply = chain.invoke({"context": context, "schema": json.dumps(self.extraction_schema(missing))})
+            extracted = self.parse_extraction_reply(reply)
+            fields.update({field: extracted[field] for field in missing if field in extracted})
+        except Exception as e:
+            logger.error(f"Error during combined extraction, extracting fields one by one: {e}")
+
+        for field in missing:
+            question, retrieval_query = self.EXTRACTION_FIELDS[field]
+            if not fields.get(field):
+                logger.warning(f"Combined extraction returned no {field}, extracting it separately.")
+                fields[field] = self._extract_information(question, retrieval_query)
+        logger.debug(f"Extracted job fields: {list(fields)}")
+        return fields
+
+    def page_text(self, body_html: str) -> str:
+        """
+        Reduce a job page to the visible text of its main content, logging how much smaller it got.
+        Args:
+            body_html (str): The HTML of the page.
+        Returns:
+            str: The text of the page.
+        """
+        text, report = extract_main_content(body_html, cfg.LLM_MAIN_CONTENT_MIN_CHARS, self.llm.model_name)
+        logger.info(f"Job page reduced to its main content: {report.summary()}")
+        return text
+
+    @classmethod
+    def extraction_pack_schema(cls, job_ids: List[str]) -> dict:
+        """
+        JSON schema of an extract_jobs reply: the extract_all schema for each job id of a pack.
+        """
+        item = cls.extraction_schema()
+        return {
+            "type": "object",
+            "properties": {job_id: item for job_id in job_ids},
+            "required": list(job_ids),
+            "additionalProperties": False,
+        }
+
+    def _pack_jobs(self, texts: Dict[str, str], token_budget: int) -> List[List[str]]:
+        """
+        Group job pages into packs whose prompt fits the token budget.
+        Args:
+            texts (dict): Job link mapped to its page text, each already within the per-job limit.
+            token_budget (int): The prompt token budget of one pack.
+        Returns:
+            list: The packs, as lists of job links.
+        """
+        model_name = self.llm.model_name
+        overhead = template_tokens(self._preprocess_template_string(self.EXTRACT_MANY_TEMPLATE), model_name)
+        packs, pack, used = [], [], 0
+        for link, text in texts.items():
+            # The header line and the per-job schema entry cost a few dozen tokens on top of the page
+            tokens = count_tokens(text, model_name) + 60
+            if pack and (overhead + used + tokens > token_budget or len(pack) >= cfg.LLM_BULK_EXTRACTION_MAX_JOBS):
+                packs.append(pack)
+                pack, used = [], 0
+            pack.append(link)
+            used += tokens
+        if pack:
+            packs.append(pack)
+        return packs
+
+    def _extract_pack(self, pages: Dict[str, str], texts: Dict[str, str], pack: List[str]) -> Dict[str, dict]:
+        """
+        Extract the fields of a pack of jobs in one call, splitting the pack when the reply is unusable.
+        Args:
+            pages (dict): Job link mapped to its page HTML, for the single-job fallback.
+            texts (dict): Job link mapped to its page text.
+            pack (list): The links of the jobs to extract.
+        Returns:
+            dict: Job link mapped to its fields.
+        """
+        if len(pack) == 1:
+            # A single job gets the full retrieval-based extraction, with its per-field fallback
+            link = pack[0]
+            self.set_body_html(pages[link])
+            return {link: self.extract_all()}
+
+        job_ids = [str(index) for index in range(1, len(pack) + 1)]
+        jobs = "\n\n".join(f"### Job {job_id}\n{texts[link]}" for job_id, link in zip(job_ids, pack))
+        prompt = ChatPromptTemplate.from_template(template=self._preprocess_template_string(self.EXTRACT_MANY_TEMPLATE))
+        results, failed = {}, list(pack)
+        try:
+            chain = prompt | self.llm | StrOutputParser()
+            reply = chain.invoke(
+                {"count": len(pack), "jobs": jobs, "schema": json.dumps(self.extraction_pack_schema(job_ids))}
+            )
+            data = json.loads(reply[reply.find("{"):reply.rfind("}") + 1])
+            failed = []
+            for job_id, link in zip(job_ids, pack):
+                item = data.get(job_id) if isinstance(data, dict) else None
+                fields = self.parse_extraction_reply(json.dumps(item)) if isinstance(item, dict) else {}
+                if fields.get("description"):
+                    results[link] = {field: fields.get(field, "") for field in self.EXTRACTION_FIELDS}
+                else:
+                    failed.append(link)
+        except Exception as e:
+            logger.warning(f"Malformed reply for a pack of {len(pack)} jobs: {e}")
+
+        # As in extract_all, fields the packed reply left empty are extracted one by one from the job's own page
+        for link, fields in results.items():
+            missing = [field for field in self.EXTRACTION_FIELDS if not fields[field]]
+            if not missing:
+                continue
+            logger.warning(f"Packed extraction returned no {', '.join(missing)} for {link}, extracting separately.")
+            self.set_body_html(pages[link])
+            for field in missing:
+                question, retrieval_query = self.EXTRACTION_FIELDS[field]
+                fields[field] = self.structured_fields.get(field) or self._extract_information(question, retrieval_query)
+
+        if failed:
+            logger.warning(f"Splitting {len(failed)} of {len(pack)} jobs of the pack into smaller packs.")
+            middle = (len(failed) + 1) // 2
+            for part in (failed[:middle], failed[middle:]):
+                if part:
+                    results.update(self._extract_pack(pages, texts, part))
+        return results
+
+    def extract_jobs(self, pages: Dict[str, str], token_budget: Optional[int] = None) -> List[Job]:
+        """
+        Extract many job postings with few calls by packing several pages into each request.
+        Args:
+            pages (dict): Job link mapped to the HTML of its page.
+            token_budget (int): Prompt token budget of one request; defaults to the job parser's budget.
+        Returns:
+            list: One Job per page, in the order of pages.
+        """
+        token_budget = token_budget or get_token_planner().budget_for(TASK_JOB_PARSER)
+        model_name = self.llm.model_name
+        structured = {
+            link: extract_structured(body_html, self.STRUCTURED_EXTRACTORS, cfg.LLM_STRUCTURED_MIN_DESCRIPTION_CHARS)
+            if cfg.LLM_STRUCTURED_EXTRACTION else {}
+            for link, body_html in pages.items()
+        }
+        # Pages whose structured data holds every field need no LLM call
+        results = {
+            link: {field: fields[field] for field in self.EXTRACTION_FIELDS}
+            for link, fields in structured.items()
+            if all(field in fields for field in self.EXTRACTION_FIELDS)
+        }
+        texts = {
+            link: truncate_to_tokens(self.page_text(body_html), cfg.LLM_BULK_EXTRACTION_JOB_TOKENS, model_name)
+            for link, body_html in pages.items()
+            if link not in results
+        }
+        packs = self._pack_jobs(texts, token_budget)
+        logger.info(
+            f"Extracting {len(pages)} jobs: {len(results)} from structured data, "
+            f"{len(texts)} in {len(packs)} packed requests."
+        )
+
+        for pack in packs:
+            for link, fields in self._extract_pack(pages, texts, pack).items():
+                # Structured values are more reliable than the model's reading of the page
+                found = structured[link]
+                fields.update({field: found[field] for field in self.EXTRACTION_FIELDS if field in found})
+                results[link] = fields
+        return [
+            Job(
+                role=results[link]["role"],
+                company=results[link]["company"],
+                location=results[link]["location"],
+                description=results[link]["description"],
+                link=link,
+            )
+            for link in pages
+        ]
+
     def extract_job_description(self) -> str:
         """
         Extracts the company name from the job description.
@@ -160,6 +497,8 @@ class LLMParser:
         question = "What is the job description of the company?"
         retrieval_query = "Job description"
         logger.debug("Starting job description extraction.")
+        if self.structured_fields.get("description"):
+            return self.structured_fields["description"]
         return self._extract_information(question, retrieval_query)
     
     def extract_company_name(self) -> str:
@@ -171,6 +510,8 @@ class LLMParser:
         question = "What is the company's name?"
         retrieval_query = "Company name"
         logger.debug("Starting company name extraction.")
+        if self.structured_fields.get("company"):
+            return self.structured_fields["company"]
         return self._extract_information(question, retrieval_query)
     
     def extract_role(self) -> str:
@@ -182,6 +523,8 @@ class LLMParser:
         question = "What is the role or title sought in this job description?"
         retrieval_query = "Job title"
         logger.debug("Starting role/title extraction.")
+        if self.structured_fields.get("role"):
+            return self.structured_fields["role"]
         return self._extract_information(question, retrieval_query)
     
     def extract_location(self) -> str:
@@ -193,6 +536,8 @@ class LLMParser:
         question = "What is the location mentioned in this job description?"
         retrieval_query = "Location"
         logger.debug("Starting location extraction.")
+        if self.structured_fields.get("location"):
+            return self.structured_fields["location"]
         return self._extract_information(question, retrieval_query)
     
     def extract_recruiter_email(self) -> str:
@@ -204,6 +549,9 @@ class LLMParser:
         question = "What is the recruiter's email address in this job description?"
         retrieval_query = "Recruiter email"
         logger.debug("Starting recruiter email extraction.")
+        if self.structured_fields.get("recruiter_email"):
+            # Found in the structured data, a mailto: link or the page text
+            return self.structured_fields["recruiter_email"]
         email = self._extract_information(question, retrieval_query)
         
         # Validate the extracted email using regex
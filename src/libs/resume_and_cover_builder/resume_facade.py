@@ -2,13 +2,20 @@
 This module contains the FacadeManager class, which is responsible for managing the interaction between the user and other components of the application.
 """
 # app/libs/resume_and_cover_builder/manager_facade.py
+import asyncio
 import hashlib
 import inquirer
 from pathlib import Path
+from typing import Callable, Dict, List, Optional
 
 from loguru import logger
 
+import config as cfg
+
+from src.libs.llm_batch import BatchBackend, get_batch_backend
+from src.libs.resume_and_cover_builder.batch_generator import BatchApplicationGenerator
 from src.libs.resume_and_cover_builder.llm.llm_job_parser import LLMParser
+from src.libs.resume_and_cover_builder.utils import StreamEvent
 from src.job import Job
 from src.utils.chrome_utils import HTML_to_PDF
 from .config import global_config
@@ -68,22 +75,41 @@ class ResumeFacade:
         return inquirer.prompt(questions)['text']
 
         
-    def link_to_job(self, job_url):
+    def _fetch_body_html(self, job_url) -> str:
         self.driver.get(job_url)
         self.driver.implicitly_wait(10)
+        if cfg.LLM_STRUCTURED_EXTRACTION:
+            # JSON-LD and meta tags usually sit in the head, so the structured data extractors get the whole page;
+            # the job parser embeds only its body
+            return self.driver.execute_script("return document.documentElement.outerHTML")
         body_element = self.driver.find_element("tag name", "body")
-        body_element = body_element.get_attribute("outerHTML")
+        return body_element.get_attribute("outerHTML")
+
+    def link_to_job(self, job_url):
+        body_element = self._fetch_body_html(job_url)
         self.llm_job_parser = LLMParser(openai_api_key=global_config.API_KEY)
         self.llm_job_parser.set_body_html(body_element)
 
         self.job = Job()
-        self.job.role = self.llm_job_parser.extract_role()
-        self.job.company = self.llm_job_parser.extract_company_name()
-        self.job.description = self.llm_job_parser.extract_job_description()
-        self.job.location = self.llm_job_parser.extract_location()
+        fields = self.llm_job_parser.extract_all()
+        self.job.role = fields["role"]
+        self.job.company = fields["company"]
+        self.job.description = fields["description"]
+        self.job.location = fields["location"]
         self.job.link = job_url
         logger.info(f"Extracting job details from URL: {job_url}")
 
+    def links_to_jobs(self, job_urls: List[str]) -> List[Job]:
+        """
+        Fetch and parse many job postings, packing several pages into each extraction request.
+        Args:
+            job_urls (list): The job URLs.
+        Returns:
+            list: One Job per URL, in the same order.
+        """
+        pages = {job_url: self._fetch_body_html(job_url) for job_url in job_urls}
+        return LLMParser(openai_api_key=global_config.API_KEY).extract_jobs(pages)
+
 
     def create_resume_pdf_job_tailored(self) -> tuple[bytes, str]:
         """
@@ -107,6 +133,50 @@ class ResumeFacade:
         result = HTML_to_PDF(html_resume, self.driver)
         self.driver.quit()
         return result, suggested_name
+
+    @staticmethod
+    def _track_progress(on_event: Callable[[StreamEvent], None]) -> Callable[[StreamEvent], None]:
+        """
+        Wrap a streaming progress callback so time-to-first-token and time-to-first-section get logged.
+        Args:
+            on_event (callable): The caller's progress callback.
+        Returns:
+            callable: The callback to hand to the generator.
+        """
+        seen = {"token": False, "section": False}
+
+        def callback(event: StreamEvent) -> None:
+            if event.delta and not seen["token"]:
+                seen["token"] = True
+                logger.info(f"First tokens streamed after {event.elapsed:.2f}s ({event.section})")
+            if event.done and not seen["section"]:
+                seen["section"] = True
+                logger.info(f"First section completed after {event.elapsed:.2f}s ({event.section})")
+            on_event(event)
+
+        return callback
+
+    async def acreate_resume_pdf_job_tailored(self, on_event: Optional[Callable[[StreamEvent], None]] = None) -> tuple[bytes, str]:
+        """
+        Async counterpart of create_resume_pdf_job_tailored: the resume sections are generated concurrently
+        on the running event loop and the PDF rendering runs in a worker thread.
+        Args:
+            on_event (callable): Optional progress callback enabling streaming; receives every StreamEvent.
+        Returns:
+            tuple: A tuple containing the PDF content as bytes and the unique filename.
+        """
+        style_path = self.style_manager.get_style_path()
+        if style_path is None:
+            raise ValueError("You must choose a style before generating the PDF.")
+
+        html_resume = await self.resume_generator.acreate_resume_job_description_text(
+            style_path, self.job.description, on_event=self._track_progress(on_event) if on_event else None
+        )
+        suggested_name = hashlib.md5(self.job.link.encode()).hexdigest()[:10]
+
+        result = await asyncio.to_thread(HTML_to_PDF, html_resume, self.driver)
+        self.driver.quit()
+        return result, suggested_name
     
     
     
@@ -128,6 +198,25 @@ class ResumeFacade:
         self.driver.quit()
         return result
 
+    async def acreate_resume_pdf(self, on_event: Optional[Callable[[StreamEvent], None]] = None) -> bytes:
+        """
+        Async counterpart of create_resume_pdf.
+        Args:
+            on_event (callable): Optional progress callback enabling streaming; receives every StreamEvent.
+        Returns:
+            bytes: The PDF content.
+        """
+        style_path = self.style_manager.get_style_path()
+        if style_path is None:
+            raise ValueError("You must choose a style before generating the PDF.")
+
+        html_resume = await self.resume_generator.acreate_resume(
+            style_path, on_event=self._track_progress(on_event) if on_event else None
+        )
+        result = await asyncio.to_thread(HTML_to_PDF, html_resume, self.driver)
+        self.driver.quit()
+        return result
+
     def create_cover_letter(self) -> tuple[bytes, str]:
         """
         Create a cover letter based on the given job description text and job URL.
@@ -150,4 +239,54 @@ class ResumeFacade:
         
         result = HTML_to_PDF(cover_letter_html, self.driver)
         self.driver.quit()
-        return result, suggested_name
\ No newline at end of file
+        return result, suggested_name
+
+    async def acreate_cover_letter(self, on_event: Optional[Callable[[StreamEvent], None]] = None) -> tuple[bytes, str]:
+        """
+        Async counterpart of create_cover_letter.
+        Args:
+            on_event (callable): Optional progress callback enabling streaming; receives every StreamEvent.
+        Returns:
+            tuple: A tuple containing the PDF content as bytes and the unique filename.
+        """
+        style_path = self.style_manager.get_style_path()
+        if style_path is None:
+            raise ValueError("You must choose a style before generating the PDF.")
+
+        cover_letter_html = await self.resume_generator.acreate_cover_letter_job_description(
+            style_path, self.job.description, on_event=self._track_progress(on_event) if on_event else None
+        )
+        suggested_name = hashlib.md5(self.job.link.encode()).hexdigest()[:10]
+
+        result = await asyncio.to_thread(HTML_to_PDF, cover_letter_html, self.driver)
+        self.driver.quit()
+        return result, suggested_name
+
+    def create_batch_applications(self, jobs: List[Dict[str, str]], output_dir: Path, backend: Optional[BatchBackend] = None) -> List[Path]:
+        """
+        Generate a tailored resume and cover letter for many jobs through the offline batch API.
+        Cheaper and higher throughput than the interactive path, at the cost of latency; a run that is
+        interrupted can simply be started again and continues from its checkpoint.
+        Args:
+            jobs (list): Jobs as dicts with a "link" and optionally a "description".
+            output_dir (Path): Folder receiving one sub-folder of PDFs per job.
+            backend (BatchBackend): Batch backend to use; defaults to the one selected by LLM_BATCH_BACKEND.
+        Returns:
+            list: The output folders of the jobs finished by this run.
+        """
+        style_path = self.style_manager.get_style_path()
+        if style_path is None:
+            raise ValueError("You must choose a style before generating the PDF.")
+
+        generator = BatchApplicationGenerator(
+            resume_object=self.resume_generator.resume_object,
+            style_css=self.resume_generator._read_style(style_path),
+            output_dir=output_dir,
+            backend=backend or get_batch_backend(global_config.API_KEY),
+            driver=self.driver,
+            fetch_body_html=self._fetch_body_html,
+        )
+        try:
+            return generator.run(jobs)
+        finally:
+            self.driver.quit()
@@ -3,10 +3,11 @@ This module is responsible for generating resumes and cover letters using the LL
 """
 # app/libs/resume_and_cover_builder/resume_generator.py
 from string import Template
-from typing import Any
+from typing import Any, Callable, Optional
 from src.libs.resume_and_cover_builder.llm.llm_generate_resume import LLMResumer
 from src.libs.resume_and_cover_builder.llm.llm_generate_resume_from_job import LLMResumeJobDescription
 from src.libs.resume_and_cover_builder.llm.llm_generate_cover_letter_from_job import LLMCoverLetterJobDescription
+from src.libs.resume_and_cover_builder.utils import StreamEvent
 from .module_loader import load_module
 from .config import global_config
 
@@ -18,38 +19,57 @@ class ResumeGenerator:
          self.resume_object = resume_object
          
 
-    def _create_resume(self, gpt_answerer: Any, style_path):
-        # Imposta il resume nell'oggetto gpt_answerer
-        gpt_answerer.set_resume(self.resume_object)
-        
-        # Leggi il template HTML
-        template = Template(global_config.html_template)
-        
+    def _read_style(self, style_path) -> str:
         try:
             with open(style_path, "r") as f:
-                style_css = f.read()  # Correzione: chiama il metodo `read` con le parentesi
+                return f.read()  # Correzione: chiama il metodo `read` con le parentesi
         except FileNotFoundError:
             raise ValueError(f"Il file di stile non è stato trovato nel percorso: {style_path}")
         except Exception as e:
             raise RuntimeError(f"Errore durante la lettura del file CSS: {e}")
+
+    def _render_html(self, body_html: str, style_css: str) -> str:
+        # Applica i contenuti al template
+        template = Template(global_config.html_template)
+        return template.substitute(body=body_html, style_css=style_css)
+
+    def _create_resume(self, gpt_answerer: Any, style_path):
+        # Imposta il resume nell'oggetto gpt_answerer
+        gpt_answerer.set_resume(self.resume_object)
+        style_css = self._read_style(style_path)
         
         # Genera l'HTML del resume
         body_html = gpt_answerer.generate_html_resume()
-        
-        # Applica i contenuti al template
-        return template.substitute(body=body_html, style_css=style_css)
+        return self._render_html(body_html, style_css)
+
+    async def _acreate_resume(self, gpt_answerer: Any, style_path, on_event: Optional[Callable[[StreamEvent], None]] = None):
+        gpt_answerer.set_resume(self.resume_object)
+        style_css = self._read_style(style_path)
+        body_html = await gpt_answerer.agenerate_html_resume(on_event=on_event)
+        return self._render_html(body_html, style_css)
 
     def create_resume(self, style_path):
         strings = load_module(global_config.STRINGS_MODULE_RESUME_PATH, global_config.STRINGS_MODULE_NAME)
         gpt_answerer = LLMResumer(global_config.API_KEY, strings)
         return self._create_resume(gpt_answerer, style_path)
 
+    async def acreate_resume(self, style_path, on_event: Optional[Callable[[StreamEvent], None]] = None):
+        strings = load_module(global_config.STRINGS_MODULE_RESUME_PATH, global_config.STRINGS_MODULE_NAME)
+        gpt_answerer = LLMResumer(global_config.API_KEY, strings)
+        return await self._acreate_resume(gpt_answerer, style_path, on_event)
+
     def create_resume_job_description_text(self, style_path: str, job_description_text: str):
         strings = load_module(global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
         gpt_answerer = LLMResumeJobDescription(global_config.API_KEY, strings)
         gpt_answerer.set_job_description_from_text(job_description_text)
         return self._create_resume(gpt_answerer, style_path)
 
+    async def acreate_resume_job_description_text(self, style_path: str, job_description_text: str, on_event: Optional[Callable[[StreamEvent], None]] = None):
+        strings = load_module(global_config.STRINGS_MODULE_RESUME_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
+        gpt_answerer = LLMResumeJobDescription(global_config.API_KEY, strings)
+        await gpt_answerer.aset_job_description_from_text(job_description_text)
+        return await self._acreate_resume(gpt_answerer, style_path, on_event)
+
     def create_cover_letter_job_description(self, style_path: str, job_description_text: str):
         strings = load_module(global_config.STRINGS_MODULE_COVER_LETTER_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
         gpt_answerer = LLMCoverLetterJobDescription(global_config.API_KEY, strings)
@@ -60,6 +80,11 @@ class ResumeGenerator:
         with open(style_path, "r") as f:
             style_css = f.read()
         return template.substitute(body=cover_letter_html, style_css=style_css)
-    
-    
-    
\ No newline at end of file
+
+    async def acreate_cover_letter_job_description(self, style_path: str, job_description_text: str, on_event: Optional[Callable[[StreamEvent], None]] = None):
+        strings = load_module(global_config.STRINGS_MODULE_COVER_LETTER_JOB_DESCRIPTION_PATH, global_config.STRINGS_MODULE_NAME)
+        gpt_answerer = LLMCoverLetterJobDescription(global_config.API_KEY, strings)
+        gpt_answerer.set_resume(self.resume_object)
+        await gpt_answerer.aset_job_description_from_text(job_description_text)
+        cover_letter_html = await gpt_answerer.agenerate_cover_letter(on_event=on_event)
+        return self._render_html(cover_letter_html, self._read_style(style_path))
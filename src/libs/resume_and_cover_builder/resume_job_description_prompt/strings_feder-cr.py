@@ -8,10 +8,11 @@ Act as an HR expert and resume writer specializing in ATS-friendly resumes. Your
 
 To implement this:
 - If any of the contact information fields (e.g., LinkedIn profile, GitHub profile) are not provided (i.e., `None`), omit them from the header.
+""" + prompt_header_template + """
 
 - **My information:**  
   {personal_information}
-""" + prompt_header_template
+"""
 
 prompt_education = """
 Act as an HR expert and resume writer with a specialization in creating ATS-friendly resumes. Your task is to articulate the educational background for a resume, ensuring it aligns with the provided job description. For each educational entry, ensure you include:
@@ -24,14 +25,14 @@ Act as an HR expert and resume writer with a specialization in creating ATS-frie
 To implement this, follow these steps:
 - If the exam details are not provided (i.e., `None`), skip the coursework section when filling out the template.
 - If the exam details are available, fill out the coursework section accordingly.
-
+""" + prompt_education_template + """
 
 - **My information:**  
   {education_details}
 
 - **Job Description:**  
   {job_description}
-"""+ prompt_education_template
+"""
 
 
 prompt_working_experience = """
@@ -46,14 +47,14 @@ Ensure that the descriptions highlight relevant experience and align with the jo
 
 To implement this:
 - If any of the work experience details (e.g., responsibilities, achievements) are not provided (i.e., `None`), omit those sections when filling out the template.
-
+""" + prompt_working_experience_template + """
 
 - **My information:**  
   {experience_details}
 
 - **Job Description:**  
   {job_description}
-"""+ prompt_working_experience_template
+"""
 
 
 prompt_projects = """
@@ -67,14 +68,14 @@ Ensure that the project descriptions demonstrate your skills and achievements re
 
 To implement this:
 - If any of the project details (e.g., link, achievements) are not provided (i.e., `None`), omit those sections when filling out the template.
-
+""" + prompt_projects_template + """
 
 - **My information:**  
   {projects}
 
 - **Job Description:**  
   {job_description}
-"""+ prompt_projects_template
+"""
 
 
 prompt_achievements = """
@@ -87,14 +88,14 @@ Ensure that the achievements are clearly presented and effectively highlight you
 
 To implement this:
 - If any of the achievement details (e.g., certifications, descriptions) are not provided (i.e., `None`), omit those sections when filling out the template.
-
+""" + prompt_achievements_template + """
 
 - **My information:**  
   {achievements}
 
 - **Job Description:**  
   {job_description}
-"""+ prompt_achievements_template
+"""
 
 
 prompt_certifications = """
@@ -108,13 +109,14 @@ Ensure that the certifications are clearly presented and effectively highlight y
 To implement this:
 
 If any of the certification details (e.g., descriptions) are not provided (i.e., None), omit those sections when filling out the template.
+""" + prompt_certifications_template + """
 
 - **My information:**  
   {certifications}
 
 - **Job Description:**  
   {job_description}
-"""+ prompt_certifications_template
+"""
 
 
 prompt_additional_skills = """
@@ -129,7 +131,7 @@ Ensure that the skills listed are relevant and accurately reflect your expertise
 
 To implement this:
 - If any of the skill details (e.g., languages, interests, skills) are not provided (i.e., `None`), omit those sections when filling out the template.
-
+""" + prompt_additional_skills_template + """
 
 - **My information:**  
   {languages}
@@ -138,7 +140,7 @@ To implement this:
 
 - **Job Description:**  
   {job_description}
-"""+ prompt_additional_skills_template
+"""
 
 summarize_prompt_template = """
 As a seasoned HR expert, your task is to identify and outline the key skills and requirements necessary for the position of this job. Use the provided job description as input to extract all relevant information. This will involve conducting a thorough analysis of the job's responsibilities and the industry standards. You should consider both the technical and soft skills needed to excel in this role. Additionally, specify any educational qualifications, certifications, or experiences that are essential. Your analysis should also reflect on the evolving nature of this role, considering future trends and how they might affect the required competencies.
@@ -3,27 +3,34 @@ This module contains utility functions for the Resume and Cover Letter Builder s
 """
 
 # app/libs/resume_and_cover_builder/utils.py
+import asyncio
 import json
 import openai
 import re
+import threading
 import time
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List
+from typing import Any, AsyncIterator, Coroutine, Dict, List, Optional, Tuple
 from langchain_core.messages.ai import AIMessage
 from langchain_core.prompt_values import StringPromptValue
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
+from langchain_core.language_models.chat_models import BaseChatModel
 from .config import global_config
+from src.libs.llm_cache import LLMResponseCache, get_response_cache, model_identity, render_prompt
+from src.libs.llm_rate_limiter import RateLimiter, get_rate_limiter, response_headers
+from src.libs.llm_token_budget import cached_input_tokens, count_tokens, get_prompt_cache_stats, get_token_planner
 from loguru import logger
 from requests.exceptions import HTTPError as HTTPStatusError
 
 
 class LLMLogger:
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: BaseChatModel):
         self.llm = llm
 
     @staticmethod
-    def log_request(prompts, parsed_reply: Dict[str, Dict]):
+    def log_request(prompts, parsed_reply: Dict[str, Dict], cache_info: Dict = None, planned_tokens: int = None):
         calls_log = global_config.LOG_OUTPUT_FILE_PATH / "open_ai_calls.json"
         if isinstance(prompts, StringPromptValue):
             prompts = prompts.text
@@ -46,16 +53,26 @@ class LLMLogger:
         output_tokens = token_usage["output_tokens"]
         input_tokens = token_usage["input_tokens"]
         total_tokens = token_usage["total_tokens"]
+        cached_tokens = token_usage.get("cached_input_tokens", 0)
 
         # Extract model details from the response
         model_name = parsed_reply["response_metadata"]["model_name"]
         prompt_price_per_token = 0.00000015
+        cached_prompt_price_per_token = 0.000000075
         completion_price_per_token = 0.0000006
 
-        # Calculate the total cost of the API call
-        total_cost = (input_tokens * prompt_price_per_token) + (
-            output_tokens * completion_price_per_token
+        # Calculate the total cost of the API call; prompt tokens read from the provider's cache are billed at a discount
+        total_cost = (
+            (input_tokens - cached_tokens) * prompt_price_per_token
+            + cached_tokens * cached_prompt_price_per_token
+            + output_tokens * completion_price_per_token
         )
+        # Replies served from the response cache did not cost anything
+        if cache_info and cache_info.get("hit"):
+            total_cost = 0.0
+        else:
+            hit_rate = get_prompt_cache_stats().record(input_tokens, cached_tokens)
+            logger.debug(f"Prompt cache: {cached_tokens} of {input_tokens} input tokens cached, {hit_rate:.1%} overall")
 
         # Create a log entry with all relevant information
         log_entry = {
@@ -65,9 +82,13 @@ class LLMLogger:
             "replies": parsed_reply["content"],  # Response content
             "total_tokens": total_tokens,
             "input_tokens": input_tokens,
+            "planned_input_tokens": planned_tokens,
+            "cached_input_tokens": cached_tokens,
             "output_tokens": output_tokens,
             "total_cost": total_cost,
         }
+        if cache_info is not None:
+            log_entry["cache"] = cache_info
 
         # Write the log entry to the log file in JSON format
         with open(calls_log, "a", encoding="utf-8") as f:
@@ -77,38 +98,207 @@ class LLMLogger:
 
 class LoggerChatModel:
 
-    def __init__(self, llm: ChatOpenAI):
+    max_retries = 15
+
+    def __init__(self, llm: BaseChatModel):
         self.llm = llm
 
     def __call__(self, messages: List[Dict[str, str]]) -> str:
-        max_retries = 15
-        retry_delay = 10
+        cache, cache_key, cached_reply = self._lookup_cache(messages)
+        if cached_reply is not None:
+            return cached_reply
 
-        for attempt in range(max_retries):
+        # Every call is paced by the process-wide limiter shared with the other LLM clients
+        limiter = get_rate_limiter()
+        estimated_tokens = self.count_prompt_tokens(messages)
+        for attempt in range(self.max_retries):
+            limiter.acquire(estimated_tokens)
             try:
                 reply = self.llm.invoke(messages)
-                parsed_reply = self.parse_llmresult(reply)
-                LLMLogger.log_request(prompts=messages, parsed_reply=parsed_reply)
-                # Sanitize the content to remove markdown code blocks
-                reply.content = self.sanitize_llm_output(reply.content)
-                return reply
-            except (openai.RateLimitError, HTTPStatusError) as err:
-                if isinstance(err, HTTPStatusError) and err.response.status_code == 429:
-                    logger.warning(f"HTTP 429 Too Many Requests: Waiting for {retry_delay} seconds before retrying (Attempt {attempt + 1}/{max_retries})...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-                else:
-                    logger.warning(f"Rate limit exceeded or API error (StatusCode: {err.response.status_code if hasattr(err, 'response') else 'N/A'}). Waiting for {retry_delay} seconds before retrying (Attempt {attempt + 1}/{max_retries})...")
-                    time.sleep(retry_delay)
-                    retry_delay *= 2
-            except Exception as e:
-                logger.error(f"Unexpected error occurred: {str(e)}, retrying in {retry_delay} seconds... (Attempt {attempt + 1}/{max_retries})")
+                self._record_success(limiter, estimated_tokens, reply)
+                return self._handle_reply(messages, reply, cache, cache_key, estimated_tokens)
+            except Exception as err:
+                retry_delay = limiter.backoff(err, attempt)
+                self._log_retry(err, attempt, retry_delay)
                 time.sleep(retry_delay)
-                retry_delay *= 2
 
         logger.critical("Failed to get a response from the model after multiple attempts.")
         raise Exception("Failed to get a response from the model after multiple attempts.")
 
+    async def __acall__(self, messages: List[Dict[str, str]]) -> str:
+        """
+        Async counterpart of __call__: awaits the provider and backs off without blocking the event loop.
+        """
+        cache, cache_key, cached_reply = self._lookup_cache(messages)
+        if cached_reply is not None:
+            return cached_reply
+
+        limiter = get_rate_limiter()
+        estimated_tokens = self.count_prompt_tokens(messages)
+        for attempt in range(self.max_retries):
+            await limiter.aacquire(estimated_tokens)
+            try:
+                reply = await self.llm.ainvoke(messages)
+                self._record_success(limiter, estimated_tokens, reply)
+                return self._handle_reply(messages, reply, cache, cache_key, estimated_tokens)
+            except Exception as err:
+                retry_delay = limiter.backoff(err, attempt)
+                self._log_retry(err, attempt, retry_delay)
+                await asyncio.sleep(retry_delay)
+
+        logger.critical("Failed to get a response from the model after multiple attempts.")
+        raise Exception("Failed to get a response from the model after multiple attempts.")
+
+    @property
+    def model_name(self) -> str:
+        return model_identity(self.llm)[0]
+
+    def count_prompt_tokens(self, messages) -> int:
+        """
+        Pre-flight count of the rendered prompt with the model's tokenizer.
+        """
+        return count_tokens(render_prompt(messages), self.model_name)
+
+    def fit_inputs(self, task: str, template: str, input_data: Dict[str, Any], priorities: Dict[str, int]) -> Dict[str, Any]:
+        """
+        Trim the lowest-priority prompt inputs so the rendered prompt fits the task's token budget.
+        Args:
+            task (str): The task whose budget applies.
+            template (str): The prompt template.
+            input_data (dict): The template variables.
+            priorities (dict): Input name mapped to its priority; lower is trimmed first, unlisted inputs are kept.
+        Returns:
+            dict: The inputs to render the prompt with.
+        """
+        return get_token_planner().fit(task, template, input_data, priorities, self.model_name)[0]
+
+    def budget_step(self, task: str, template: str, priorities: Dict[str, int]) -> RunnableLambda:
+        """
+        fit_inputs as a chain step to put in front of the prompt template.
+        """
+        return get_token_planner().as_runnable(task, template, priorities, self.model_name)
+
+    def as_runnable(self) -> RunnableLambda:
+        """
+        Wrap the model in a runnable whose ainvoke awaits __acall__ instead of running __call__ in a worker thread.
+        Returns:
+            RunnableLambda: The runnable to compose into chains.
+        """
+        return RunnableLambda(self.__call__, afunc=self.__acall__)
+
+    async def astream(self, messages) -> AsyncIterator[str]:
+        """
+        Stream the reply as sanitized text deltas while the provider generates it.
+        The aggregated reply is logged and cached exactly like a non-streamed call.
+        Failures are retried only while nothing has been yielded yet.
+        Args:
+            messages: The rendered prompt.
+        Yields:
+            str: Sanitized text as soon as each line of output is complete.
+        """
+        cache, cache_key, cached_reply = self._lookup_cache(messages)
+        if cached_reply is not None:
+            yield cached_reply.content
+            return
+
+        limiter = get_rate_limiter()
+        estimated_tokens = self.count_prompt_tokens(messages)
+        for attempt in range(self.max_retries):
+            await limiter.aacquire(estimated_tokens)
+            sanitizer = StreamingSanitizer()
+            aggregated = None
+            emitted = False
+            try:
+                async for chunk in self.llm.astream(messages):
+                    aggregated = chunk if aggregated is None else aggregated + chunk
+                    delta = sanitizer.feed(chunk.content)
+                    if delta:
+                        emitted = True
+                        yield delta
+                tail = sanitizer.finish()
+                if tail:
+                    yield tail
+            except Exception as err:
+                if emitted:
+                    raise
+                retry_delay = limiter.backoff(err, attempt)
+                self._log_retry(err, attempt, retry_delay)
+                await asyncio.sleep(retry_delay)
+                continue
+
+            content = aggregated.content if aggregated is not None else ""
+            usage_metadata = getattr(aggregated, "usage_metadata", None)
+            if not usage_metadata:
+                # Providers only report usage for streams on request; fall back to the pre-flight counts for logging
+                output_tokens = count_tokens(content, self.model_name)
+                usage_metadata = {
+                    "input_tokens": estimated_tokens,
+                    "output_tokens": output_tokens,
+                    "total_tokens": estimated_tokens + output_tokens,
+                }
+            reply = AIMessage(
+                content=content,
+                id=getattr(aggregated, "id", None),
+                response_metadata=getattr(aggregated, "response_metadata", None) or {},
+                usage_metadata=usage_metadata,
+            )
+            self._record_success(limiter, estimated_tokens, reply)
+            self._handle_reply(messages, reply, cache, cache_key, estimated_tokens)
+            return
+
+        logger.critical("Failed to get a response from the model after multiple attempts.")
+        raise Exception("Failed to get a response from the model after multiple attempts.")
+
+    def _lookup_cache(self, messages) -> Tuple[Optional[LLMResponseCache], Optional[str], Optional[AIMessage]]:
+        # Serve the reply from the response cache when the same request was already answered
+        cache = get_response_cache()
+        if cache is None:
+            return None, None, None
+        model_name, temperature = model_identity(self.llm)
+        cache_key = cache.make_key(model_name, temperature, render_prompt(messages))
+        cached_reply = cache.get(cache_key)
+        if cached_reply is None:
+            return cache, cache_key, None
+        logger.debug("LLM response served from cache")
+        LLMLogger.log_request(prompts=messages, parsed_reply=cached_reply, cache_info=self._cache_info(cache, hit=True))
+        reply = LLMResponseCache.to_message(cached_reply)
+        reply.content = self.sanitize_llm_output(reply.content)
+        return cache, cache_key, reply
+
+    @staticmethod
+    def _record_success(limiter: RateLimiter, estimated_tokens: int, reply: AIMessage) -> None:
+        usage_metadata = getattr(reply, "usage_metadata", None) or {}
+        limiter.record_success(estimated_tokens, usage_metadata.get("total_tokens"), response_headers(reply))
+
+    def _handle_reply(self, messages, reply: AIMessage, cache: Optional[LLMResponseCache], cache_key: Optional[str], planned_tokens: int) -> AIMessage:
+        parsed_reply = self.parse_llmresult(reply)
+        if cache is not None:
+            cache.put(cache_key, parsed_reply)
+        logger.debug(f"Prompt tokens planned {planned_tokens}, actual {parsed_reply['usage_metadata']['input_tokens']}")
+        LLMLogger.log_request(
+            prompts=messages,
+            parsed_reply=parsed_reply,
+            cache_info=self._cache_info(cache, hit=False) if cache is not None else None,
+            planned_tokens=planned_tokens,
+        )
+        # Sanitize the content to remove markdown code blocks
+        reply.content = self.sanitize_llm_output(reply.content)
+        return reply
+
+    def _log_retry(self, err: Exception, attempt: int, retry_delay: float) -> None:
+        if isinstance(err, (openai.RateLimitError, HTTPStatusError)):
+            if isinstance(err, HTTPStatusError) and err.response.status_code == 429:
+                logger.warning(f"HTTP 429 Too Many Requests: Waiting for {retry_delay:.1f} seconds before retrying (Attempt {attempt + 1}/{self.max_retries})...")
+            else:
+                logger.warning(f"Rate limit exceeded or API error (StatusCode: {err.response.status_code if hasattr(err, 'response') else 'N/A'}). Waiting for {retry_delay:.1f} seconds before retrying (Attempt {attempt + 1}/{self.max_retries})...")
+        else:
+            logger.error(f"Unexpected error occurred: {str(err)}, retrying in {retry_delay:.1f} seconds... (Attempt {attempt + 1}/{self.max_retries})")
+
+    @staticmethod
+    def _cache_info(cache: LLMResponseCache, hit: bool) -> Dict:
+        stats = cache.stats()
+        return {"hit": hit, "hits": stats["hits"], "misses": stats["misses"]}
+
     def parse_llmresult(self, llmresult: AIMessage) -> Dict[str, Dict]:
         # Parse the LLM result into a structured format.
         content = llmresult.content
@@ -129,6 +319,7 @@ class LoggerChatModel:
                 "input_tokens": usage_metadata.get("input_tokens", 0),
                 "output_tokens": usage_metadata.get("output_tokens", 0),
                 "total_tokens": usage_metadata.get("total_tokens", 0),
+                "cached_input_tokens": cached_input_tokens(llmresult),
             },
         }
         return parsed_result
@@ -142,7 +333,14 @@ class LoggerChatModel:
         3. Convert markdown bold (**text**) to HTML (<strong>text</strong>).
         4. Convert markdown italic (*text*) to HTML (<em>text</em>).
         """
-        
+        return LoggerChatModel.sanitize_markup(output).strip()
+
+    @staticmethod
+    def sanitize_markup(output: str) -> str:
+        """
+        The transformations of sanitize_llm_output without the final strip.
+        None of them spans a newline, so applying this line by line gives the same result as on the whole text.
+        """
         # 1. Remove code blocks
         clean_output = re.sub(r"```(html)?", "", output, flags=re.IGNORECASE)
         clean_output = re.sub(r"```", "", clean_output)
@@ -160,4 +358,105 @@ class LoggerChatModel:
         # Simple approach: match *text* where * is not preceded by newline
         clean_output = re.sub(r"(?<!^)(?<!\n)\*(.*?)\*", r"<em>\1</em>", clean_output)
         
-        return clean_output.strip()
+        return clean_output
+
+
+class StreamingSanitizer:
+    """
+    Incremental version of LoggerChatModel.sanitize_llm_output.
+    Text is released one completed line at a time; leading whitespace of the whole output and
+    trailing whitespace held back at the end are dropped, so the concatenated deltas equal the
+    sanitized full reply.
+    """
+
+    def __init__(self):
+        self._line = ""
+        self._pending_whitespace = ""
+        self._started = False
+
+    def _release(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self._started = True
+        body = text.rstrip()
+        if not body:
+            self._pending_whitespace += text
+            return ""
+        released = self._pending_whitespace + body
+        self._pending_whitespace = text[len(body):]
+        return released
+
+    def feed(self, chunk: str) -> str:
+        """
+        Add streamed text.
+        Args:
+            chunk (str): The next piece of model output.
+        Returns:
+            str: Sanitized text that can already be shown.
+        """
+        self._line += chunk
+        *complete, self._line = self._line.split("\n")
+        return "".join(self._release(LoggerChatModel.sanitize_markup(line) + "\n") for line in complete)
+
+    def finish(self) -> str:
+        """
+        Flush the last, unterminated line.
+        Returns:
+            str: The remaining sanitized text.
+        """
+        released = self._release(LoggerChatModel.sanitize_markup(self._line))
+        self._line = ""
+        self._pending_whitespace = ""
+        return released
+
+
+@dataclass
+class StreamEvent:
+    """
+    Progress of a streamed generation: a text delta of one section, or its completion.
+    """
+    section: str
+    delta: str = ""
+    text: str = ""
+    done: bool = False
+    elapsed: float = 0.0
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the event loop run_sync hands its coroutines to, started on a daemon thread on first use.
+    One long-lived loop keeps the pooled async HTTP client of http_client alive across calls;
+    a fresh loop per call would open, and leak, a new client each time.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="run-sync-loop", daemon=True).start()
+        return _loop
+
+
+def run_sync(coroutine: Coroutine) -> Any:
+    """
+    Run a coroutine to completion from synchronous code, on the shared background event loop.
+    Also works when called from inside another running event loop, whose thread blocks until the result is ready.
+    Args:
+        coroutine (Coroutine): The coroutine to run.
+    Returns:
+        Any: The coroutine's result.
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("run_sync cannot be called from a coroutine running on its own loop, await it instead")
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
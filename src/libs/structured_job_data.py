@@ -0,0 +1,289 @@
+"""
+Deterministic extraction of job fields from structured data on job pages.
+
+Most ATS and job board pages describe the posting for search engines: a
+schema.org JobPosting in JSON-LD or microdata, OpenGraph tags and mailto:
+links. extract_structured runs a chain of extractors over the page, parsed
+once, and keeps the first value found for each field: JSON-LD, then microdata,
+then meta tags, then regular expressions. LLMParser only retrieves and asks the
+LLM for the fields the chain leaves empty. Extractors are plain functions of a
+StructuredPage, so a site-specific one can be put in front of the chain.
+"""
+import html
+import json
+import re
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from src.libs.html_content import VOID_TAGS, html_to_text
+from src.logging import logger
+
+EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}")
+# Addresses that never belong to a recruiter
+_NOT_RECRUITER = re.compile(
+    r"^(?:no-?reply|do-?not-?reply|privacy|gdpr|abuse|webmaster|support)@|@example\.", re.IGNORECASE
+)
+# OpenGraph titles of job boards that state the role and company in a fixed form
+_META_TITLES = [
+    # LinkedIn: "Acme hiring Senior Engineer in Berlin, Germany | LinkedIn"
+    re.compile(r"^(?P<company>.+?) hiring (?P<role>.+?)(?: in (?P<location>.+?))? \| LinkedIn$"),
+    # Greenhouse: "Job Application for Senior Engineer at Acme"
+    re.compile(r"^Job Application for (?P<role>.+) at (?P<company>.+)$"),
+]
+_HIDDEN_TAGS = {"script", "style", "noscript", "template"}
+
+
+class StructuredPage(HTMLParser):
+    """
+    One pass over a page collecting what the extractors read: JSON-LD blocks, meta tags,
+    JobPosting microdata properties, mailto: addresses and the visible text.
+    """
+
+    def __init__(self, page_html: str):
+        super().__init__(convert_charrefs=True)
+        self.json_ld: List[Any] = []
+        self.meta: Dict[str, str] = {}
+        self.microdata: Dict[str, str] = {}
+        self.mailtos: List[str] = []
+        self._text: List[str] = []
+        self._stack: List[dict] = []
+        self._scope: List[str] = []
+        self._postings = 0
+        self._captures: Dict[str, List[str]] = {}
+        self._json_ld_parts: Optional[List[str]] = None
+        self._hidden = 0
+        self.feed(page_html)
+        self.close()
+
+    @property
+    def text(self) -> str:
+        return " ".join(" ".join(self._text).split())
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, {name: value or "" for name, value in attrs}, void=tag in VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, {name: value or "" for name, value in attrs}, void=True)
+
+    def _start(self, tag: str, attrs: Dict[str, str], void: bool) -> None:
+        if tag == "meta" and attrs.get("content"):
+            name = (attrs.get("property") or attrs.get("name") or "").lower()
+            if name:
+                self.meta.setdefault(name, attrs["content"])
+        if tag == "a" and attrs.get("href", "").lower().startswith("mailto:"):
+            address = html.unescape(attrs["href"][7:].split("?")[0]).strip()
+            if address:
+                self.mailtos.append(address)
+
+        entry = {"tag": tag, "scope": False, "posting": False, "capture": None, "hidden": False}
+        itemprop = attrs.get("itemprop", "").split(" ")[0]
+        if "itemscope" in attrs and attrs.get("itemtype", "").rstrip("/").endswith("JobPosting"):
+            entry["posting"] = True
+        elif self._postings and itemprop:
+            key = ".".join([*self._scope, itemprop])
+            if "itemscope" in attrs:
+                entry["scope"] = True
+            elif "content" in attrs or void:
+                self.microdata.setdefault(key, attrs.get("content") or attrs.get("href", ""))
+            else:
+                entry["capture"] = key
+        if tag == "script" and "ld+json" in attrs.get("type", "").lower():
+            self._json_ld_parts = []
+        entry["hidden"] = tag in _HIDDEN_TAGS
+        if void:
+            return
+        self._stack.append(entry)
+        if entry["posting"]:
+            self._postings += 1
+        if entry["scope"]:
+            self._scope.append(itemprop)
+        if entry["capture"] is not None:
+            self._captures.setdefault(entry["capture"], [])
+        if entry["hidden"]:
+            self._hidden += 1
+
+    def handle_endtag(self, tag):
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index]["tag"] == tag:
+                for entry in reversed(self._stack[index:]):
+                    self._end(entry)
+                del self._stack[index:]
+                return
+
+    def _end(self, entry: dict) -> None:
+        if entry["posting"]:
+            self._postings -= 1
+        if entry["scope"]:
+            self._scope.pop()
+        if entry["capture"] is not None:
+            parts = self._captures.pop(entry["capture"], [])
+            self.microdata.setdefault(entry["capture"], " ".join(" ".join(parts).split()))
+        if entry["hidden"]:
+            self._hidden -= 1
+        if entry["tag"] == "script" and self._json_ld_parts is not None:
+            try:
+                self.json_ld.append(json.loads("".join(self._json_ld_parts), strict=False))
+            except ValueError as e:
+                logger.debug(f"Unreadable JSON-LD block: {e}")
+            self._json_ld_parts = None
+
+    def handle_data(self, data):
+        if self._json_ld_parts is not None:
+            self._json_ld_parts.append(data)
+            return
+        if self._hidden:
+            return
+        self._text.append(data)
+        for parts in self._captures.values():
+            parts.append(data)
+
+
+Extractor = Callable[[StructuredPage], Dict[str, str]]
+
+
+def _job_postings(data: Any) -> Iterator[dict]:
+    """
+    The JobPosting objects of a JSON-LD block, also inside lists and @graph.
+    """
+    if isinstance(data, list):
+        for item in data:
+            yield from _job_postings(item)
+    elif isinstance(data, dict):
+        types = data.get("@type")
+        if "JobPosting" in (types if isinstance(types, list) else [types]):
+            yield data
+        yield from _job_postings(data.get("@graph"))
+
+
+def _name(value: Any) -> str:
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    if isinstance(value, dict):
+        value = value.get("name", "")
+    return value if isinstance(value, str) else ""
+
+
+def _place(location: Any) -> str:
+    """
+    'Locality, Region, Country' of a schema.org Place, or of the first of several.
+    """
+    if isinstance(location, list):
+        location = location[0] if location else None
+    if isinstance(location, str):
+        return location
+    if not isinstance(location, dict):
+        return ""
+    address = location.get("address", location)
+    if isinstance(address, str):
+        return address
+    if not isinstance(address, dict):
+        return ""
+    parts = [_name(address.get(key)) for key in ("addressLocality", "addressRegion", "addressCountry")]
+    return ", ".join(dict.fromkeys(part.strip() for part in parts if part and part.strip()))
+
+
+def _description_text(description: str) -> str:
+    # Some sites escape the description HTML once more than the JSON needs
+    if "&lt;" in description:
+        description = html.unescape(description)
+    return html_to_text(description) if "<" in description else description
+
+
+def json_ld_fields(page: StructuredPage) -> Dict[str, str]:
+    """
+    Fields of the first schema.org JobPosting in the page's JSON-LD.
+    """
+    for block in page.json_ld:
+        for posting in _job_postings(block):
+            location = _place(posting.get("jobLocation"))
+            if not location and "TELECOMMUTE" in str(posting.get("jobLocationType", "")).upper():
+                location = "Remote"
+            contact = posting.get("applicationContact")
+            return {
+                "role": _name(posting.get("title")),
+                "company": _name(posting.get("hiringOrganization")),
+                "description": _description_text(_name(posting.get("description"))),
+                "location": location,
+                "recruiter_email": _name(contact.get("email")) if isinstance(contact, dict) else "",
+            }
+    return {}
+
+
+def microdata_fields(page: StructuredPage) -> Dict[str, str]:
+    """
+    Fields of a schema.org JobPosting marked up with microdata.
+    """
+    data = page.microdata
+    location = ", ".join(dict.fromkeys(
+        data[key].strip()
+        for key in (
+            "jobLocation.address.addressLocality",
+            "jobLocation.address.addressRegion",
+            "jobLocation.address.addressCountry",
+        )
+        if data.get(key, "").strip()
+    ))
+    return {
+        "role": data.get("title", ""),
+        "company": data.get("hiringOrganization.name") or data.get("hiringOrganization", ""),
+        "description": _description_text(data.get("description", "")),
+        "location": location or data.get("jobLocation", ""),
+    }
+
+
+def meta_fields(page: StructuredPage) -> Dict[str, str]:
+    """
+    Role, company and location from OpenGraph or Twitter titles of known job boards.
+    """
+    for name in ("og:title", "twitter:title"):
+        title = " ".join(page.meta.get(name, "").split())
+        for pattern in _META_TITLES:
+            match = pattern.match(title)
+            if match:
+                return {field: value for field, value in match.groupdict().items() if value}
+    return {}
+
+
+def regex_fields(page: StructuredPage) -> Dict[str, str]:
+    """
+    The recruiter email: the first mailto: link, or else the first address in the visible text.
+    """
+    for address in [*page.mailtos, *EMAIL.findall(page.text)]:
+        if EMAIL.fullmatch(address) and not _NOT_RECRUITER.search(address):
+            return {"recruiter_email": address}
+    return {}
+
+
+EXTRACTORS: List[Extractor] = [json_ld_fields, microdata_fields, meta_fields, regex_fields]
+
+
+def extract_structured(
+    page_html: str,
+    extractors: Optional[Sequence[Extractor]] = None,
+    min_description_chars: int = 200,
+) -> Dict[str, str]:
+    """
+    Run the extractor chain over a page.
+    Args:
+        page_html (str): The HTML of the page, with its head, where JSON-LD and meta tags usually are.
+        extractors (list): The extractors in order of trust; defaults to EXTRACTORS.
+        min_description_chars (int): Shorter descriptions are teasers, not the posting, and are left out.
+    Returns:
+        dict: The fields found, each from the first extractor that found it.
+    """
+    page = StructuredPage(page_html)
+    fields: Dict[str, str] = {}
+    for extractor in EXTRACTORS if extractors is None else extractors:
+        try:
+            found = extractor(page)
+        except Exception as e:
+            logger.warning(f"Structured data extractor {extractor.__name__} failed: {e}")
+            continue
+        for field, value in found.items():
+            value = value.strip() if field == "description" else " ".join(value.split())
+            if field == "description" and len(value) < min_description_chars:
+                continue
+            if value and field not in fields:
+                fields[field] = value
+                logger.debug(f"Job {field} found by {extractor.__name__}")
+    return fields
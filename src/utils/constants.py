@@ -23,6 +23,9 @@ MINIMUM_LOG_LEVEL = "MINIMUM_LOG_LEVEL"
 USAGE_METADATA = "usage_metadata"
 OUTPUT_TOKENS = "output_tokens"
 INPUT_TOKENS = "input_tokens"
+PLANNED_INPUT_TOKENS = "planned_input_tokens"
+BACKEND = "backend"
+CACHED_INPUT_TOKENS = "cached_input_tokens"
 TOTAL_TOKENS = "total_tokens"
 TOKEN_USAGE = "token_usage"
 
@@ -32,6 +35,10 @@ PROMPTS = "prompts"
 REPLIES = "replies"
 CONTENT = "content"
 TOTAL_COST = "total_cost"
+CACHE = "cache"
+CACHE_HIT = "hit"
+CACHE_HITS = "hits"
+CACHE_MISSES = "misses"
 
 RESPONSE_METADATA = "response_metadata"
 MODEL_NAME = "model_name"
@@ -69,9 +76,17 @@ COVER_LETTER = "cover_letter"
 LLM_MODEL_TYPE = "llm_model_type"
 LLM_API_URL = "llm_api_url"
 LLM_MODEL = "llm_model"
+API_KEY = "api_key"
+TEMPERATURE = "temperature"
 OPENAI = "openai"
 CLAUDE = "claude"
 OLLAMA = "ollama"
 GEMINI = "gemini"
 HUGGINGFACE = "huggingface"
 PERPLEXITY = "perplexity"
+
+TASK_RESUME = "resume"
+TASK_RESUME_JOB_DESCRIPTION = "resume_job_description"
+TASK_COVER_LETTER = "cover_letter"
+TASK_JOB_PARSER = "job_parser"
+TASK_JOB_APPLICATION = "job_application"
@@ -0,0 +1,76 @@
+import pytest
+
+from src.libs import embedding_cache
+from src.libs.embedding_cache import CachedEmbeddings, EmbeddingStore
+
+
+class FakeModel:
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.documents.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), -0.5]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(embedding_cache, "get_embedding_model", lambda model_name: model)
+    return model
+
+
+@pytest.fixture
+def store(tmp_path):
+    return EmbeddingStore(tmp_path / "embeddings.db", max_bytes=2**20)
+
+
+def test_store_round_trips_float32_vectors(tmp_path, store):
+    key = store.key("model", "text")
+    assert key != store.key("other-model", "text")
+    store.put_many("model", [(key, [0.25, -1.5])])
+    assert store.get_many([key, "missing", key]) == {key: [0.25, -1.5]}
+    assert (store.hits, store.misses) == (1, 1)
+
+    reopened = EmbeddingStore(tmp_path / "embeddings.db", max_bytes=2**20)
+    assert reopened.get_many([key]) == {key: [0.25, -1.5]}
+    assert reopened._bytes == 8
+
+
+def test_replacing_a_vector_does_not_count_it_twice(store):
+    store.put_many("model", [("a", [1.0, 2.0])])
+    store.put_many("model", [("a", [3.0, 4.0])])
+    assert store._bytes == 8
+
+
+def test_least_recently_used_vectors_are_evicted(tmp_path):
+    store = EmbeddingStore(tmp_path / "embeddings.db", max_bytes=40)
+    store.put_many("model", [("old", [0.0] * 4)])
+    store.put_many("model", [("used", [1.0] * 4)])
+    store.put_many("model", [("new", [2.0] * 4)])
+    store.get_many(["used"])
+    # A fourth vector of 16 bytes goes over the limit: the least recently used ones go until 90% of it is left
+    store.put_many("model", [("newest", [3.0] * 4)])
+    assert set(store.get_many(["old", "used", "new", "newest"])) == {"used", "newest"}
+    assert store._bytes == 32
+
+
+def test_only_missing_texts_are_embedded(model, store):
+    embeddings = CachedEmbeddings("model", store)
+    assert embeddings.embed_documents(["ab", "abc"]) == [[2.0, 0.5], [3.0, 0.5]]
+    assert embeddings.embed_documents(["abc", "abcd", "ab"]) == [[3.0, 0.5], [4.0, 0.5], [2.0, 0.5]]
+    assert model.documents == [["ab", "abc"], ["abcd"]]
+    assert embeddings.embed_documents([]) == []
+
+
+def test_queries_are_stored_apart_from_documents(model, store):
+    embeddings = CachedEmbeddings("model", store)
+    embeddings.embed_documents(["job title"])
+    assert embeddings.embed_query("job title") == [9.0, -0.5]
+    assert embeddings.embed_query("job title") == [9.0, -0.5]
+    assert model.queries == ["job title"]
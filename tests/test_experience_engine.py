@@ -0,0 +1,119 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from src.libs.experience_engine import (
+    ExperienceIndex,
+    interval_years,
+    merge_intervals,
+    normalize_skill,
+    parse_period,
+    skill_pattern,
+)
+
+TODAY = date(2024, 7, 1)
+
+
+def experience(period, skills=(), position="Engineer", responsibilities=()):
+    return SimpleNamespace(
+        employment_period=period,
+        skills_acquired=list(skills),
+        position=position,
+        key_responsibilities=[{"responsibility": text} for text in responsibilities],
+    )
+
+
+@pytest.fixture
+def index():
+    return ExperienceIndex(
+        [
+            experience("01/2018 - 12/2019", ["Go", "R", "C", "Rust", "REST", "REST APIs", "Python"],
+                       responsibilities=["Ran R&D for the go-to-market team"]),
+            experience("Jan 2019 - Present", ["Python", "Kubernetes"], responsibilities=["Wrote services in Go"]),
+            experience("sometime", ["Java"]),
+        ],
+        today=TODAY,
+    )
+
+
+@pytest.mark.parametrize(
+    "period, interval",
+    [
+        ("06/2019 - Present", (date(2019, 6, 1), TODAY)),
+        ("Feb 2021 – Mar 2022", (date(2021, 2, 1), date(2022, 4, 1))),
+        ("2015-2017", (date(2015, 1, 1), date(2018, 1, 1))),
+        ("2020-03 to 2020-12", (date(2020, 3, 1), date(2021, 1, 1))),
+        ("Present", None),
+        ("", None),
+    ],
+)
+def test_parse_period(period, interval):
+    assert parse_period(period, TODAY) == interval
+
+
+def test_overlapping_intervals_count_once():
+    intervals = [(date(2020, 1, 1), date(2021, 1, 1)), (date(2020, 6, 1), date(2022, 1, 1)), (date(2023, 1, 1), date(2024, 1, 1))]
+    assert merge_intervals(intervals) == [(date(2020, 1, 1), date(2022, 1, 1)), (date(2023, 1, 1), date(2024, 1, 1))]
+    assert round(interval_years(intervals)) == 3
+
+
+def test_normalize_skill():
+    assert normalize_skill(" K8s ") == "kubernetes"
+    assert normalize_skill("Golang") == "go"
+    assert normalize_skill("Machine   Learning") == "machine learning"
+
+
+@pytest.mark.parametrize(
+    "skill, text, found",
+    [
+        ("java", "Java and Spring", True),
+        ("java", "JavaScript", False),
+        ("c", "C++ and C#", False),
+        ("c", "experience with C", True),
+        ("go", "our go-to-market plan", False),
+        ("go", "things go well", False),
+        ("go", "services in Go", True),
+        ("go", "Go developer", True),
+        ("r", "R&D", False),
+        ("r", "statistics in R.", True),
+        ("rust", "rust on the bridge", False),
+        ("rust", "Rust", True),
+        ("node.js", "Node.js services", True),
+    ],
+)
+def test_skill_pattern(skill, text, found):
+    assert bool(skill_pattern(skill).search(text)) is found
+
+
+def test_years_count_parallel_jobs_once(index):
+    assert index.years_for("python") == pytest.approx(interval_years([(date(2018, 1, 1), TODAY)]))
+    assert index.years_for("java") is None
+    assert round(index.total_years(), 1) == 6.5
+
+
+def test_skills_named_in_other_jobs_count_for_them(index):
+    # 'Go' is in the skills of the first job and written "in Go" in the responsibilities of the second
+    assert index.answer("How many years of experience with Go?") == "6"
+    assert index.answer("Years with golang?") == "6"
+
+
+@pytest.mark.parametrize(
+    "question, answer",
+    [
+        ("Years of experience with Kubernetes?", "5"),
+        ("How many years of experience do you have in R?", "2"),
+        ("Years of C experience?", "2"),
+        ("Years of experience with REST APIs?", "2"),
+        ("How many years of work experience do you have?", "6"),
+        # Not about Go or R: the question is left to the LLM
+        ("How many years of go-to-market experience do you have?", None),
+        ("How many years of R&D experience do you have?", None),
+        # Unknown or several skills are for the LLM to weigh
+        ("Years of experience with Scala?", None),
+        ("Years of experience with Python and Kubernetes?", None),
+        ("Are you willing to relocate?", None),
+    ],
+)
+def test_answer(index, question, answer):
+    assert index.answer(question) == answer
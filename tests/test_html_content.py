@@ -0,0 +1,71 @@
+from src.libs.html_content import ContentReport, extract_main_content, html_to_text, page_body
+
+DESCRIPTION = (
+    "<p>We are looking for a backend engineer to design, build and run the services behind our payments platform, "
+    "working closely with product, data and infrastructure teams.</p>"
+    "<ul><li>Five years of experience with Python, PostgreSQL and Kubernetes</li>"
+    "<li>Experience operating services in production, with on-call, monitoring and incident reviews</li></ul>"
+    "<p>We offer a hybrid setup in Berlin, a learning budget, and thirty days of paid leave every year.</p>"
+)
+
+
+def page(body, head="<title>Backend Engineer - Acme</title>"):
+    return f"<html><head>{head}<script>var tracking = 1;</script></head><body>{body}</body></html>"
+
+
+def test_main_content_drops_boilerplate():
+    html = page(
+        '<nav class="menu"><a href="/">Home</a><a href="/jobs">Jobs</a></nav>'
+        '<div class="cookie-banner">We use cookies to improve your experience, accept all cookies?</div>'
+        '<div class="header"><h1>Backend Engineer</h1><span>Acme GmbH</span> <span>Berlin, Germany</span></div>'
+        f'<div class="job-description">{DESCRIPTION}</div>'
+        '<footer>Imprint, privacy policy and terms of service of Acme GmbH, all rights reserved.</footer>'
+        '<style>.x { color: red }</style>'
+    )
+    text, report = extract_main_content(html, min_chars=100)
+    assert report.used_main_content
+    assert text.startswith("Backend Engineer - Acme\nBackend Engineer\nAcme GmbH Berlin, Germany\n")
+    assert "- Five years of experience with Python, PostgreSQL and Kubernetes" in text
+    for boilerplate in ("Home", "cookies", "Imprint", "tracking", "color"):
+        assert boilerplate not in text
+    assert report.text_tokens < report.html_tokens
+
+
+def test_page_wrapped_in_a_form_keeps_its_content():
+    html = page(
+        '<form method="post" action="./Job.aspx" id="aspnetForm">'
+        '<input type="hidden" name="__VIEWSTATE" value="dDwtMTA4MzE0MjEwNTs7Pg==" />'
+        f'<div id="ctl00_content"><h1>Backend Engineer</h1><div class="jobDetails">{DESCRIPTION}</div></div>'
+        '<input type="submit" value="Apply now" /><select name="country"><option>Germany</option></select>'
+        "</form>"
+    )
+    text, report = extract_main_content(html, min_chars=100)
+    assert report.used_main_content
+    assert "payments platform" in text and "thirty days of paid leave" in text
+    assert "Apply now" not in text and "__VIEWSTATE" not in text and "Germany</option>" not in text
+
+
+def test_fallback_keeps_visible_text_of_misjudged_containers():
+    # Too short to be trusted as main content, and inside a container whose class looks like a sidebar
+    html = page('<div class="sidebar"><p>Backend Engineer, Berlin</p></div><div style="display:none">Hidden</div>')
+    text, report = extract_main_content(html, min_chars=250)
+    assert not report.used_main_content
+    assert text == "Backend Engineer - Acme\nBackend Engineer, Berlin"
+
+
+def test_html_to_text():
+    fragment = "<p>Build <b>APIs</b></p><ul><li>Python</li><li>Go</li></ul><script>x()</script>Remote&nbsp;OK"
+    assert html_to_text(fragment) == "Build APIs\n- Python\n- Go\nRemote OK"
+
+
+def test_chunk_counts():
+    assert ContentReport.chunks(0) == 0
+    assert ContentReport.chunks(400) == 1
+    assert ContentReport.chunks(1000) == 3
+
+
+def test_page_body_drops_the_head():
+    assert page_body(page("<p>Hello</p>")) == "<body><p>Hello</p></body>"
+    body = '<BODY class="x">\n<p>Hi</p>\n</BODY >'
+    assert page_body(f"<HTML><HEAD><meta charset='utf-8'></HEAD>{body}</HTML>") == body
+    assert page_body("<div>fragment</div>") == "<div>fragment</div>"
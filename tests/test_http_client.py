@@ -0,0 +1,33 @@
+import asyncio
+
+import httpx
+
+from src.libs import http_client
+
+
+def test_each_event_loop_gets_its_own_pool_closed_with_the_loop(monkeypatch):
+    created = []
+
+    def client_options():
+        created.append(httpx.MockTransport(lambda request: httpx.Response(200, text=request.url.path)))
+        return {"transport": created[-1]}
+
+    monkeypatch.setattr(http_client, "_client_options", client_options)
+    client = http_client.get_async_http_client()
+
+    async def fetch_twice():
+        first = await client.get("https://llm.test/one")
+        loop_client = http_client._loop_clients[asyncio.get_running_loop()][0]
+        second = await client.get("https://llm.test/two")
+        assert http_client._loop_clients[asyncio.get_running_loop()][0] is loop_client
+        return [first.text, second.text], loop_client
+
+    texts, first_loop_client = asyncio.run(fetch_twice())
+    assert texts == ["/one", "/two"]
+    assert first_loop_client.is_closed
+
+    _, second_loop_client = asyncio.run(fetch_twice())
+    assert second_loop_client is not first_loop_client
+    assert second_loop_client.is_closed
+    assert len(created) == 2
+    assert not client.is_closed
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.libs.job_ranker import JobRanker, resume_profile_text, resume_skills
+
+TOPICS = ["python", "kubernetes", "backend", "cooking", "sales"]
+calls = []
+
+
+def embed_documents(texts):
+    calls.append(list(texts))
+    return [[text.lower().count(topic) for topic in TOPICS] for text in texts]
+
+
+RESUME = SimpleNamespace(
+    experience_details=[
+        SimpleNamespace(position="Backend Engineer", skills_acquired=["Python", "Kubernetes", "Go"]),
+        SimpleNamespace(position="Intern", skills_acquired=["python", "K8s"]),
+    ],
+    education_details=[SimpleNamespace(education_level="Master's", field_of_study="Computer Science")],
+    projects=[SimpleNamespace(name="Scheduler", description="Cron for Kubernetes")],
+)
+
+
+def job(role, description):
+    return SimpleNamespace(role=role, description=description)
+
+
+@pytest.fixture
+def ranker():
+    calls.clear()
+    ranker = JobRanker("test", skills_weight=0.5, accept_score=0.7, reject_score=0.3, embed_documents=embed_documents)
+    ranker.set_resume(RESUME)
+    return ranker
+
+
+def test_resume_skills_are_distinct_after_normalization():
+    assert resume_skills(RESUME) == ["Python", "Kubernetes", "Go"]
+
+
+def test_resume_profile_text():
+    assert resume_profile_text(RESUME).splitlines() == [
+        "Positions: Backend Engineer, Intern",
+        "Skills: Python, Kubernetes, Go",
+        "Education: Master's Computer Science",
+        "Project: Scheduler. Cron for Kubernetes",
+    ]
+
+
+def test_rank_orders_by_similarity_and_skills(ranker):
+    backend = job("Backend Engineer", "Python services on Kubernetes, written in Go")
+    marketing = job("Sales lead", "Sales for our go-to-market team")
+    ranked = ranker.rank([marketing, backend])
+    assert [item.job for item in ranked] == [backend, marketing]
+    assert ranked[0].matched_skills == ["Python", "Kubernetes", "Go"]
+    assert ranked[1].matched_skills == []
+    assert ranked[1].similarity == pytest.approx(0.0)
+
+
+def test_job_texts_are_embedded_once(ranker):
+    jobs = [job("Backend Engineer", "Python"), job("Cook", "Cooking")]
+    ranker.rank(jobs)
+    ranker.rank(jobs + [job("Sales", "Sales")])
+    # The resume, the first two jobs, then only the new job
+    assert [len(texts) for texts in calls] == [1, 2, 1]
+
+
+def test_screen_asks_the_llm_only_about_borderline_jobs(ranker):
+    clear = job("Backend Engineer", "Python backend on Kubernetes")
+    borderline = job("Backend Engineer", "Python, plus cooking, cooking and sales")
+    unrelated = job("Chef", "Cooking")
+    asked = []
+
+    def llm_scorer(job):
+        asked.append(job)
+        return 8
+
+    ranked = {item.job.description: item for item in ranker.screen([unrelated, borderline, clear], llm_scorer, 7)}
+    assert asked == [borderline]
+    assert ranked[clear.description].suitable is True
+    assert ranked[borderline.description].suitable is True
+    assert ranked[borderline.description].llm_score == 8
+    assert ranked[unrelated.description].suitable is False
+
+
+def test_screen_keeps_the_top_jobs(ranker):
+    jobs = [job("Chef", "Cooking"), job("Backend Engineer", "Python backend on Kubernetes")]
+    ranked = ranker.screen(jobs, lambda job: None, 7, top_n=1)
+    assert [item.job for item in ranked] == [jobs[1]]
+
+
+def test_rank_requires_a_resume():
+    with pytest.raises(ValueError):
+        JobRanker("test", 0.5, 0.7, 0.3, embed_documents=embed_documents).rank([job("Chef", "Cooking")])
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.libs.job_summary_cache import JobSummaryCache, normalize_description
+
+TEMPLATE = "Summarize this job: {text}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return JobSummaryCache(tmp_path / "summaries.db", memory_entries=2)
+
+
+def test_normalize_description():
+    assert normalize_description("  Senior\n\tEngineer   wanted ") == "Senior Engineer wanted"
+    assert normalize_description(None) == ""
+
+
+def test_key_depends_on_model_template_and_description():
+    key = JobSummaryCache.key("Engineer wanted", "gpt-4o-mini", TEMPLATE)
+    assert key == JobSummaryCache.key(" Engineer\nwanted ", "gpt-4o-mini", TEMPLATE)
+    assert key != JobSummaryCache.key("Engineer wanted", "gpt-4o", TEMPLATE)
+    assert key != JobSummaryCache.key("Engineer wanted", "gpt-4o-mini", "Summarize briefly: {text}")
+    assert key != JobSummaryCache.key("Chef wanted", "gpt-4o-mini", TEMPLATE)
+
+
+def test_summaries_persist_beyond_the_memory_tier(tmp_path, cache):
+    for index in range(3):
+        cache.put(f"Job {index}", "model", TEMPLATE, f"Summary {index}")
+    assert len(cache._memory) == 2
+    reopened = JobSummaryCache(tmp_path / "summaries.db", memory_entries=2)
+    assert reopened.get("Job 0", "model", TEMPLATE) == "Summary 0"
+    assert reopened.get("Job 0", "model", "Other template") is None
+    assert (reopened.hits, reopened.misses) == (1, 1)
+
+
+def test_get_or_create_summarizes_once(cache):
+    summarize_calls = []
+
+    def summarize(description):
+        summarize_calls.append(description)
+        return description.upper()
+
+    assert cache.get_or_create("Engineer wanted", "model", TEMPLATE, summarize) == "ENGINEER WANTED"
+    assert cache.get_or_create("Engineer  wanted", "model", TEMPLATE, summarize) == "ENGINEER WANTED"
+    assert summarize_calls == ["Engineer wanted"]
+
+
+def test_concurrent_callers_wait_for_the_first_summary(cache):
+    summarize_calls = []
+
+    def summarize(description):
+        summarize_calls.append(description)
+        time.sleep(0.05)
+        return "summary"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_create("Job", "model", TEMPLATE, summarize)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["summary"] * 8
+    assert len(summarize_calls) == 1
+    assert cache._key_locks == {}
+
+
+def test_concurrent_async_callers_wait_for_the_first_summary(cache):
+    summarize_calls = []
+
+    async def summarize(description):
+        summarize_calls.append(description)
+        await asyncio.sleep(0.05)
+        return "summary"
+
+    async def main():
+        return await asyncio.gather(*(cache.aget_or_create("Job", "model", TEMPLATE, summarize) for _ in range(8)))
+
+    assert asyncio.run(main()) == ["summary"] * 8
+    assert len(summarize_calls) == 1
+
+
+def test_failed_summary_releases_the_key(cache):
+    def fail(description):
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_create("Job", "model", TEMPLATE, fail)
+    assert cache._key_locks == {}
+    assert cache.get_or_create("Job", "model", TEMPLATE, lambda description: "summary") == "summary"
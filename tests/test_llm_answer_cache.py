@@ -0,0 +1,68 @@
+import pytest
+
+from src.libs.llm_answer_cache import SemanticAnswerCache, normalize_question, question_entities
+
+SKILLS = frozenset({"react", "vue", "python", "c++"})
+
+
+def embed(text):
+    """Bag of words that ignores skill names, so questions about different skills embed alike."""
+    words = [word for word in text.split() if word not in SKILLS]
+    return [words.count(word) for word in ("years", "experience", "with", "salary", "expected")]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SemanticAnswerCache(tmp_path / "answers.db", similarity=0.9, embedding_model="test", embed=embed)
+
+
+def test_normalize_question():
+    assert normalize_question("Years of C++ experience? *") == "years of c++ experience"
+    assert normalize_question("Node.js experience (required).") == "node.js experience"
+
+
+@pytest.mark.parametrize(
+    "question, vocabulary, entities",
+    [
+        ("Years of Python experience?", frozenset(), {"python"}),
+        ("Do you know AWS and C#?", frozenset(), {"aws", "c#"}),
+        ("Years with react?", frozenset(), set()),
+        ("Years with react?", SKILLS, {"react"}),
+        ("Years with REACT?", SKILLS, {"react"}),
+        ("How much c++ have you written?", SKILLS, {"c++"}),
+    ],
+)
+def test_question_entities(question, vocabulary, entities):
+    assert question_entities(question, vocabulary) == entities
+
+
+def test_similar_question_reuses_the_answer(cache):
+    cache.store("Years of experience with Python?", "numeric", "profile", "5")
+    assert cache.lookup("years experience with python", "numeric", ["profile"], SKILLS) == "5"
+    assert cache.lookup("Years of experience with Python?", "textual", ["profile"], SKILLS) is None
+    assert cache.lookup("Years of experience with Python?", "numeric", ["other"], SKILLS) is None
+
+
+@pytest.mark.parametrize(
+    "cached, asked",
+    [("Years with react?", "Years with Vue?"), ("Years with React?", "years with vue"), ("Years with react?", "years with vue")],
+)
+def test_questions_about_different_skills_never_share_answers(cache, cached, asked):
+    cache.store(cached, "numeric", "profile", "4")
+    assert cache.lookup(asked, "numeric", ["profile"], SKILLS) is None
+    assert cache.lookup("years with REACT", "numeric", ["profile"], SKILLS) == "4"
+
+
+def test_answers_persist(tmp_path, cache):
+    cache.store("Expected salary?", "numeric", "profile", "90000")
+    reopened = SemanticAnswerCache(tmp_path / "answers.db", similarity=0.9, embedding_model="test", embed=embed)
+    assert reopened.lookup("expected salary", "numeric", ["profile"]) == "90000"
+    assert reopened.stats() == {"hits": 1, "misses": 0}
+
+
+def test_scopes():
+    profile = SemanticAnswerCache.profile_scope({"name": "Ada"}, {"notice": "2 weeks"})
+    assert profile == SemanticAnswerCache.profile_scope({"name": "Ada"}, {"notice": "2 weeks"})
+    assert profile != SemanticAnswerCache.profile_scope({"name": "Ada"}, {"notice": "1 month"})
+    assert SemanticAnswerCache.job_scope(profile, "https://jobs/1").startswith(f"{profile}:")
+    assert SemanticAnswerCache.job_scope(profile, "https://jobs/1") != SemanticAnswerCache.job_scope(profile, "https://jobs/2")
@@ -0,0 +1,102 @@
+import json
+
+from src.libs.llm_batch import (
+    CHAT_COMPLETIONS_ENDPOINT,
+    BatchBackend,
+    BatchCheckpoint,
+    BatchRunner,
+    LocalFileBatchBackend,
+    batch_line,
+    parse_batch_output,
+)
+
+
+class FlakyBackend(BatchBackend):
+    """Local backend whose first batch stays in progress for a few polls and fails one request."""
+
+    def __init__(self, directory):
+        self.local = LocalFileBatchBackend(directory, responder=lambda body: body["messages"][0]["content"].upper())
+        self.submitted = []
+        self.polls = 0
+
+    def submit(self, batch_file):
+        self.submitted.append([json.loads(line)["custom_id"] for line in batch_file.read_text().splitlines()])
+        return self.local.submit(batch_file)
+
+    def status(self, batch_id):
+        self.polls += 1
+        return "in_progress" if self.polls < 3 else self.local.status(batch_id)
+
+    def results(self, batch_id):
+        results = self.local.results(batch_id)
+        if len(self.submitted) == 1:
+            results["b"] = {"error": "server_error"}
+        return results
+
+
+def runner(tmp_path, backend):
+    return BatchRunner(backend, BatchCheckpoint(tmp_path / "checkpoint.json"), tmp_path / "work", poll_interval=0)
+
+
+def test_batch_line():
+    line = batch_line("job-1", "Summarize", "gpt-4o-mini", 0.4)
+    assert line == {
+        "custom_id": "job-1",
+        "method": "POST",
+        "url": CHAT_COMPLETIONS_ENDPOINT,
+        "body": {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Summarize"}], "temperature": 0.4},
+    }
+    assert "temperature" not in batch_line("job-1", "Summarize", "o1-mini", None)["body"]
+
+
+def test_parse_batch_output():
+    lines = [
+        {"custom_id": "ok", "response": {"status_code": 200, "body": {
+            "choices": [{"message": {"content": "answer"}}], "usage": {"prompt_tokens": 3},
+        }}, "error": None},
+        {"custom_id": "rejected", "response": {"status_code": 400, "body": {"error": {"message": "bad"}}}, "error": None},
+        {"custom_id": "expired", "response": None, "error": {"code": "batch_expired"}},
+    ]
+    results = parse_batch_output("\n".join(json.dumps(line) for line in lines) + "\n\n")
+    assert results["ok"] == {"content": "answer", "usage": {"prompt_tokens": 3}}
+    assert "bad" in results["rejected"]["error"]
+    assert "batch_expired" in results["expired"]["error"]
+
+
+def test_runner_polls_until_done_and_resubmits_only_failed_requests(tmp_path):
+    backend = FlakyBackend(tmp_path / "backend")
+    lines = [batch_line(custom_id, custom_id, "gpt-4o-mini", None) for custom_id in "abc"]
+
+    assert runner(tmp_path, backend).run("summaries", lines) == {"a": "A", "c": "C"}
+    assert backend.polls == 3
+
+    # A restarted run reads the checkpoint and only pays for the failed request
+    assert runner(tmp_path, backend).run("summaries", lines) == {"a": "A", "b": "B", "c": "C"}
+    assert backend.submitted == [["a", "b", "c"], ["b"]]
+
+
+def test_runner_resumes_the_batch_in_flight(tmp_path):
+    backend = LocalFileBatchBackend(tmp_path / "backend")
+    lines = [batch_line("a", "hello", "gpt-4o-mini", None)]
+    checkpoint = BatchCheckpoint(tmp_path / "checkpoint.json")
+    batch_file = tmp_path / "summaries.jsonl"
+    batch_file.write_text(json.dumps(lines[0]) + "\n")
+    checkpoint.data["batches"]["summaries"] = backend.submit(batch_file)
+    checkpoint.save()
+
+    class NoSubmit(LocalFileBatchBackend):
+        def submit(self, batch_file):
+            raise AssertionError("the batch in flight must not be submitted again")
+
+    assert runner(tmp_path, NoSubmit(tmp_path / "backend")).run("summaries", lines) == {"a": "hello"}
+    assert BatchCheckpoint(tmp_path / "checkpoint.json").data["batches"] == {}
+
+
+def test_checkpoint_marks_items_done(tmp_path):
+    checkpoint = BatchCheckpoint(tmp_path / "checkpoint.json")
+    checkpoint.mark_done("job-1")
+    checkpoint.mark_done("job-1")
+    reloaded = BatchCheckpoint(tmp_path / "checkpoint.json")
+    assert reloaded.is_done("job-1")
+    assert reloaded.data["done"] == ["job-1"]
+    assert not reloaded.is_done("job-2")
@@ -0,0 +1,91 @@
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.prompt_values import StringPromptValue
+
+from src.libs.llm_cache import LLMResponseCache, model_identity, render_prompt
+
+
+def make_cache(tmp_path, **overrides):
+    settings = dict(ttl_seconds=0, max_entries=100, max_bytes=1_000_000, memory_entries=10)
+    settings.update(overrides)
+    return LLMResponseCache(tmp_path / "cache.sqlite", **settings)
+
+
+def test_key_depends_on_model_temperature_and_prompt():
+    key = LLMResponseCache.make_key("gpt-4o-mini", 0.4, "prompt")
+    assert key == LLMResponseCache.make_key("gpt-4o-mini", 0.4, "prompt")
+    assert key != LLMResponseCache.make_key("gpt-4o", 0.4, "prompt")
+    assert key != LLMResponseCache.make_key("gpt-4o-mini", 0.7, "prompt")
+    assert key != LLMResponseCache.make_key("gpt-4o-mini", 0.4, "prompt ")
+
+
+def test_render_prompt():
+    assert render_prompt(StringPromptValue(text="hello")) == "hello"
+    assert render_prompt([HumanMessage(content="hi"), AIMessage(content="yo")]) == "human: hi\nai: yo"
+    assert render_prompt("plain") == "plain"
+
+
+def test_model_identity_unwraps_adapters():
+    class Chat:
+        model_name = "gpt-4o-mini"
+        temperature = 0.2
+
+    class Adapter:
+        def __init__(self, model):
+            self.model = model
+
+    assert model_identity(Adapter(Adapter(Chat()))) == ("gpt-4o-mini", 0.2)
+
+
+def test_put_get_and_persistence(tmp_path):
+    cache = make_cache(tmp_path)
+    key = cache.make_key("m", 0.0, "p")
+    assert cache.get(key) is None
+    cache.put(key, {"content": "answer"})
+    assert cache.get(key) == {"content": "answer"}
+    assert cache.stats() == {"hits": 1, "misses": 1}
+
+    reopened = make_cache(tmp_path)
+    assert reopened.get(key) == {"content": "answer"}
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    key = cache.make_key("m", 0.0, "p")
+    cache.put(key, {"content": "answer"})
+    cache._conn.execute("UPDATE responses SET created_at = ?", (time.time() - 120,))
+    cache._memory.clear()
+    assert cache.get(key) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    keys = [cache.make_key("m", 0.0, str(index)) for index in range(3)]
+    cache.put(keys[0], {"content": "0"})
+    cache.put(keys[1], {"content": "1"})
+    cache._conn.execute("UPDATE responses SET accessed_at = accessed_at - 10 WHERE key = ?", (keys[0],))
+    cache.put(keys[2], {"content": "2"})
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) == {"content": "1"}
+    assert cache.get(keys[2]) == {"content": "2"}
+
+
+def test_memory_hits_keep_entries_from_disk_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    keys = [cache.make_key("m", 0.0, str(index)) for index in range(3)]
+    cache.put(keys[0], {"content": "0"})
+    cache.put(keys[1], {"content": "1"})
+    cache._conn.execute("UPDATE responses SET accessed_at = accessed_at - 10 WHERE key = ?", (keys[0],))
+    # Served from memory: the disk access time must follow, or the hot entry is evicted first
+    assert cache.get(keys[0]) == {"content": "0"}
+    cache.put(keys[2], {"content": "2"})
+    assert cache.get(keys[0]) == {"content": "0"}
+    assert cache._conn.execute("SELECT COUNT(*) FROM responses WHERE key = ?", (keys[1],)).fetchone()[0] == 0
+
+
+def test_to_message():
+    message = LLMResponseCache.to_message({"content": "hi", "id": "1", "response_metadata": {"a": 1}})
+    assert isinstance(message, AIMessage)
+    assert message.content == "hi"
+    assert message.response_metadata == {"a": 1}
@@ -0,0 +1,85 @@
+import httpx
+import pytest
+
+from src.libs.llm_circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker, is_retryable
+from src.libs.llm_models import ClaudeModel, OllamaModel, OpenAIModel
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = httpx.Response(status_code)
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+@pytest.mark.parametrize(
+    "error, retryable",
+    [
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(400), False),
+        (StatusError(401), False),
+        (APIConnectionError(), True),
+        (httpx.ConnectTimeout("slow"), True),
+        (KeyError("content"), False),
+    ],
+)
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_timeout=60)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_neutral_outcome_keeps_failures_and_releases_the_probe():
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_timeout=0)
+    breaker.record_failure()
+    breaker.record_neutral()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.before_call()
+    breaker.record_neutral()
+    # The probe was answered with a fatal error: the next call may probe again
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def test_breakers_are_shared_per_name():
+    assert get_circuit_breaker("openai/a") is get_circuit_breaker("openai/a")
+    assert get_circuit_breaker("openai/a") is not get_circuit_breaker("ollama/a")
+
+
+def test_models_know_their_provider():
+    assert OpenAIModel("sk-test", "gpt-4o-mini").provider == "openai"
+    assert ClaudeModel("sk-test", "claude-3-haiku").provider == "claude"
+    assert OllamaModel("llama3", "").provider == "ollama"
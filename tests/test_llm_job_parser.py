@@ -0,0 +1,164 @@
+import json
+import re
+
+import pytest
+
+pytest.importorskip("lib_resume_builder_AIHawk")
+
+from src.libs.resume_and_cover_builder.llm import llm_job_parser
+from src.libs.resume_and_cover_builder.llm.llm_job_parser import LLMParser
+
+FIELDS = list(LLMParser.EXTRACTION_FIELDS)
+
+
+class FakeLLM:
+    """Chat model stand-in that answers each kind of extraction prompt with a canned reply."""
+
+    model_name = "fake-model"
+
+    def __init__(self, pack_reply=None, all_reply=None):
+        self.pack_reply = pack_reply or (lambda job_ids: "not json")
+        self.all_reply = all_reply or (lambda page: json.dumps({field: f"{field} of {page}" for field in FIELDS}))
+        self.prompts = []
+
+    def __call__(self, prompt_value):
+        text = prompt_value.to_string()
+        self.prompts.append(text)
+        if "### Job" in text:
+            return self.pack_reply(re.findall(r"### Job (\d+)", text))
+        if "Schema:" in text:
+            return self.all_reply(re.search(r"Context: page (\S+)", text).group(1))
+        return "single " + re.search(r"Context: context for (.+)", text).group(1)
+
+
+@pytest.fixture
+def make_parser(monkeypatch):
+    monkeypatch.setattr(llm_job_parser.cfg, "LLM_STRUCTURED_EXTRACTION", False)
+
+    def make_parser(llm):
+        parser = object.__new__(LLMParser)
+        parser.llm = llm
+        parser.vectorstore = None
+        parser.body_html = None
+        parser.structured_fields = {}
+        # Retrieval is replaced by the page name, so replies can tell the jobs apart
+        parser._shared_context = lambda fields=None: f"page {parser.body_html}"
+        parser._retrieve_context = lambda query, top_k=3: f"context for {query}"
+        return parser
+
+    return make_parser
+
+
+def test_parse_extraction_reply_reads_json_wrapped_in_prose():
+    reply = 'Here are the fields:\n```json\n{"role": " Engineer ", "company": "Acme", "extra": "x"}\n```\nDone.'
+    assert LLMParser.parse_extraction_reply(reply) == {"role": "Engineer", "company": "Acme"}
+
+
+def test_parse_extraction_reply_drops_empty_and_non_string_fields():
+    reply = json.dumps({"role": "  ", "company": 3, "description": "Build things", "location": None})
+    assert LLMParser.parse_extraction_reply(reply) == {"description": "Build things"}
+
+
+@pytest.mark.parametrize("reply", ["No fields found.", "[1, 2]", '["role", {"role"}]'])
+def test_parse_extraction_reply_rejects_replies_without_an_object(reply):
+    with pytest.raises(ValueError):
+        LLMParser.parse_extraction_reply(reply)
+
+
+def test_extract_all_uses_one_call_when_the_reply_is_complete(make_parser):
+    llm = FakeLLM()
+    parser = make_parser(llm)
+    parser.body_html = "a"
+    assert parser.extract_all() == {field: f"{field} of a" for field in FIELDS}
+    assert len(llm.prompts) == 1
+
+
+def test_extract_all_falls_back_per_field(make_parser):
+    reply = 'Sure! {"role": "Engineer", "company": "Acme", "description": "", "location": 42} Hope this helps.'
+    llm = FakeLLM(all_reply=lambda page: reply)
+    parser = make_parser(llm)
+    parser.body_html = "a"
+    assert parser.extract_all() == {
+        "role": "Engineer",
+        "company": "Acme",
+        "description": "single Job description",
+        "location": "single Location",
+    }
+    assert len(llm.prompts) == 3
+
+
+def test_extract_all_extracts_every_field_separately_when_the_reply_is_not_an_object(make_parser):
+    llm = FakeLLM(all_reply=lambda page: '["Engineer", "Acme"]')
+    parser = make_parser(llm)
+    parser.body_html = "a"
+    fields = parser.extract_all()
+    assert fields == {field: f"single {LLMParser.EXTRACTION_FIELDS[field][1]}" for field in FIELDS}
+    assert len(llm.prompts) == 1 + len(FIELDS)
+
+
+def test_extract_all_skips_the_llm_for_structured_fields(make_parser):
+    llm = FakeLLM()
+    parser = make_parser(llm)
+    parser.body_html = "a"
+    parser.structured_fields = {field: "structured" for field in FIELDS}
+    assert parser.extract_all() == {field: "structured" for field in FIELDS}
+    assert llm.prompts == []
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(llm_job_parser, "count_tokens", lambda text, model_name: len(text.split()))
+    monkeypatch.setattr(llm_job_parser, "template_tokens", lambda template, model_name: 100)
+
+
+def test_pack_jobs_respects_the_token_budget(make_parser, word_tokens, monkeypatch):
+    monkeypatch.setattr(llm_job_parser.cfg, "LLM_BULK_EXTRACTION_MAX_JOBS", 10)
+    texts = {f"job{index}": "word " * 140 for index in range(5)}
+    # Each job costs 140 + 60 tokens on top of the 100 token template
+    assert make_parser(FakeLLM())._pack_jobs(texts, token_budget=500) == [
+        ["job0", "job1"], ["job2", "job3"], ["job4"],
+    ]
+    # A job larger than the budget still gets a pack of its own
+    assert make_parser(FakeLLM())._pack_jobs(texts, token_budget=200) == [[link] for link in texts]
+
+
+def test_pack_jobs_respects_the_job_limit(make_parser, word_tokens, monkeypatch):
+    monkeypatch.setattr(llm_job_parser.cfg, "LLM_BULK_EXTRACTION_MAX_JOBS", 3)
+    texts = {f"job{index}": "word" for index in range(7)}
+    packs = make_parser(FakeLLM())._pack_jobs(texts, token_budget=100_000)
+    assert packs == [["job0", "job1", "job2"], ["job3", "job4", "job5"], ["job6"]]
+
+
+def test_malformed_pack_reply_splits_down_to_single_job_extraction(make_parser):
+    llm = FakeLLM(pack_reply=lambda job_ids: "I could not read these postings.")
+    parser = make_parser(llm)
+    pages = {link: link for link in ("a", "b", "c")}
+    results = parser._extract_pack(pages, {link: f"text {link}" for link in pages}, list(pages))
+
+    assert results == {link: {field: f"{field} of {link}" for field in FIELDS} for link in pages}
+    pack_sizes = [len(re.findall(r"### Job \d+", prompt)) for prompt in llm.prompts if "### Job" in prompt]
+    assert pack_sizes == [3, 2]
+
+
+def test_partially_empty_pack_items_are_filled_per_field(make_parser):
+    def pack_reply(job_ids):
+        return json.dumps({
+            "1": {"role": "Engineer", "company": "Acme", "description": "Build", "location": "Berlin"},
+            "2": {"role": "Designer", "company": "", "description": "Draw", "location": ""},
+            # Without a description the item is unusable and its job is extracted on its own
+            "3": {"role": "Manager", "company": "Initech", "description": "", "location": "Austin"},
+        })
+
+    llm = FakeLLM(pack_reply=pack_reply)
+    parser = make_parser(llm)
+    pages = {link: link for link in ("a", "b", "c")}
+    results = parser._extract_pack(pages, {link: f"text {link}" for link in pages}, list(pages))
+
+    assert results["a"] == {"role": "Engineer", "company": "Acme", "description": "Build", "location": "Berlin"}
+    assert results["b"] == {
+        "role": "Designer",
+        "company": "single Company name",
+        "description": "Draw",
+        "location": "single Location",
+    }
+    assert results["c"] == {field: f"{field} of c" for field in FIELDS}
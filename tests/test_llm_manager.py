@@ -0,0 +1,154 @@
+import time
+
+import pytest
+from langchain_core.messages.ai import AIMessage
+
+pytest.importorskip("ai_hawk.llm.prompts")
+
+import config as cfg
+from src.libs import llm_manager
+from src.libs.llm_cache import LLMResponseCache
+from src.libs.llm_manager import AIAdapter, LatencyTracker, LLMBackend, LLMLogger, LoggerChatModel
+
+
+class SleepyModel:
+    """Chat model that answers with its own name, or raises, after a fixed delay."""
+
+    def __init__(self, model_name, delay=0.0, error=None):
+        self.model_name = model_name
+        self.delay = delay
+        self.error = error
+
+    def invoke(self, prompt):
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        usage_metadata = {"input_tokens": 3, "output_tokens": 2, "total_tokens": 5}
+        return AIMessage(content=self.model_name, usage_metadata=usage_metadata)
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.acquired = []
+        self.succeeded = []
+
+    def acquire(self, estimated_tokens):
+        self.acquired.append(estimated_tokens)
+
+    def record_success(self, estimated_tokens, actual_tokens=None, headers=None):
+        self.succeeded.append(actual_tokens)
+
+    def backoff(self, err, attempt):
+        return 0.0
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(llm_manager, "get_rate_limiter", lambda: limiter)
+    return limiter
+
+
+def make_adapter(monkeypatch, *models):
+    backends = [LLMBackend(model.model_name, model, cfg.LLM_LATENCY_WINDOW) for model in models]
+    monkeypatch.setattr(AIAdapter, "_create_backends", lambda self, config, api_key: backends)
+    return AIAdapter({}, "")
+
+
+def warm_up(backend, latency, samples=None):
+    for _ in range(cfg.LLM_HEDGE_MIN_SAMPLES if samples is None else samples):
+        backend.tracker.record(latency, success=True)
+
+
+def test_latency_tracker_percentiles_and_error_rate():
+    tracker = LatencyTracker(window=4)
+    assert tracker.p95 is None and tracker.error_rate == 0.0
+    for latency in (0.4, 0.1, 0.3, 0.2):
+        tracker.record(latency, success=True)
+    tracker.record(5.0, success=False)
+    assert tracker.samples == 4
+    assert tracker.p50 == 0.3
+    assert tracker.p95 == 0.4
+    assert tracker.error_rate == 0.25
+
+
+def test_ranked_backends_move_failing_backends_to_the_back(monkeypatch):
+    adapter = make_adapter(monkeypatch, SleepyModel("a"), SleepyModel("b"), SleepyModel("c"))
+    assert [backend.name for backend in adapter._ranked_backends()] == ["a", "b", "c"]
+    for _ in range(3):
+        adapter.backends[0].tracker.record(1.0, success=False)
+    assert [backend.name for backend in adapter._ranked_backends()] == ["b", "c", "a"]
+
+
+def test_no_hedge_without_enough_latency_samples(monkeypatch, limiter):
+    adapter = make_adapter(monkeypatch, SleepyModel("slow", delay=0.2), SleepyModel("fast"))
+    warm_up(adapter.backends[0], 0.01, samples=cfg.LLM_HEDGE_MIN_SAMPLES - 1)
+
+    assert adapter.invoke("prompt").content == "slow"
+    assert adapter.hedges_sent == 0
+    assert len(limiter.acquired) == 1
+
+
+def test_hedge_fires_after_p95_and_the_first_answer_wins(monkeypatch, limiter):
+    adapter = make_adapter(monkeypatch, SleepyModel("slow", delay=0.5), SleepyModel("fast"))
+    warm_up(adapter.backends[0], 0.05)
+
+    started_at = time.monotonic()
+    reply = adapter.invoke("prompt")
+
+    assert reply.content == "fast"
+    assert reply.response_metadata["backend"] == "fast"
+    assert time.monotonic() - started_at < 0.4
+    assert (adapter.hedges_sent, adapter.hedges_won) == (1, 1)
+    # The hedged request is paced like any other
+    assert len(limiter.acquired) == 2
+
+
+def test_primary_answering_before_the_hedge_wins(monkeypatch, limiter):
+    adapter = make_adapter(monkeypatch, SleepyModel("primary", delay=0.15), SleepyModel("hedge", delay=0.6))
+    warm_up(adapter.backends[0], 0.05)
+
+    started_at = time.monotonic()
+    assert adapter.invoke("prompt").content == "primary"
+    assert time.monotonic() - started_at < 0.5
+    assert (adapter.hedges_sent, adapter.hedges_won) == (1, 0)
+
+
+def test_failover_on_error(monkeypatch, limiter):
+    adapter = make_adapter(monkeypatch, SleepyModel("down", error=ConnectionError("refused")), SleepyModel("up"))
+
+    assert adapter.invoke("prompt").content == "up"
+    assert adapter.failovers == 1
+    assert adapter.backends[0].tracker.error_rate == 1.0
+    assert len(limiter.acquired) == 2
+    assert limiter.succeeded == [5]
+
+
+def test_last_error_is_raised_when_every_backend_fails(monkeypatch, limiter):
+    adapter = make_adapter(
+        monkeypatch,
+        SleepyModel("a", error=ConnectionError("a is down")),
+        SleepyModel("b", error=TimeoutError("b timed out")),
+    )
+    with pytest.raises(TimeoutError, match="b timed out"):
+        adapter.invoke("prompt")
+    assert adapter.failovers == 1
+
+
+def test_replies_from_a_failover_backend_are_not_cached(monkeypatch, tmp_path, limiter):
+    cache = LLMResponseCache(
+        tmp_path / "cache.sqlite", ttl_seconds=0, max_entries=10, max_bytes=100_000, memory_entries=10
+    )
+    monkeypatch.setattr(llm_manager, "get_response_cache", lambda: cache)
+    monkeypatch.setattr(LLMLogger, "log_request", staticmethod(lambda *args, **kwargs: None))
+
+    failing = SleepyModel("cache-primary", error=ConnectionError("refused"))
+    chat = LoggerChatModel(make_adapter(monkeypatch, failing, SleepyModel("cache-secondary")))
+    assert chat("prompt").content == "cache-secondary"
+    assert chat("prompt").content == "cache-secondary"
+    assert cache.stats() == {"hits": 0, "misses": 2}
+
+    chat = LoggerChatModel(make_adapter(monkeypatch, SleepyModel("cache-healthy"), SleepyModel("cache-secondary")))
+    assert chat("prompt").content == "cache-healthy"
+    assert chat("prompt").content == "cache-healthy"
+    assert cache.stats() == {"hits": 1, "misses": 3}
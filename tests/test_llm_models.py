@@ -0,0 +1,68 @@
+import pytest
+
+from src.libs import llm_models
+from src.libs.llm_models import DEFAULT_TEMPERATURE, ModelRegistry
+from src.utils.constants import API_KEY, LLM_API_URL, LLM_MODEL, LLM_MODEL_TYPE, TASK_RESUME, TEMPERATURE
+
+
+@pytest.fixture
+def created(monkeypatch):
+    created = []
+
+    def create_model(llm_model_type, llm_model, llm_api_url, api_key, temperature):
+        created.append((llm_model_type, llm_model, llm_api_url, api_key, temperature))
+        return object()
+
+    monkeypatch.setattr(llm_models, "create_model", create_model)
+    monkeypatch.setattr(llm_models.cfg, "LLM_MODEL_TYPE", "openai")
+    monkeypatch.setattr(llm_models.cfg, "LLM_MODEL", "gpt-4o-mini")
+    monkeypatch.setattr(llm_models.cfg, "LLM_API_URL", "https://api.openai.com/v1")
+    monkeypatch.setattr(
+        llm_models.cfg, "LLM_TASK_MODELS", {TASK_RESUME: {LLM_MODEL: "gpt-4o", TEMPERATURE: 0.2, API_KEY: "task-key"}}
+    )
+    return created
+
+
+def test_task_overrides_merge_over_the_defaults(created):
+    assert ModelRegistry.task_spec() == {
+        LLM_MODEL_TYPE: "openai",
+        LLM_MODEL: "gpt-4o-mini",
+        LLM_API_URL: "https://api.openai.com/v1",
+        TEMPERATURE: DEFAULT_TEMPERATURE,
+    }
+    assert ModelRegistry.task_spec(TASK_RESUME) == {
+        LLM_MODEL_TYPE: "openai",
+        LLM_MODEL: "gpt-4o",
+        LLM_API_URL: "https://api.openai.com/v1",
+        TEMPERATURE: 0.2,
+        API_KEY: "task-key",
+    }
+    assert ModelRegistry.task_spec("unconfigured") == ModelRegistry.task_spec()
+
+
+def test_identical_specs_share_an_instance(created):
+    registry = ModelRegistry()
+    default = registry.for_task("unconfigured", "key")
+    assert registry.from_spec(ModelRegistry.task_spec(), "key") is default
+    assert registry.for_task(TASK_RESUME, "key") is registry.for_task(TASK_RESUME, "other-key")
+    assert created == [
+        ("openai", "gpt-4o-mini", "https://api.openai.com/v1", "key", DEFAULT_TEMPERATURE),
+        ("openai", "gpt-4o", "https://api.openai.com/v1", "task-key", 0.2),
+    ]
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {LLM_MODEL_TYPE: "ollama"},
+        {LLM_MODEL: "gpt-4o"},
+        {LLM_API_URL: "http://localhost:11434"},
+        {TEMPERATURE: 0.9},
+        {API_KEY: "another-key"},
+    ],
+)
+def test_any_difference_in_the_spec_builds_a_new_model(created, change):
+    registry = ModelRegistry()
+    spec = ModelRegistry.task_spec()
+    assert registry.from_spec({**spec, **change}, "key") is not registry.from_spec(spec, "key")
+    assert len(created) == 2
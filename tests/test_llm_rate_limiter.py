@@ -0,0 +1,127 @@
+import time
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.libs.llm_rate_limiter import (
+    RateLimiter,
+    TokenBucket,
+    error_status_code,
+    parse_duration,
+    parse_retry_after,
+    response_headers,
+)
+
+
+class RateLimitError(Exception):
+    def __init__(self, headers=None):
+        super().__init__("rate limited")
+        self.status_code = 429
+        self.response = httpx.Response(429, headers=headers or {})
+
+
+def make_limiter(requests_per_minute=60, tokens_per_minute=100_000):
+    return RateLimiter(requests_per_minute, tokens_per_minute, backoff_base=1.0, backoff_max=30.0)
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [("1s", 1.0), ("20ms", 0.02), ("6m0s", 360.0), ("1h2m", 3720.0), ("2.5", 2.5), ("", None), ("soon", None)],
+)
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after-ms": "1500"}) == 1.5
+    assert parse_retry_after({"retry-after": "3"}) == 3.0
+    assert parse_retry_after({}) is None
+
+
+def test_token_bucket_queues_callers_past_capacity():
+    bucket = TokenBucket(60)
+    now = time.monotonic()
+    assert bucket.reserve(60, now) == 0.0
+    assert bucket.reserve(1, now) == pytest.approx(1.0)
+    assert bucket.reserve(1, now) == pytest.approx(2.0)
+
+
+def test_rate_limit_halves_the_request_rate_and_recovers():
+    limiter = make_limiter()
+    delay = limiter.backoff(RateLimitError({"retry-after": "2"}), attempt=0)
+    assert delay == 2.0
+    assert limiter.requests.rate_per_minute == 30
+    assert limiter._blocked_until > time.monotonic() + 1
+
+    limiter.record_success(estimated_tokens=10)
+    assert limiter.requests.rate_per_minute == 31
+
+
+def test_server_retry_after_is_not_capped():
+    limiter = make_limiter()
+    assert limiter.backoff(RateLimitError({"retry-after": "120"}), attempt=0) == 120.0
+    assert limiter._blocked_until > time.monotonic() + 100
+
+
+def test_backoff_is_capped_and_jittered():
+    limiter = make_limiter()
+    for attempt in range(10):
+        delay = limiter.backoff(ValueError("boom"), attempt)
+        assert 0 < delay <= limiter.backoff_max
+    assert limiter.requests.rate_per_minute == 60
+
+
+def test_success_headers_lower_the_limits_and_pause_on_exhaustion():
+    limiter = make_limiter(requests_per_minute=500)
+    limiter.record_success(
+        estimated_tokens=10,
+        headers={
+            "x-ratelimit-limit-requests": "100",
+            "x-ratelimit-remaining-requests": "0",
+            "x-ratelimit-reset-requests": "5s",
+        },
+    )
+    assert limiter.requests.capacity == 100
+    assert limiter.max_requests_per_minute == 100
+    assert limiter._blocked_until > time.monotonic() + 4
+
+
+def test_error_status_code():
+    assert error_status_code(RateLimitError()) == 429
+    assert error_status_code(ValueError()) is None
+
+
+def test_response_headers_of_a_reply():
+    reply = AIMessage(content="hi", response_metadata={"headers": {"x-ratelimit-limit-requests": "100"}})
+    assert response_headers(reply) == {"x-ratelimit-limit-requests": "100"}
+    assert response_headers(AIMessage(content="hi")) == {}
+
+
+def test_openai_models_ask_for_response_headers():
+    from src.libs.llm_models import OpenAIModel
+
+    assert OpenAIModel("sk-test", "gpt-4o-mini").model.include_response_headers
+
+
+def test_replies_with_response_headers_expose_them():
+    from langchain_openai import ChatOpenAI
+
+    def handler(request):
+        body = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4o-mini",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "hi"}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+        return httpx.Response(200, json=body, headers={"x-ratelimit-remaining-requests": "0"})
+
+    chat = ChatOpenAI(
+        model_name="gpt-4o-mini",
+        openai_api_key="sk-test",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        include_response_headers=True,
+    )
+    assert response_headers(chat.invoke("hello"))["x-ratelimit-remaining-requests"] == "0"
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+pytest.importorskip("lib_resume_builder_AIHawk")
+
+from src.libs.llm_token_budget import count_tokens
+from src.libs.resume_and_cover_builder import utils
+from src.libs.resume_and_cover_builder.utils import LLMLogger, LoggerChatModel, StreamingSanitizer
+
+REPLY = "\n  ```html\n<h1>**Jane** Doe</h1>   \n\n<p>*Go* and ```Rust```</p>\n'''\n  <ul>\n</ul>  \n```\n\n  "
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StreamingModel:
+    """Chat model that streams a fixed reply in fixed-size chunks."""
+
+    model_name = "stream-model"
+
+    def __init__(self, reply, size, usage_metadata=None):
+        self.chunks = chunked(reply, size)
+        self.usage_metadata = usage_metadata
+
+    async def astream(self, messages):
+        for index, piece in enumerate(self.chunks):
+            last = index == len(self.chunks) - 1
+            yield AIMessageChunk(content=piece, usage_metadata=self.usage_metadata if last else None)
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    requests = []
+    monkeypatch.setattr(utils, "get_response_cache", lambda: None)
+    monkeypatch.setattr(
+        LLMLogger, "log_request", staticmethod(lambda prompts, parsed_reply, **kwargs: requests.append(parsed_reply))
+    )
+    return requests
+
+
+def stream(model, messages="Write the header"):
+    async def collect():
+        return [delta async for delta in model.astream(messages)]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 7, len(REPLY)])
+def test_sanitizer_deltas_equal_the_sanitized_reply(size):
+    sanitizer = StreamingSanitizer()
+    deltas = [sanitizer.feed(piece) for piece in chunked(REPLY, size)] + [sanitizer.finish()]
+    assert "".join(deltas) == LoggerChatModel.sanitize_llm_output(REPLY)
+
+
+@pytest.mark.parametrize("reply", ["", "   \n\n  ", "```html\n```", "no newline at all  ", "line  \n  \n"])
+def test_sanitizer_handles_blank_and_unterminated_replies(reply):
+    sanitizer = StreamingSanitizer()
+    deltas = [sanitizer.feed(piece) for piece in chunked(reply, 2)] + [sanitizer.finish()]
+    assert "".join(deltas) == LoggerChatModel.sanitize_llm_output(reply)
+
+
+@pytest.mark.parametrize("size", [1, 3, 5])
+def test_astream_yields_the_sanitized_reply_and_rebuilds_missing_usage(logged, size):
+    model = LoggerChatModel(StreamingModel(REPLY, size))
+    deltas = stream(model)
+
+    assert "".join(deltas) == LoggerChatModel.sanitize_llm_output(REPLY)
+    assert all(deltas)
+    usage = logged[0]["usage_metadata"]
+    assert usage["input_tokens"] == model.count_prompt_tokens("Write the header")
+    assert usage["output_tokens"] == count_tokens(REPLY, "stream-model")
+    assert usage["total_tokens"] == usage["input_tokens"] + usage["output_tokens"]
+
+
+def test_astream_keeps_the_usage_reported_by_the_provider(logged):
+    usage = {"input_tokens": 11, "output_tokens": 22, "total_tokens": 33}
+    model = LoggerChatModel(StreamingModel(REPLY, 4, usage_metadata=usage))
+    stream(model)
+    assert logged[0]["usage_metadata"]["total_tokens"] == 33
+    assert logged[0]["content"] == REPLY
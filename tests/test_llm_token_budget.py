@@ -0,0 +1,114 @@
+import pytest
+import requests
+import tiktoken
+from langchain_core.messages import AIMessage
+
+from src.libs import llm_token_budget
+from src.libs.llm_token_budget import (
+    TRUNCATION_MARKER,
+    PromptCacheStats,
+    TokenBudgetPlanner,
+    cached_input_tokens,
+    count_tokens,
+    get_encoding,
+    template_tokens,
+    truncate_to_tokens,
+)
+
+
+class WordEncoding:
+    """One token per word."""
+
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+    def decode(self, tokens):
+        return " ".join(tokens)
+
+
+def clear_caches():
+    for function in (get_encoding, count_tokens, template_tokens):
+        function.cache_clear()
+
+
+@pytest.fixture
+def words(monkeypatch):
+    clear_caches()
+    monkeypatch.setattr(llm_token_budget, "get_encoding", lambda model_name: WordEncoding())
+    yield
+    clear_caches()
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    def download(*args, **kwargs):
+        raise requests.ConnectionError("no network")
+
+    clear_caches()
+    monkeypatch.setattr(tiktoken, "get_encoding", download)
+    monkeypatch.setattr(tiktoken, "encoding_for_model", download)
+    yield
+    clear_caches()
+
+
+def test_offline_encoding_falls_back_to_the_estimate(offline):
+    assert get_encoding("gpt-4o-mini") is None
+    assert count_tokens("x" * 40, "gpt-4o-mini") == 11
+    assert truncate_to_tokens("x" * 400, 10, "gpt-4o-mini").endswith(TRUNCATION_MARKER)
+
+
+def test_template_tokens_ignore_variables(words):
+    assert template_tokens("Resume: {resume} Job: {job}") == 2
+    assert template_tokens("Literal {{braces}} stay") == 3
+
+
+def test_truncate_keeps_the_beginning_and_marks_the_cut(words):
+    assert truncate_to_tokens("one two three", 5) == "one two three"
+    assert truncate_to_tokens("a b c d e f g h", 5) == "a b c d" + TRUNCATION_MARKER
+    assert truncate_to_tokens("a b c", 0) == ""
+
+
+def test_planner_leaves_prompts_within_budget_alone(words):
+    planner = TokenBudgetPlanner(100, {})
+    inputs = {"resume": "a b c", "job": "d e"}
+    assert planner.fit("summary", "Resume {resume} Job {job}", inputs, {"job": 1}) == (inputs, 7)
+
+
+def test_planner_trims_lowest_priority_inputs_first(words):
+    planner = TokenBudgetPlanner(100, {"summary": 12})
+    inputs = {"resume": " ".join("r" * 10), "job": " ".join("j" * 10), "question": "q"}
+    fitted, planned = planner.fit("summary", "{resume}{job}{question}", inputs, {"job": 1, "resume": 2})
+    assert fitted["resume"] == inputs["resume"]
+    assert fitted["job"].endswith(TRUNCATION_MARKER)
+    assert fitted["question"] == "q"
+    assert planned <= 12
+
+
+def test_planner_never_trims_inputs_without_priority(words):
+    planner = TokenBudgetPlanner(3, {})
+    inputs = {"resume": "a b c d e f"}
+    fitted, planned = planner.fit(None, "{resume}", inputs, {})
+    assert fitted == inputs
+    assert planned == 6
+
+
+@pytest.mark.parametrize(
+    "reply, cached",
+    [
+        (AIMessage(content="", usage_metadata={
+            "input_tokens": 10, "output_tokens": 1, "total_tokens": 11, "input_token_details": {"cache_read": 7},
+        }), 7),
+        (AIMessage(content="", response_metadata={"token_usage": {"prompt_tokens_details": {"cached_tokens": 5}}}), 5),
+        (AIMessage(content="", response_metadata={"usage": {"cache_read_input_tokens": 3}}), 3),
+        (AIMessage(content=""), 0),
+    ],
+)
+def test_cached_input_tokens(reply, cached):
+    assert cached_input_tokens(reply) == cached
+
+
+def test_prompt_cache_hit_rate():
+    stats = PromptCacheStats()
+    assert stats.hit_rate == 0.0
+    stats.record(100, 0)
+    assert stats.record(100, 50) == 0.25
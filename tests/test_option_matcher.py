@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.libs.option_matcher import (
+    ProfileOptionMatcher,
+    match_option,
+    normalize_option,
+    polarity,
+    question_region,
+)
+
+YES_NO = ["Yes", "No"]
+
+
+def profile(**work_preferences):
+    return SimpleNamespace(
+        legal_authorization=SimpleNamespace(
+            legally_allowed_to_work_in_us="Yes",
+            requires_us_sponsorship="Yes",
+            requires_us_visa="Yes",
+            legally_allowed_to_work_in_eu="Yes",
+            requires_eu_sponsorship="No",
+            requires_eu_visa="No",
+        ),
+        work_preferences=SimpleNamespace(**{"remote_work": "Yes", "in_person_work": "No", **work_preferences}),
+        self_identification=SimpleNamespace(gender="Female", veteran="No", ethnicity="Asian", pronouns=""),
+    )
+
+
+@pytest.fixture
+def matcher():
+    return ProfileOptionMatcher(min_ratio=0.8)
+
+
+@pytest.mark.parametrize(
+    "text, value",
+    [
+        ("Yes", True),
+        ("No, I will not require sponsorship", False),
+        ("I am not a protected veteran", False),
+        ("I identify as a protected veteran", True),
+        ("I don't wish to answer", None),
+        ("Asian", None),
+        (False, False),
+    ],
+)
+def test_polarity(text, value):
+    assert polarity(text) is value
+
+
+def test_question_region():
+    assert question_region("Are you authorized to work in the U.S.?") == "us"
+    assert question_region("Please let us know if you need a visa", "Berlin, Germany") is None
+    assert question_region("Do you need a visa?", "Austin, TX") == "us"
+    assert question_region("Right to work in the United Kingdom?") == "uk"
+
+
+def test_match_option():
+    assert match_option("No", ("Yes", "No"), 0.8) == "No"
+    assert match_option("Yes", ("Yes, I will require sponsorship", "No, I will not require sponsorship"), 0.8) == (
+        "Yes, I will require sponsorship"
+    )
+    assert match_option("Asian", ("Asian (Not Hispanic or Latino)", "White", "Decline to self identify"), 0.8) == (
+        "Asian (Not Hispanic or Latino)"
+    )
+    assert match_option("Male", ("Female", "Male", "Non-binary"), 0.8) == "Male"
+    assert match_option("Yes", ("Yes", "Yes, but later", "No"), 0.8) is None
+
+
+@pytest.mark.parametrize(
+    "question, answer",
+    [
+        ("Will you now or in the future require sponsorship for employment visa status in the US?", "Yes"),
+        ("Will you require sponsorship for work authorization in the US?", "Yes"),
+        ("Are you legally authorized to work in the United States?", "Yes"),
+        # Negated wording asks for the opposite of the profile's "requires" fields
+        ("Are you legally authorized to work in the United States without sponsorship?", "Yes"),
+        ("Will you be able to work in the US without requiring visa sponsorship?", "No"),
+        ("Can you start immediately in the US without a visa?", "No"),
+        ("Can you work in Europe without sponsorship?", "Yes"),
+        ("Do you require a visa to work in the EU?", "No"),
+    ],
+)
+def test_legal_authorization(matcher, question, answer):
+    assert matcher.answer(question, YES_NO, profile()) == answer
+
+
+def test_region_falls_back_to_the_job_location(matcher):
+    assert matcher.answer("Can you start immediately without a visa?", YES_NO, profile(), "Austin, TX") == "No"
+    assert matcher.answer("Can you start immediately without a visa?", YES_NO, profile(), "Paris, France") is None
+    assert matcher.answer("Can you start immediately without a visa?", YES_NO, profile()) is None
+
+
+@pytest.mark.parametrize(
+    "question",
+    ["Are you comfortable working on-site?", "Are you able to work onsite 3 days a week?",
+     "Can you work in-person?", "Are you comfortable commuting to our office?"],
+)
+def test_in_person_questions(matcher, question):
+    assert normalize_option(question) != question.lower()
+    assert matcher.answer(question, YES_NO, profile()) == "No"
+    assert matcher.answer(question, YES_NO, profile(in_person_work="Yes")) == "Yes"
+
+
+def test_self_identification(matcher):
+    options = ["Male", "Female", "I don't wish to answer"]
+    assert matcher.answer("Gender", options, profile()) == "Female"
+    assert matcher.answer("Are you a protected veteran?", ["I am a protected veteran", "I am not a protected veteran"],
+                          profile()) == "I am not a protected veteran"
+    # Empty profile values are left to the LLM
+    assert matcher.answer("What are your pronouns?", ["She/her", "He/him"], profile()) is None
+
+
+def test_unknown_questions_are_left_to_the_llm(matcher):
+    assert matcher.answer("What is your favourite colour?", ["Red", "Blue"], profile()) is None
+    assert matcher.answer("Are you open to remote work?", YES_NO, profile()) == "Yes"
+    assert (matcher.hits, matcher.misses) == (1, 1)
@@ -0,0 +1,88 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from pydantic import BaseModel, HttpUrl
+
+from src.libs.prompt_serializer import PromptSerializer, compact_data, to_prompt_text
+
+
+class Experience(BaseModel):
+    position: Optional[str] = None
+    company: Optional[str] = None
+    key_responsibilities: Optional[List[dict]] = None
+    skills_acquired: Optional[List[str]] = None
+
+
+class PersonalInformation(BaseModel):
+    name: Optional[str] = None
+    github: Optional[HttpUrl] = None
+    phone: Optional[str] = None
+
+
+@dataclass
+class Availability:
+    notice_period: str = ""
+    relocation: set = field(default_factory=set)
+
+
+def test_empty_values_are_dropped():
+    assert compact_data(Experience(position="  Engineer ", company="", skills_acquired=[])) == {"position": "Engineer"}
+    assert compact_data(Experience()) is None
+    assert to_prompt_text(Experience()) == ""
+
+
+def test_single_key_mappings_are_flattened():
+    responsibilities = [{"responsibility": "Built APIs"}, {"responsibility": "Led reviews"}]
+    assert compact_data(responsibilities) == ["Built APIs", "Led reviews"]
+    assert compact_data([{"Algorithms": "A"}, {"Databases": "B"}]) == {"Algorithms": "A", "Databases": "B"}
+    mixed = [{"grade": "A"}, {"grade": "B"}, {"exam": "C"}]
+    assert compact_data(mixed) == mixed
+
+
+def test_sets_are_sorted_and_constrained_types_are_plain():
+    assert compact_data(Availability(notice_period="2 weeks", relocation={"Paris", "Berlin"})) == {
+        "notice_period": "2 weeks",
+        "relocation": ["Berlin", "Paris"],
+    }
+    info = PersonalInformation(name="Ada", github="https://github.com/ada")
+    assert to_prompt_text(info) == "name: Ada\ngithub: https://github.com/ada"
+
+
+def test_yaml_follows_the_schema_order():
+    experience = Experience(
+        position="Engineer",
+        company="Acme",
+        key_responsibilities=[{"responsibility": "Built APIs"}],
+        skills_acquired=["Python", "Go"],
+    )
+    assert to_prompt_text([experience]) == (
+        "- position: Engineer\n"
+        "  company: Acme\n"
+        "  key_responsibilities:\n"
+        "  - Built APIs\n"
+        "  skills_acquired:\n"
+        "  - Python\n"
+        "  - Go"
+    )
+
+
+def test_serializer_memoizes_and_reports_savings():
+    serializer = PromptSerializer(max_entries=1)
+    experience = Experience(position="Engineer", company="Acme")
+    text = serializer.serialize(experience, "experience_details")
+    assert serializer.serialize(Experience(position="Engineer", company="Acme"), "experience_details") is text
+    assert serializer.serialize("plain text", "job_description") == "plain text"
+
+    report = serializer.savings_report()
+    assert list(report) == ["experience_details"]
+    stats = report["experience_details"]
+    assert stats["requests"] == 2
+    assert stats["saved_tokens"] == stats["default_tokens"] - stats["compact_tokens"] > 0
+
+
+def test_serializer_evicts_the_least_recently_used_entry():
+    serializer = PromptSerializer(max_entries=1)
+    serializer.serialize(Experience(position="A"))
+    serializer.serialize(Experience(position="B"))
+    assert len(serializer._cache) == 1
+    assert serializer.content_hash(Experience(position="B")) in serializer._cache
@@ -0,0 +1,103 @@
+import pytest
+
+from src.libs.question_router import (
+    COVER_DOCUMENT,
+    DOCUMENT_PROTOTYPES,
+    DOCUMENT_RULES,
+    RESUME_DOCUMENT,
+    SECTION_PROTOTYPES,
+    SECTION_RULES,
+    LabelRouter,
+)
+from src.utils.constants import (
+    AVAILABILITY,
+    COVER_LETTER,
+    EXPERIENCE_DETAILS,
+    LEGAL_AUTHORIZATION,
+    PERSONAL_INFORMATION,
+    SALARY_EXPECTATIONS,
+    WORK_PREFERENCES,
+)
+
+def embed(text):
+    """Two-dimensional embedding: how often a text names fruit and tools."""
+    words = text.lower().replace("?", "").split()
+    return [sum(word in ("apple", "pear", "plum") for word in words), sum(word in ("hammer", "saw") for word in words)]
+
+
+def router(tmp_path=None, embed_fn=embed, **kwargs):
+    return LabelRouter(
+        "test",
+        rules={"fruit": [r"\bbanana\b"], "tool": [r"\bwrench\b"]},
+        prototypes={"fruit": ["apple", "pear"], "tool": ["hammer", "saw"]},
+        embedding_model="test",
+        min_similarity=0.5,
+        min_margin=0.1,
+        centroids_path=tmp_path / "centroids.json" if tmp_path else None,
+        embed=embed_fn,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize(
+    "question, section",
+    [
+        ("What is your email address?", PERSONAL_INFORMATION),
+        ("Are you legally authorized to work in the US?", LEGAL_AUTHORIZATION),
+        ("Are you willing to relocate or commute?", WORK_PREFERENCES),
+        ("How many years of experience do you have with Python?", EXPERIENCE_DETAILS),
+        ("What is your notice period?", AVAILABILITY),
+        ("What are your salary expectations?", SALARY_EXPECTATIONS),
+        ("Why do you want to work for us?", COVER_LETTER),
+    ],
+)
+def test_section_rules(question, section):
+    sections = LabelRouter("section", SECTION_RULES, SECTION_PROTOTYPES, "test", 0.5, 0.1, embed=embed)
+    assert sections.route_by_rules(question) == section
+
+
+def test_document_rules():
+    documents = LabelRouter("document", DOCUMENT_RULES, DOCUMENT_PROTOTYPES, "test", 0.5, 0.1, embed=embed)
+    assert documents.route_by_rules("Upload your CV") == RESUME_DOCUMENT
+    assert documents.route_by_rules("Motivation letter") == COVER_DOCUMENT
+    assert documents.route_by_rules("Attachments") is None
+
+
+def test_rules_win_and_ties_are_left_to_the_centroids():
+    labels = router()
+    assert labels.route_by_rules("banana") == "fruit"
+    assert labels.route_by_rules("banana or wrench") is None
+    assert labels.route_by_rules("nothing") is None
+
+
+def test_route_falls_back_from_rules_to_centroids_to_the_llm():
+    labels = router()
+    assert labels.route("banana") == "fruit"
+    assert labels.route("a plum") == "fruit"
+    # As close to both centroids: ambiguous
+    assert labels.route("apple and hammer") is None
+    assert labels.stats == {"rules": 1, "centroids": 1, "fallback": 1}
+
+
+def test_centroids_are_kept_on_disk(tmp_path):
+    calls = []
+
+    def counting_embed(text):
+        calls.append(text)
+        return embed(text)
+
+    assert router(tmp_path, counting_embed).centroids() == router(tmp_path).centroids()
+    assert len(calls) == 4
+    router(tmp_path, counting_embed).centroids()
+    assert len(calls) == 4
+
+
+def test_missing_embedding_model_sends_ambiguous_texts_to_the_llm():
+    def unavailable(text):
+        raise ImportError("sentence-transformers is not installed")
+
+    labels = router(embed_fn=unavailable)
+    assert labels.route("a plum") is None
+    assert labels.route("a pear") is None
+    assert labels.route("banana") == "fruit"
+    assert labels.stats == {"rules": 1, "centroids": 0, "fallback": 2}
@@ -0,0 +1,118 @@
+import json
+
+from src.libs.structured_job_data import (
+    StructuredPage,
+    extract_structured,
+    json_ld_fields,
+    meta_fields,
+    microdata_fields,
+    regex_fields,
+)
+
+LONG_DESCRIPTION = "Build and run the services behind our payments platform. " * 5
+
+
+def page(head="", body=""):
+    return f"<html><head>{head}</head><body>{body}</body></html>"
+
+
+def json_ld(data):
+    return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+
+def test_json_ld_job_posting_inside_a_graph():
+    data = {
+        "@context": "https://schema.org",
+        "@graph": [
+            {"@type": "Organization", "name": "Not the posting"},
+            {
+                "@type": "JobPosting",
+                "title": "Backend Engineer",
+                "hiringOrganization": {"@type": "Organization", "name": "Acme"},
+                "description": "&lt;p&gt;Build &lt;b&gt;APIs&lt;/b&gt;&lt;/p&gt;",
+                "jobLocation": [
+                    {"address": {"addressLocality": "Berlin", "addressRegion": "Berlin", "addressCountry": "DE"}}
+                ],
+                "applicationContact": {"email": "jobs@acme.example.org"},
+            },
+        ],
+    }
+    fields = json_ld_fields(StructuredPage(page(json_ld(data))))
+    assert fields == {
+        "role": "Backend Engineer",
+        "company": "Acme",
+        "description": "Build APIs",
+        "location": "Berlin, DE",
+        "recruiter_email": "jobs@acme.example.org",
+    }
+
+
+def test_json_ld_remote_posting_and_unreadable_blocks():
+    html = page(
+        '<script type="application/ld+json">{not json</script>'
+        + json_ld({"@type": ["JobPosting"], "title": "SRE", "jobLocationType": "TELECOMMUTE"})
+    )
+    assert json_ld_fields(StructuredPage(html))["location"] == "Remote"
+
+
+def test_microdata_job_posting():
+    body = (
+        '<div itemscope itemtype="https://schema.org/JobPosting">'
+        '<h1 itemprop="title">Data Engineer</h1>'
+        '<div itemprop="hiringOrganization" itemscope><span itemprop="name">Globex</span></div>'
+        '<div itemprop="jobLocation" itemscope><div itemprop="address" itemscope>'
+        '<span itemprop="addressLocality">Lyon</span><meta itemprop="addressCountry" content="FR"></div></div>'
+        '<div itemprop="description"><p>Pipelines</p> <p>and dashboards</p></div>'
+        "</div>"
+        '<span itemprop="title">Outside the posting</span>'
+    )
+    assert microdata_fields(StructuredPage(page(body=body))) == {
+        "role": "Data Engineer",
+        "company": "Globex",
+        "description": "Pipelines and dashboards",
+        "location": "Lyon, FR",
+    }
+
+
+def test_meta_titles_of_known_job_boards():
+    linkedin = page('<meta property="og:title" content="Acme hiring Senior Engineer in Berlin, Germany | LinkedIn">')
+    assert meta_fields(StructuredPage(linkedin)) == {
+        "company": "Acme",
+        "role": "Senior Engineer",
+        "location": "Berlin, Germany",
+    }
+    greenhouse = page('<meta name="twitter:title" content="Job Application for QA Lead at Initech">')
+    assert meta_fields(StructuredPage(greenhouse)) == {"role": "QA Lead", "company": "Initech"}
+    assert meta_fields(StructuredPage(page('<meta property="og:title" content="Careers">'))) == {}
+
+
+def test_recruiter_email_skips_no_reply_addresses():
+    body = '<a href="mailto:noreply@acme.com">Mail</a><p>Questions? Write to jane.doe@acme.com today.</p>'
+    assert regex_fields(StructuredPage(page(body=body))) == {"recruiter_email": "jane.doe@acme.com"}
+    hidden = '<script>var contact = "hidden@acme.com";</script><p>No contact</p>'
+    assert regex_fields(StructuredPage(page(body=hidden))) == {}
+
+
+def test_chain_keeps_the_first_value_of_each_field():
+    html = page(
+        json_ld({"@type": "JobPosting", "title": "Backend Engineer", "description": "Too short to be the posting"})
+        + '<meta property="og:title" content="Acme hiring Platform Engineer in Berlin | LinkedIn">',
+        '<div itemscope itemtype="http://schema.org/JobPosting">'
+        f'<div itemprop="description">{LONG_DESCRIPTION}</div></div>'
+        '<a href="mailto:talent@acme.com">Apply</a>',
+    )
+    assert extract_structured(html) == {
+        "role": "Backend Engineer",
+        "description": LONG_DESCRIPTION.strip(),
+        "company": "Acme",
+        "location": "Berlin",
+        "recruiter_email": "talent@acme.com",
+    }
+
+
+def test_failing_extractors_are_skipped():
+    def broken(page):
+        raise KeyError("title")
+
+    html = page('<meta property="og:title" content="Job Application for QA Lead at Initech">')
+    assert extract_structured(html, [broken, meta_fields]) == {"role": "QA Lead", "company": "Initech"}